@@ -0,0 +1,55 @@
+"""
+Compares the evaluation of a reduced polynomial at many X values: polynomial_solver.evaluate called in a Python
+loop, the compiled Horner function (CompiledPolynomial) in a loop and CompiledPolynomial.evaluate_many on an array.
+
+Usage: python benchmarks/bench_evaluator.py [--size 10000000] [--scalar-size 100000] [--equation "..."]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.append(ROOT)
+
+from src.equation_parser import EquationParser  # noqa: E402
+from src.evaluator import compile_polynomial  # noqa: E402
+from src.polynomial_solver import evaluate  # noqa: E402
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=10 ** 7)
+    arg_parser.add_argument('--scalar-size', type=int, default=10 ** 5)
+    arg_parser.add_argument('--equation', default='3 * X^5 - 2 * X^4 + X^3 - 7 * X + 1 = 0.5 * X^2')
+    args = arg_parser.parse_args()
+    equation_parser = EquationParser(args.equation, max_degree=None)
+    equation_parser.parse_equation()
+    compiled = compile_polynomial(equation_parser.multipliers)
+    coefficients = compiled.coefficients
+    xs = np.random.default_rng(0).uniform(-2.0, 2.0, args.size)
+    points = xs[:args.scalar_size].tolist()
+
+    start = time.perf_counter()
+    for x in points:
+        evaluate(coefficients, x)
+    loop = (time.perf_counter() - start) / len(points)
+    function = compiled.function
+    start = time.perf_counter()
+    for x in points:
+        function(x)
+    unrolled = (time.perf_counter() - start) / len(points)
+    for dtype in (np.float64, np.complex128):
+        values = xs.astype(dtype)
+        start = time.perf_counter()
+        compiled.evaluate_many(values)
+        vectorized = (time.perf_counter() - start) / args.size
+        print(f'evaluate_many, {np.dtype(dtype).name}: {vectorized * 1e9:.2f} ns per point')
+    print(f'evaluate loop: {loop * 1e9:.2f} ns per point')
+    print(f'compiled loop: {unrolled * 1e9:.2f} ns per point ({loop / unrolled:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
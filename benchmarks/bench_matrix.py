@@ -0,0 +1,69 @@
+"""
+Compares the blocked Matrix product with a naive nested-loop product over nested lists,
+and MatrixBatch.determinants (numpy.linalg.det on the whole batch if numpy is installed) with Matrix.determinant
+called in a Python loop and with a direct numpy.linalg.det call.
+
+Usage: python benchmarks/bench_matrix.py [--sizes 32 128 256] [--batch 10000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.append(ROOT)
+
+from src.types.matrix import Matrix, MatrixBatch  # noqa: E402
+
+
+def naive_multiply(left, right):
+    rows, inner, columns = len(left), len(right), len(right[0])
+    result = [[0.0] * columns for _ in range(rows)]
+    for i in range(rows):
+        for j in range(columns):
+            total = 0.0
+            for k in range(inner):
+                total += left[i][k] * right[k][j]
+            result[i][j] = total
+    return result
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[32, 128, 256])
+    arg_parser.add_argument('--batch', type=int, default=10 ** 4)
+    arg_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[2, 3, 4, 8])
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    generator = random.Random(0)
+    print(f'{"size":>6} {"naive, s":>10} {"blocked, s":>11} {"speedup":>8}')
+    for size in args.sizes:
+        left = [[generator.uniform(-1.0, 1.0) for _ in range(size)] for _ in range(size)]
+        right = [[generator.uniform(-1.0, 1.0) for _ in range(size)] for _ in range(size)]
+        left_matrix, right_matrix = Matrix.from_rows(left), Matrix.from_rows(right)
+        naive = min(timeit.repeat(lambda: naive_multiply(left, right), number=1, repeat=args.repeat))
+        blocked = min(timeit.repeat(lambda: left_matrix @ right_matrix, number=1, repeat=args.repeat))
+        print(f'{size:>6} {naive:>10.4f} {blocked:>11.4f} {naive / blocked:>7.2f}x')
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    print(f'\n{args.batch} determinants')
+    print(f'{"size":>6} {"loop, s":>9} {"batch, s":>9} {"numpy, s":>9}')
+    for size in args.batch_sizes:
+        batch = MatrixBatch(args.batch, size, [generator.uniform(-1.0, 1.0)
+                                               for _ in range(args.batch * size * size)])
+        matrices = [batch[i] for i in range(len(batch))]
+        loop = min(timeit.repeat(lambda: [matrix.determinant() for matrix in matrices], number=1,
+                                 repeat=args.repeat))
+        batched = min(timeit.repeat(batch.determinants, number=1, repeat=args.repeat))
+        vectorized = '-'
+        if np is not None:
+            stacked = batch.to_numpy()
+            vectorized = f'{min(timeit.repeat(lambda: np.linalg.det(stacked), number=1, repeat=args.repeat)):.4f}'
+        print(f'{size:>6} {loop:>9.4f} {batched:>9.4f} {vectorized:>9}')
+
+
+if __name__ == '__main__':
+    main()
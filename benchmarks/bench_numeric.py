@@ -0,0 +1,105 @@
+"""
+Compares utils.pow/utils.sqrt (backed by the numeric kernels) with their previous
+recursive/Newton implementations and with the math module.
+
+Usage: python benchmarks/bench_numeric.py [--number 20000]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from src.utils import compare_floats_with_epsilon, pow, sqrt  # noqa: E402
+
+
+def legacy_sqrt(num: float, epsilon: float = 10e-12) -> float:
+    """
+    source: https://stackoverflow.com/a/3047531/8990391
+    """
+    if compare_floats_with_epsilon(num, 0.0):
+        return 0.0
+    if num < 0.0:
+        raise ValueError("sqrt принимает только положительные значения")
+    last_guess = num / 2
+    while True:
+        guess = (last_guess + num / last_guess) / 2
+        if abs(guess - last_guess) < epsilon:
+            return guess
+        last_guess = guess
+
+
+def legacy_sqr(num: float) -> float:
+    """
+    I improved the code from https://stackoverflow.com/a/3519308/8990391
+    """
+    return num * num
+
+
+def legacy_pow(num: float, degree: float, epsilon: float = 10e-12) -> float:
+    """
+    I improved the code from https://stackoverflow.com/a/3519308/8990391
+    """
+    sign = 1
+    if num < 0.0:
+        if int(degree) != degree:
+            raise ValueError("Мнимые числа при возведении в степень")
+        degree = int(degree)
+        if degree % 2 == 1:
+            sign = -1
+        num = -num
+    if compare_floats_with_epsilon(num, 0.0):
+        if degree < 0.0:
+            raise ZeroDivisionError("Деление на ноль при возведении в степень")
+        elif compare_floats_with_epsilon(degree, 0.0):
+            return 1
+        return 0
+    if compare_floats_with_epsilon(degree, 0.0):
+        return 1
+    if degree < 0:
+        return 1 / legacy_pow(num, -degree, epsilon)
+    if degree >= 10:
+        return sign * legacy_sqr(legacy_pow(num, degree / 2, epsilon / 2))
+    if degree >= 1:
+        return sign * num * legacy_pow(num, degree - 1, epsilon)
+    if epsilon >= 1:
+        return sign * legacy_sqrt(num)
+    return sign * legacy_sqrt(legacy_pow(num, degree * 2, epsilon * 2))
+
+
+def run(function, arguments) -> float:
+    """
+    Nanoseconds per call
+    """
+    def call_all():
+        for argument in arguments:
+            function(*argument)
+    return min(timeit.repeat(call_all, number=1, repeat=3)) / len(arguments) * 1e9
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--number', type=int, default=20000)
+    args = arg_parser.parse_args()
+    generator = random.Random(0)
+    cases = {
+        'sqrt': ([(generator.uniform(0.0, 1e6),) for _ in range(args.number)],
+                 [legacy_sqrt, sqrt, math.sqrt]),
+        'sqrt of huge': ([(generator.uniform(1e100, 1e200),) for _ in range(args.number)],
+                         [legacy_sqrt, sqrt, math.sqrt]),
+        'pow integer': ([(generator.uniform(0.5, 2.0), float(generator.randint(-50, 50))) for _ in range(args.number)],
+                        [legacy_pow, pow, math.pow]),
+        'pow real': ([(generator.uniform(0.5, 10.0), generator.uniform(-20.0, 20.0)) for _ in range(args.number)],
+                     [legacy_pow, pow, math.pow]),
+    }
+    print(f'{"case":>14} {"legacy, ns":>12} {"utils, ns":>10} {"math, ns":>9}')
+    for name, (arguments, functions) in cases.items():
+        timings = [run(function, arguments) for function in functions]
+        print(f'{name:>14} {timings[0]:>12.0f} {timings[1]:>10.0f} {timings[2]:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Compares the single-pass EquationParser.parse_part with the previous regex re-splitting implementation.
+
+Usage: python benchmarks/bench_parser.py [--terms 10000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+from typing import List, Tuple, Union
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from src.equation_parser import EquationParser  # noqa: E402
+from src.utils import compare_floats_with_epsilon, pow  # noqa: E402
+
+
+class LegacyEquationParser(EquationParser):
+    """
+    The parser before the single-pass tokenizer, kept only as the benchmark reference
+    """
+
+    def parse_part(self, part: str, sign: int) -> None:
+        compounds = re.sub(r'([^+*^/-])(\+)', r'\1|', part).split('|')
+        if len(compounds) > 1:
+            for compound in compounds:
+                self.parse_part(compound, sign)
+            return
+        compounds = re.sub(r'([^+*^/-])(-)', r'\1|', part).split('|')
+        if len(compounds) > 1:
+            self.parse_part(compounds[0], sign)
+            for compound in compounds[1:]:
+                self.parse_part(compound, sign * -1)
+            return
+        self.parse_compound(part, sign)
+
+    def parse_compound(self, compound: str, sign: int):
+        fractions = compound.split('*')
+        nominators = []
+        denominators = []
+        for fraction in fractions:
+            nominator, literal_denominators = self.parse_fraction(fraction)
+            nominators.append(nominator)
+            denominators.extend(literal_denominators)
+        multiplier, degree = self.check_fraction(nominators, denominators)
+        self.multipliers[degree] += multiplier * sign
+
+    def parse_fraction(self, fraction: str) -> Tuple[Union[float, str], List[Union[float, str]]]:
+        operands = fraction.split('/')
+        nominator = self.parse_operand(operands[0])
+        denominators = [self.parse_operand(operand) for operand in operands[1:]]
+        return nominator, denominators
+
+    def parse_operand(self, operand: str) -> Union[float, str]:
+        literals = operand.split('^', 1)
+        if len(literals) == 1:
+            if literals[0] == 'X':
+                return f'{literals[0]}^1'
+            return self.parse_number(literals[0])
+        power = self.parse_operand(literals[1])
+        if isinstance(power, str):
+            raise ValueError("X не может быть в степени, X может быть только возводиться в степень")
+        if literals[0] == 'X':
+            return f'{literals[0]}^{power}'
+        return pow(self.parse_number(literals[0]), power)
+
+    def check_fraction(self, nominators: List[Union[float, str]], denominators: List[Union[float, str]]) -> Tuple[float, float]:
+        nominator_multiplier, nominator_degree = self.get_multiplier_and_degree(nominators)
+        denominator_multiplier, denominator_degree = self.get_multiplier_and_degree(denominators)
+        if compare_floats_with_epsilon(denominator_multiplier, 0.0):
+            raise ZeroDivisionError('Уравнение некорректно (есть деление на 0)')
+        multiplier = nominator_multiplier / denominator_multiplier
+        degree = nominator_degree - denominator_degree
+        return multiplier, degree
+
+    @staticmethod
+    def get_multiplier_and_degree(values: List[Union[float, str]]) -> Tuple[float, float]:
+        multiplier = 1.0
+        degree = 0.0
+        for value in values:
+            if isinstance(value, float):
+                multiplier *= float(value)
+            else:
+                degree += float(value[2:])
+        return multiplier, degree
+
+
+def generate_equation(terms: int, seed: int = 0, with_powers: bool = False) -> str:
+    generator = random.Random(seed)
+    numbers = ['3.5', '-1.25', '7/2', '10', '+0.5']
+    if with_powers:
+        numbers += ['2.1^4.3', '2^-1']
+    unknowns = ['X^2', 'X^1', 'X^0', 'X', 'X^3/X^1']
+    parts = []
+    for i in range(terms):
+        factors = [generator.choice(numbers) for _ in range(generator.randint(0, 2))]
+        factors.insert(generator.randint(0, len(factors)), generator.choice(unknowns))
+        term = '*'.join(factors)
+        parts.append(term if i == 0 else f' {generator.choice("+-")} {term}')
+    return ''.join(parts) + ' = 0'
+
+
+def measure(parser_class, equation: str, repeat: int) -> float:
+    def run():
+        parser_class(equation, False).parse_equation()
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--terms', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--with-powers', action='store_true',
+                            help='add constant powers, their cost is dominated by utils.pow and not by the parser')
+    args = arg_parser.parse_args()
+    print(f'{"terms":>8} {"legacy, s":>12} {"single-pass, s":>15} {"speedup":>8}')
+    for terms in args.terms:
+        equation = generate_equation(terms, with_powers=args.with_powers)
+        legacy = measure(LegacyEquationParser, equation, args.repeat)
+        current = measure(EquationParser, equation, args.repeat)
+        print(f'{terms:>8} {legacy:>12.4f} {current:>15.4f} {legacy / current:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Compares polynomial_arithmetic.multiply (Karatsuba for large dense polynomials) with the schoolbook product
+and times the expansion of a parenthesized product by EquationParser.
+
+Usage: python benchmarks/bench_polynomial.py [--degrees 32 128 512] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from src import polynomial_arithmetic  # noqa: E402
+from src.equation_parser import EquationParser  # noqa: E402
+
+
+def random_polynomial(generator: random.Random, degree: int):
+    return {float(i): generator.uniform(-10.0, 10.0) for i in range(degree + 1)}
+
+
+def schoolbook_multiply(left, right):
+    return polynomial_arithmetic.from_dense(polynomial_arithmetic.schoolbook(
+        polynomial_arithmetic.to_dense(left, 0.0), polynomial_arithmetic.to_dense(right, 0.0), 0.0))
+
+
+def parse_product(factors: int) -> None:
+    equation = ' * '.join(f'(X - {i})' for i in range(factors)) + ' = 0'
+    EquationParser(equation, max_degree=None).parse_equation()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--degrees', type=int, nargs='+', default=[32, 128, 512])
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    generator = random.Random(0)
+    print(f'{"degree":>8} {"schoolbook, s":>14} {"multiply, s":>12} {"speedup":>8}')
+    for degree in args.degrees:
+        left, right = random_polynomial(generator, degree), random_polynomial(generator, degree)
+        schoolbook = min(timeit.repeat(lambda: schoolbook_multiply(left, right), number=1, repeat=args.repeat))
+        fast = min(timeit.repeat(lambda: polynomial_arithmetic.multiply(left, right), number=1, repeat=args.repeat))
+        print(f'{degree:>8} {schoolbook:>14.4f} {fast:>12.4f} {schoolbook / fast:>7.2f}x')
+    for factors in args.degrees:
+        elapsed = min(timeit.repeat(lambda: parse_product(factors), number=1, repeat=args.repeat))
+        print(f'parse a product of {factors} binomials: {elapsed:.4f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Compares vector_solver.solve_many with EquationSolver called in a Python loop.
+
+Usage: python benchmarks/bench_vector_solver.py [--size 10000000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.append(ROOT)
+
+from src.equation_solver import EquationSolver  # noqa: E402
+from src.vector_solver import solve_many  # noqa: E402
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=10 ** 7)
+    arg_parser.add_argument('--scalar-size', type=int, default=10 ** 4)
+    args = arg_parser.parse_args()
+    generator = np.random.default_rng(0)
+    a, b, c = (generator.standard_normal(args.size) for _ in range(3))
+    a[::7] = 0.0
+
+    start = time.perf_counter()
+    solve_many(a, b, c)
+    vectorized = args.size / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(args.scalar_size):
+            EquationSolver({0: c[i], 1: b[i], 2: a[i]}, False).solve_equation()
+    scalar = args.scalar_size / (time.perf_counter() - start)
+
+    print(f'EquationSolver loop: {scalar:>14,.0f} equations/s')
+    print(f'solve_many:          {vectorized:>14,.0f} equations/s ({vectorized / scalar:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark harness for the parser, the solver and the numeric kernels.
+
+Every benchmark runs over a generated corpus and reports ops/s together with the p50/p99 latency of one operation.
+Results can be saved to JSON and compared with a saved baseline: the run fails (exit code 1) if the ops/s
+of any benchmark dropped by more than the threshold.
+
+Usage:
+    python benchmarks/harness.py --output results.json
+    python benchmarks/harness.py --baseline results.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from src.equation_parser import EquationParser  # noqa: E402
+from src.equation_solver import EquationSolver  # noqa: E402
+from src.utils import pow, sqrt  # noqa: E402
+
+Result = Dict[str, Any]
+
+
+def random_number(generator: random.Random) -> str:
+    return f'{generator.uniform(1.0, 100.0):.{generator.randint(0, 3)}f}'
+
+
+def generate_short(generator: random.Random, count: int) -> List[str]:
+    return [f'{random_number(generator)} * X^2 - {random_number(generator)} * X + {random_number(generator)} = 0'
+            for _ in range(count)]
+
+
+def generate_long(generator: random.Random, count: int, terms: int = 200) -> List[str]:
+    equations = []
+    for _ in range(count):
+        parts = [f'{random_number(generator)} * X^{generator.randint(0, 2)}' for _ in range(terms)]
+        equations.append(' + '.join(parts) + ' = ' + random_number(generator))
+    return equations
+
+
+def generate_power_chains(generator: random.Random, count: int, length: int = 20) -> List[str]:
+    equations = []
+    for _ in range(count):
+        chain = '^'.join(['1.5'] + [f'{generator.uniform(0.1, 1.0):.2f}' for _ in range(length)])
+        equations.append(f'{chain} * X^2 + X^2^1^1^1^1 - {chain} = 0')
+    return equations
+
+
+def generate_fractions(generator: random.Random, count: int, length: int = 30) -> List[str]:
+    equations = []
+    for _ in range(count):
+        fraction = '/'.join(random_number(generator) for _ in range(length))
+        equations.append(f'{fraction} * X^3 / X - {fraction} * X^4 / X^3 / X + {fraction} = 0')
+    return equations
+
+
+def generate_complex_roots(generator: random.Random, count: int) -> List[str]:
+    equations = []
+    for _ in range(count):
+        real, imaginary = generator.uniform(-10.0, 10.0), generator.uniform(0.1, 10.0)
+        equations.append(f'X^2 - {2 * real} * X + {real * real + imaginary * imaginary} = 0')
+    return equations
+
+
+CORPUS_GENERATORS: Dict[str, Callable[[random.Random, int], List[str]]] = {
+    'short': generate_short,
+    'long': generate_long,
+    'power_chains': generate_power_chains,
+    'fractions': generate_fractions,
+    'complex_roots': generate_complex_roots,
+}
+
+
+def generate_corpus(count: int, seed: int = 0) -> Dict[str, List[str]]:
+    generator = random.Random(seed)
+    return {name: generate(generator, count) for name, generate in CORPUS_GENERATORS.items()}
+
+
+def parse(equation: str) -> Dict[float, float]:
+    equation_parser: EquationParser = EquationParser(equation, False)
+    equation_parser.parse_equation()
+    return equation_parser.multipliers
+
+
+def measure(operation: Callable[[Any], Any], arguments: Sequence[Any], repeat: int) -> Result:
+    for argument in arguments:
+        operation(argument)
+    latencies: List[int] = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(repeat):
+        for argument in arguments:
+            start = perf_counter_ns()
+            operation(argument)
+            latencies.append(perf_counter_ns() - start)
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'operations': len(latencies),
+        'ops_per_second': len(latencies) / total * 1e9 if total else float('inf'),
+        'p50_us': latencies[len(latencies) // 2] / 1e3,
+        'p99_us': latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] / 1e3,
+    }
+
+
+def run_benchmarks(count: int, repeat: int, name_filter: Optional[str] = None) -> Dict[str, Result]:
+    corpus = generate_corpus(count)
+    benchmarks: Dict[str, Callable[[], Result]] = {}
+    for corpus_name, equations in corpus.items():
+        benchmarks[f'parse/{corpus_name}'] = lambda equations=equations: measure(parse, equations, repeat)
+        multipliers = [parse(equation) for equation in equations]
+        benchmarks[f'solve/{corpus_name}'] = lambda multipliers=multipliers: measure(
+            lambda coefficients: EquationSolver(coefficients, False).solve_equation(), multipliers, repeat)
+    generator = random.Random(1)
+    pow_arguments = [(generator.uniform(0.1, 10.0), generator.uniform(-30.0, 30.0)) for _ in range(count * 10)]
+    sqrt_arguments = [generator.uniform(0.0, 1e12) for _ in range(count * 10)]
+    benchmarks['numeric/pow'] = lambda: measure(lambda argument: pow(*argument), pow_arguments, repeat)
+    benchmarks['numeric/sqrt'] = lambda: measure(sqrt, sqrt_arguments, repeat)
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, benchmark in benchmarks.items():
+            if name_filter is None or name_filter in name:
+                results[name] = benchmark()
+    return results
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, Result], threshold: float) -> List[str]:
+    """
+    Returns the descriptions of the benchmarks whose ops/s dropped by more than `threshold` (a share, 0.2 = 20%)
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['ops_per_second'], result['ops_per_second']
+        change = after / before - 1.0
+        if change < -threshold:
+            regressions.append(f'{name}: {before:,.0f} -> {after:,.0f} ops/s ({change:+.1%})')
+    return regressions
+
+
+def print_results(results: Dict[str, Result], baseline: Optional[Dict[str, Result]]) -> None:
+    print(f'{"benchmark":<22} {"ops/s":>12} {"p50, us":>10} {"p99, us":>10} {"vs baseline":>12}')
+    for name, result in results.items():
+        change = ''
+        if baseline and name in baseline:
+            change = f'{result["ops_per_second"] / baseline[name]["ops_per_second"] - 1.0:+.1%}'
+        print(f'{name:<22} {result["ops_per_second"]:>12,.0f} {result["p50_us"]:>10.1f} {result["p99_us"]:>10.1f} '
+              f'{change:>12}')
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--count', type=int, default=200, help='equations per corpus')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='passes over every corpus')
+    arg_parser.add_argument('--filter', help='run only the benchmarks whose name contains this string')
+    arg_parser.add_argument('--output', type=Path, help='save the results to this JSON file')
+    arg_parser.add_argument('--baseline', type=Path, help='compare with the results saved earlier')
+    arg_parser.add_argument('--threshold', type=float, default=0.2,
+                            help='maximal allowed drop of ops/s compared with the baseline (0.2 = 20%%)')
+    args = arg_parser.parse_args()
+
+    results = run_benchmarks(args.count, args.repeat, args.filter)
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())['results']
+    print_results(results, baseline)
+    if args.output:
+        args.output.write_text(json.dumps({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'count': args.count,
+            'repeat': args.repeat,
+            'results': results,
+        }, indent=2))
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('Regressions:', *regressions, sep='\n  ')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
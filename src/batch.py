@@ -0,0 +1,180 @@
+import itertools
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from src import limits, profiling
+from src.equation_cache import EquationCache
+from src.equation_solver import EquationSolver
+from src.solution import Solution
+
+Record = Dict[str, Any]
+Solver = Callable[..., Iterator[Any]]
+
+
+def read_equations(stream: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    for line_number, line in enumerate(stream, start=1):
+        equation = line.strip()
+        if equation:
+            yield line_number, equation
+
+
+_process_cache: Optional[EquationCache] = None
+
+
+def get_process_cache(max_size: int) -> EquationCache:
+    """
+    The cache shared by all batches solved in this process (it is recreated if `max_size` changes)
+    """
+    global _process_cache
+    if _process_cache is None or _process_cache.max_size != max_size:
+        _process_cache = EquationCache(max_size)
+    return _process_cache
+
+
+def solve_cached(equation: str, max_degree: Optional[int] = 2,
+                 cache: Optional[EquationCache] = None) -> Tuple[Tuple[float, ...], Solution]:
+    """
+    The coefficients and the Solution of the equation, taken from `cache` if it was solved before.
+    Parsing and solving share one budget of the process limits (see limits.guard);
+    raises ValueError for coefficients or roots that are not finite, so records are always valid JSON
+    """
+    if cache is None:
+        cache = EquationCache(0)
+    with limits.guard():
+        entry = cache.parse(equation, max_degree)
+        solution = entry.solution
+        if solution is None:
+            solution = EquationSolver(entry.multipliers, False).solve()
+            if not all(math.isfinite(root.real) and math.isfinite(root.imaginary) for root in solution.roots):
+                raise ValueError('Корни уравнения не представимы числом с плавающей точкой')
+            cache.store_solution(equation, solution, max_degree)
+    return entry.coefficients, solution
+
+
+def fill_record(record: Record, equation: str, max_degree: Optional[int] = 2,
+                cache: Optional[EquationCache] = None) -> Record:
+    """
+    Adds Solution.as_dict() of the equation (kind, degree, coefficients, roots as [real, imaginary])
+    or its `error` and `error_type` to `record`
+    """
+    try:
+        _, solution = solve_cached(equation, max_degree, cache)
+    except Exception as e:
+        record['error'] = str(e)
+        record['error_type'] = type(e).__name__
+    else:
+        record.update(solution.as_dict())
+    return record
+
+
+def solve_equations(equations: Iterable[Tuple[int, str]], max_degree: Optional[int] = 2,
+                    cache: Optional[EquationCache] = None) -> Iterator[Record]:
+    for line_number, equation in equations:
+        yield fill_record({'line': line_number, 'equation': equation}, equation, max_degree, cache)
+
+
+def solve_solutions(equations: Iterable[Tuple[int, str]], max_degree: Optional[int] = 2,
+                    cache: Optional[EquationCache] = None) -> Iterator[Tuple[int, Optional[Solution]]]:
+    """
+    Like solve_equations, but yields (line number, Solution) pairs; the Solution is None for invalid equations
+    """
+    for line_number, equation in equations:
+        try:
+            _, solution = solve_cached(equation, max_degree, cache)
+        except Exception:
+            solution = None
+        yield line_number, solution
+
+
+def solve_chunk(chunk: Iterable[Tuple[int, str]], max_degree: Optional[int] = 2, cache_size: int = 0,
+                collect_stats: bool = False,
+                solver: Solver = solve_equations) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    """
+    Runs in a worker process; with `collect_stats` also returns the statistics of this chunk (see profiling.Stats)
+    and the statistics of the cache of this process as the gauges `worker_<pid>_cache_*`.
+    `solver` is solve_equations or solve_solutions
+    """
+    cache = get_process_cache(cache_size)
+    if collect_stats:
+        profiling.enable_stats()
+    try:
+        records = list(solver(chunk, max_degree, cache))
+    finally:
+        collected = profiling.disable_stats() if collect_stats else None
+        if collected is not None:
+            collected.set_gauges(cache.stats(), prefix=f'worker_{os.getpid()}_cache_')
+    return records, collected.as_dict() if collected is not None else None
+
+
+def split_into_chunks(equations: Iterable[Tuple[int, str]], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    iterator = iter(equations)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_equations_parallel(equations: Iterable[Tuple[int, str]], workers: int, chunk_size: int = 1024,
+                             max_in_flight: Optional[int] = None, max_degree: Optional[int] = 2,
+                             cache_size: int = 0, solver: Solver = solve_equations) -> Iterator[Any]:
+    """
+    Records (or whatever `solver` yields) are yielded in input order; at most `max_in_flight` chunks
+    (2 per worker by default) are submitted but not yet consumed, so memory does not grow with the input size.
+    Every process keeps its own cache of up to `cache_size` equations (see get_process_cache)
+    """
+    if workers < 1:
+        raise ValueError('workers должно быть положительным')
+    if chunk_size < 1:
+        raise ValueError('chunk_size должно быть положительным')
+    if workers == 1:
+        yield from solver(equations, max_degree, get_process_cache(cache_size))
+        return
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+    chunks = split_into_chunks(equations, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=limits.configure,
+                             initargs=(limits.get_limits(),)) as executor:
+        in_flight: Deque[Future] = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(solve_chunk, chunk, max_degree, cache_size, profiling.stats is not None,
+                                             solver))
+            if len(in_flight) >= max_in_flight:
+                yield from collect_chunk(in_flight.popleft())
+        while in_flight:
+            yield from collect_chunk(in_flight.popleft())
+
+
+def collect_chunk(future: Future) -> List[Record]:
+    """
+    Records of a chunk solved by solve_chunk, its statistics are merged into the statistics of this process
+    """
+    records, collected = future.result()
+    if collected is not None and profiling.stats is not None:
+        profiling.stats.merge(collected)
+    return records
+
+
+def write_records(records: Iterable[Record], output: TextIO) -> int:
+    count = 0
+    collected = profiling.stats
+    for record in records:
+        start = time.perf_counter_ns() if collected is not None else 0
+        output.write(json.dumps(record, ensure_ascii=False, allow_nan=False))
+        output.write('\n')
+        if collected is not None:
+            collected.add_time('output', time.perf_counter_ns() - start)
+        count += 1
+    return count
+
+
+def run_batch(input_stream: Iterable[str], output: TextIO, workers: int = 1, chunk_size: int = 1024,
+              max_degree: Optional[int] = 2, cache_size: int = 0) -> int:
+    equations = read_equations(input_stream)
+    records = solve_equations_parallel(equations, workers, chunk_size, max_degree=max_degree, cache_size=cache_size)
+    return write_records(records, output)
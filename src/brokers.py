@@ -0,0 +1,237 @@
+"""
+Brokers of equation jobs for job_worker.JobWorker.
+
+A broker hands out queued jobs in batches (fetch), takes the results back in batches (ack) and puts jobs
+that could not be processed back into the queue until they run out of attempts (nack).
+MemoryBroker keeps the queue in the process, SQLiteBroker in a SQLite file shared by producers and workers;
+any other backend only has to implement the same coroutines
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+Record = Dict[str, Any]
+
+QUEUED, RUNNING, DONE, FAILED = range(4)
+STATE_NAMES = ('queued', 'running', 'done', 'failed')
+# a fetched job that is not acknowledged within this many seconds is handed out again (its worker is gone)
+DEFAULT_LEASE = 60.0
+DEFAULT_POLL_INTERVAL = 0.05
+
+
+class Job(NamedTuple):
+    id: Any
+    equation: str
+    attempts: int = 0
+
+
+class Broker:
+    async def put(self, equations: Iterable[str]) -> List[Any]:
+        """
+        Queues the equations and returns the ids of their jobs
+        """
+        raise NotImplementedError
+
+    async def fetch(self, limit: int, timeout: float = 0.0) -> List[Job]:
+        """
+        Up to `limit` queued jobs, waiting up to `timeout` seconds for the first one
+        """
+        raise NotImplementedError
+
+    async def ack(self, results: Sequence[Tuple[Job, Record]]) -> None:
+        """
+        Stores the records of processed jobs (see batch.fill_record), all in one go
+        """
+        raise NotImplementedError
+
+    async def nack(self, jobs: Sequence[Job], error: str, max_attempts: int) -> int:
+        """
+        Queues the jobs again or, once they failed `max_attempts` times, marks them failed with `error`;
+        returns the number of jobs marked failed
+        """
+        raise NotImplementedError
+
+    async def counts(self) -> Dict[str, int]:
+        """
+        Number of jobs in every state (see STATE_NAMES)
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBroker(Broker):
+    def __init__(self) -> None:
+        self.queue: Deque[Job] = deque()
+        self.in_flight: Dict[Any, Job] = {}
+        self.results: Dict[Any, Record] = {}
+        self.errors: Dict[Any, str] = {}
+        self.next_id = 0
+        self.available: Optional[asyncio.Event] = None
+
+    def event(self) -> asyncio.Event:
+        # created lazily: before Python 3.10 an Event is bound to the loop that is current when it is created
+        if self.available is None:
+            self.available = asyncio.Event()
+        return self.available
+
+    async def put(self, equations: Iterable[str]) -> List[Any]:
+        ids = []
+        for equation in equations:
+            self.queue.append(Job(self.next_id, equation))
+            ids.append(self.next_id)
+            self.next_id += 1
+        if ids:
+            self.event().set()
+        return ids
+
+    async def fetch(self, limit: int, timeout: float = 0.0) -> List[Job]:
+        if not self.queue and timeout > 0:
+            available = self.event()
+            available.clear()
+            try:
+                await asyncio.wait_for(available.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        jobs = []
+        while self.queue and len(jobs) < limit:
+            job = self.queue.popleft()
+            self.in_flight[job.id] = job
+            jobs.append(job)
+        return jobs
+
+    async def ack(self, results: Sequence[Tuple[Job, Record]]) -> None:
+        for job, record in results:
+            self.in_flight.pop(job.id, None)
+            self.results[job.id] = record
+
+    async def nack(self, jobs: Sequence[Job], error: str, max_attempts: int) -> int:
+        failed = 0
+        for job in jobs:
+            self.in_flight.pop(job.id, None)
+            if job.attempts + 1 >= max_attempts:
+                self.errors[job.id] = error
+                failed += 1
+            else:
+                self.queue.append(job._replace(attempts=job.attempts + 1))
+        if failed < len(jobs):
+            self.event().set()
+        return failed
+
+    async def counts(self) -> Dict[str, int]:
+        return {'queued': len(self.queue), 'running': len(self.in_flight), 'done': len(self.results),
+                'failed': len(self.errors)}
+
+
+class SQLiteBroker(Broker):
+    """
+    Jobs are rows of the `jobs` table of a SQLite file (in WAL mode, so producers and workers of several
+    processes can share it). A fetched job is leased for `lease` seconds: if it is neither acknowledged nor
+    returned by then, it is handed out again. The blocking sqlite3 calls run one at a time in a dedicated thread,
+    so the event loop of the worker is never blocked by the file
+    """
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS jobs ('
+        ' id INTEGER PRIMARY KEY, equation TEXT NOT NULL, state INTEGER NOT NULL DEFAULT 0,'
+        ' attempts INTEGER NOT NULL DEFAULT 0, leased_until REAL, result TEXT, error TEXT)',
+        'CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)',
+    )
+
+    def __init__(self, path: str, lease: float = DEFAULT_LEASE, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.path = path
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30.0)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in self.SCHEMA:
+            self.connection.execute(statement)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def call(self, function: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def transaction(self, function: Callable, *args) -> Any:
+        """
+        Runs `function(cursor, *args)` in one write transaction
+        """
+        cursor = self.connection.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            result = function(cursor, *args)
+        except BaseException:
+            cursor.execute('ROLLBACK')
+            raise
+        cursor.execute('COMMIT')
+        return result
+
+    @staticmethod
+    def insert(cursor: sqlite3.Cursor, equations: List[str]) -> List[int]:
+        ids = []
+        for equation in equations:
+            cursor.execute('INSERT INTO jobs (equation) VALUES (?)', (equation,))
+            ids.append(cursor.lastrowid)
+        return ids
+
+    def take(self, cursor: sqlite3.Cursor, limit: int) -> List[Job]:
+        now = time.time()
+        rows = cursor.execute('SELECT id, equation, attempts FROM jobs'
+                              ' WHERE state = ? OR state = ? AND leased_until < ? ORDER BY id LIMIT ?',
+                              (QUEUED, RUNNING, now, limit)).fetchall()
+        cursor.executemany('UPDATE jobs SET state = ?, leased_until = ? WHERE id = ?',
+                           [(RUNNING, now + self.lease, row[0]) for row in rows])
+        return [Job(*row) for row in rows]
+
+    @staticmethod
+    def complete(cursor: sqlite3.Cursor, results: Sequence[Tuple[Job, Record]]) -> None:
+        cursor.executemany('UPDATE jobs SET state = ?, leased_until = NULL, result = ? WHERE id = ?',
+                           [(DONE, json.dumps(record, ensure_ascii=False, allow_nan=False), job.id)
+                            for job, record in results])
+
+    @staticmethod
+    def release(cursor: sqlite3.Cursor, jobs: Sequence[Job], error: str, max_attempts: int) -> int:
+        states = [FAILED if job.attempts + 1 >= max_attempts else QUEUED for job in jobs]
+        cursor.executemany('UPDATE jobs SET state = ?, attempts = ?, leased_until = NULL, error = ? WHERE id = ?',
+                           [(state, job.attempts + 1, error, job.id) for job, state in zip(jobs, states)])
+        return states.count(FAILED)
+
+    async def put(self, equations: Iterable[str]) -> List[Any]:
+        return await self.call(self.transaction, self.insert, list(equations))
+
+    async def fetch(self, limit: int, timeout: float = 0.0) -> List[Job]:
+        deadline = time.monotonic() + timeout
+        while True:
+            jobs = await self.call(self.transaction, self.take, limit)
+            if jobs or time.monotonic() >= deadline:
+                return jobs
+            await asyncio.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0.0)))
+
+    async def ack(self, results: Sequence[Tuple[Job, Record]]) -> None:
+        await self.call(self.transaction, self.complete, results)
+
+    async def nack(self, jobs: Sequence[Job], error: str, max_attempts: int) -> int:
+        return await self.call(self.transaction, self.release, jobs, error, max_attempts)
+
+    async def counts(self) -> Dict[str, int]:
+        rows = await self.call(lambda: self.connection.execute(
+            'SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+        counts = dict.fromkeys(STATE_NAMES, 0)
+        counts.update((STATE_NAMES[state], count) for state, count in rows)
+        return counts
+
+    def results(self) -> Iterable[Tuple[int, str, Optional[Record], Optional[str]]]:
+        """
+        (id, equation, record or None, error of the last failed attempt or None) of every job, in id order
+        """
+        for job_id, equation, result, error in self.connection.execute(
+                'SELECT id, equation, result, error FROM jobs ORDER BY id'):
+            yield job_id, equation, None if result is None else json.loads(result), error
+
+    async def close(self) -> None:
+        self.executor.shutdown()
+        self.connection.close()
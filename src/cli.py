@@ -0,0 +1,147 @@
+"""
+The full command line interface. `computor.py` imports it only for the options its fast path does not handle,
+and the modules of the batch, server and profiling modes are imported only when those modes are used
+"""
+import os
+import sys
+from typing import Optional
+
+import click
+
+from src.entry import solve_single
+
+
+@click.command('extra-class calculator')
+@click.argument('equation', required=False)
+@click.option("--verbose", is_flag=True, default=False,
+              help="explain the intermediate steps (INFO records of the 'computor' logger)")
+@click.option("--batch", is_flag=True, default=False,
+              help="solve newline-delimited equations and print one JSON record per line")
+@click.option("--input", "input_file", type=click.File('r', encoding='utf-8'), default='-',
+              help="file with equations for --batch (stdin by default)")
+@click.option("--workers", type=click.IntRange(min=1), default=1,
+              help="number of processes for --batch, --serve and --consume")
+@click.option("--chunk-size", type=click.IntRange(min=1), default=1024,
+              help="equations per task sent to a --batch or --consume worker")
+@click.option("--range-size", type=click.IntRange(min=1), default=1 << 22,
+              help="bytes of a memory-mapped --input file solved by one --batch worker task")
+@click.option("--columnar", type=click.Path(dir_okay=False, writable=True), default=None,
+              help="write the --batch results to this binary columnar file instead of JSON records")
+@click.option("--any-degree", is_flag=True, default=False,
+              help="solve polynomials of any degree instead of only degrees up to 2")
+@click.option("--cache-size", type=click.IntRange(min=0), default=4096,
+              help="number of parsed and solved equations cached by every process (0 disables the cache)")
+@click.option("--exact", is_flag=True, default=False,
+              help="accumulate coefficients as exact fractions and compare them with zero without epsilon "
+                   "(a single equation or --repl)")
+@click.option("--format", "output_format", type=click.Choice(['human', 'json', 'csv']), default='human',
+              help="how to print the solution of a single equation")
+@click.option("--repl", is_flag=True, default=False,
+              help="read equations, `name = expression` definitions and `expression = ?` queries "
+                   "interactively until EOF or 'exit'")
+@click.option("--serve", "serve_requests", is_flag=True, default=False,
+              help="answer newline-delimited equations over TCP or a Unix socket with JSON records")
+@click.option("--host", default="127.0.0.1", help="address for --serve")
+@click.option("--port", type=click.IntRange(min=0, max=65535), default=8765, help="TCP port for --serve")
+@click.option("--unix-socket", type=click.Path(), default=None, help="Unix socket path for --serve instead of TCP")
+@click.option("--enqueue", type=click.Path(dir_okay=False), default=None,
+              help="queue the equations of --input as jobs of this SQLite job queue file")
+@click.option("--consume", type=click.Path(dir_okay=False), default=None,
+              help="solve the queued jobs of this SQLite job queue file in batches of --chunk-size until none are left "
+                   "and print the metrics of the worker to stderr (the records are stored in the file)")
+@click.option("--deadline", type=click.FloatRange(min=0.0), default=None,
+              help="seconds one equation may take before it is rejected with LimitExceeded (no deadline by default)")
+@click.option("--max-operations", type=click.IntRange(min=1), default=None,
+              help="work one equation may take (operators, polynomial products, solver iterations, see src/limits.py)")
+@click.option("--stats", "stats_format", type=click.Choice(['json', 'prometheus']), default=None,
+              help="collect stage timers and counters and print them to stderr at exit "
+                   "(with --serve they are also answered to the 'stats' and 'metrics' requests)")
+@click.option("--profile", type=click.Path(dir_okay=False, writable=True), default=None,
+              help="run under cProfile and write the pstats file to this path")
+def main(equation: str = None, verbose: bool = False, batch: bool = False, input_file=None, workers: int = 1,
+         chunk_size: int = 1024, range_size: int = 1 << 22, columnar: str = None, any_degree: bool = False,
+         cache_size: int = 4096, exact: bool = False, output_format: str = 'human', repl: bool = False,
+         serve_requests: bool = False, host: str = "127.0.0.1", port: int = 8765, unix_socket: str = None,
+         enqueue: str = None, consume: str = None, deadline: float = None, max_operations: int = None,
+         stats_format: str = None, profile: str = None):
+    if deadline is not None or max_operations is not None:
+        from src import limits
+        configured = limits.get_limits()
+        limits.configure(configured._replace(
+            deadline=deadline, max_operations=configured.max_operations if max_operations is None else max_operations))
+    if stats_format is not None:
+        from src import profiling
+        profiling.enable_stats()
+    max_degree = None if any_degree else 2
+    arguments = (equation, verbose, batch, input_file, workers, chunk_size, range_size, columnar, max_degree,
+                 cache_size, exact, output_format, repl, serve_requests, host, port, unix_socket, enqueue, consume)
+    try:
+        if profile is None:
+            run(*arguments)
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.runcall(run, *arguments)
+            finally:
+                profiler.dump_stats(profile)
+    finally:
+        if stats_format is not None:
+            collected = profiling.disable_stats()
+            sys.stderr.write(profiling.format_stats(collected, stats_format))
+
+
+def run(equation: Optional[str], verbose: bool, batch: bool, input_file, workers: int, chunk_size: int,
+        range_size: int, columnar: Optional[str], max_degree: Optional[int], cache_size: int, exact: bool,
+        output_format: str, repl: bool, serve_requests: bool, host: str, port: int, unix_socket: Optional[str],
+        enqueue: Optional[str], consume: Optional[str]) -> None:
+    if exact and (batch or serve_requests or enqueue is not None or consume is not None):
+        raise click.UsageError('--exact поддерживается только для одного уравнения и --repl')
+    if enqueue is not None or consume is not None:
+        from src.job_worker import consume_file, enqueue_file
+        if enqueue is not None:
+            enqueue_file(enqueue, input_file)
+        if consume is not None:
+            consume_file(consume, workers, chunk_size, max_degree, cache_size)
+        return
+    if serve_requests:
+        from src.server import serve
+        serve(host, port, unix_socket, max_degree, cache_size, workers)
+        return
+    if repl:
+        from src.server import run_repl
+        run_repl(max_degree, cache_size, exact=exact)
+        return
+    if batch:
+        import json
+        from src.batch import (get_process_cache, read_equations, solve_equations, solve_equations_parallel,
+                               solve_solutions, write_records)
+        solver = solve_equations if columnar is None else solve_solutions
+        if is_regular_file(input_file):
+            from src.mapped_input import solve_file
+            input_file.close()
+            results = solve_file(input_file.name, workers, range_size, max_degree=max_degree, cache_size=cache_size,
+                                 solver=solver)
+        else:
+            results = solve_equations_parallel(read_equations(input_file), workers, chunk_size,
+                                               max_degree=max_degree, cache_size=cache_size, solver=solver)
+        if columnar is None:
+            write_records(results, sys.stdout)
+        else:
+            from src.columnar import write_columnar
+            with open(columnar, 'wb') as output:
+                write_columnar(results, output)
+        if verbose and workers == 1:
+            print(json.dumps(get_process_cache(cache_size).stats()), file=sys.stderr)
+        return
+    if equation is None:
+        raise click.UsageError('Не передано уравнение')
+    solve_single(equation, verbose, max_degree, exact, output_format)
+
+
+def is_regular_file(input_file) -> bool:
+    """
+    Regular files are memory-mapped (see mapped_input), stdin, pipes and other streams are read line by line
+    """
+    name = getattr(input_file, 'name', None)
+    return isinstance(name, str) and os.path.isfile(name)
@@ -0,0 +1,260 @@
+"""
+Binary columnar file of solved equations, written in blocks and read back through a memory mapping.
+
+Layout (version 1, little-endian, every section is padded to a multiple of 8 bytes):
+- file header: MAGIC, the version (uint32) and 4 reserved bytes;
+- blocks of up to `block_rows` equations, each starts with a header of the number of rows, the width of the
+  coefficient columns and the width of the root columns (uint32 each, plus 4 reserved bytes),
+  followed by the columns:
+  `line` int64[rows], `kind` uint8[rows] (see KIND_CODES), `degree` int32[rows], `root_count` int32[rows],
+  `coefficients` float64[rows * coefficient width] (padded with 0.0),
+  `roots_real` and `roots_imaginary` float64[rows * root width] (padded with NaN).
+
+Invalid equations have the kind ERROR_CODE, the degree -1 and no coefficients or roots
+"""
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.solution import (KIND_ANY, KIND_DOUBLE_ROOT, KIND_LINEAR, KIND_NO_SOLUTIONS, KIND_POLYNOMIAL,
+                          KIND_TWO_COMPLEX, KIND_TWO_REAL, Solution)
+
+MAGIC = b'CPCL'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sI4x')
+BLOCK_HEADER = struct.Struct('<III4x')
+ALIGNMENT = 8
+BLOCK_ROWS = 1 << 14
+
+KIND_CODES = {
+    KIND_NO_SOLUTIONS: 0,
+    KIND_ANY: 1,
+    KIND_LINEAR: 2,
+    KIND_DOUBLE_ROOT: 3,
+    KIND_TWO_REAL: 4,
+    KIND_TWO_COMPLEX: 5,
+    KIND_POLYNOMIAL: 6,
+}
+KINDS = {code: kind for kind, code in KIND_CODES.items()}
+ERROR_CODE = 255
+
+# (name, array typecode) in the order the columns are stored; the first four have one value per row
+COLUMNS = (('line', 'q'), ('kind', 'B'), ('degree', 'i'), ('root_count', 'i'),
+           ('coefficients', 'd'), ('roots_real', 'd'), ('roots_imaginary', 'd'))
+NAN = float('nan')
+
+
+def padding(size: int) -> bytes:
+    return bytes(-size % ALIGNMENT)
+
+
+def to_little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class ColumnarWriter:
+    """
+    Collects rows and writes them to the binary `output` one block at a time (see the module docstring).
+    Use as a context manager or call close() to write the last block
+    """
+
+    def __init__(self, output, block_rows: int = BLOCK_ROWS) -> None:
+        if block_rows < 1:
+            raise ValueError('block_rows должно быть положительным')
+        self.output = output
+        self.block_rows = block_rows
+        self.rows: List[Tuple[int, Optional[Solution]]] = []
+        self.count = 0
+        output.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def write(self, line_number: int, solution: Optional[Solution]) -> None:
+        """
+        `solution` is None for an invalid equation
+        """
+        self.rows.append((line_number, solution))
+        self.count += 1
+        if len(self.rows) >= self.block_rows:
+            self.flush()
+
+    def write_all(self, solutions: Iterable[Tuple[int, Optional[Solution]]]) -> int:
+        for line_number, solution in solutions:
+            self.write(line_number, solution)
+        return self.count
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        solutions = [solution for _, solution in self.rows if solution is not None]
+        coefficient_width = max((len(solution.coefficients) for solution in solutions), default=0)
+        root_width = max((len(solution.roots) for solution in solutions), default=0)
+        columns = {name: array(typecode) for name, typecode in COLUMNS}
+        for line_number, solution in self.rows:
+            columns['line'].append(line_number)
+            if solution is None:
+                columns['kind'].append(ERROR_CODE)
+                columns['degree'].append(-1)
+                columns['root_count'].append(0)
+                coefficients, roots = [], []
+            else:
+                columns['kind'].append(KIND_CODES[solution.kind])
+                columns['degree'].append(solution.degree)
+                columns['root_count'].append(len(solution.roots))
+                coefficients, roots = solution.coefficients, solution.roots
+            columns['coefficients'].extend(coefficients)
+            columns['coefficients'].extend([0.0] * (coefficient_width - len(coefficients)))
+            columns['roots_real'].extend(root.real for root in roots)
+            columns['roots_imaginary'].extend(root.imaginary for root in roots)
+            missing = [NAN] * (root_width - len(roots))
+            columns['roots_real'].extend(missing)
+            columns['roots_imaginary'].extend(missing)
+        pieces = [BLOCK_HEADER.pack(len(self.rows), coefficient_width, root_width)]
+        for name, _ in COLUMNS:
+            data = to_little_endian(columns[name])
+            pieces += [data, padding(len(data))]
+        self.output.write(b''.join(pieces))
+        self.rows.clear()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+Column = Union[memoryview, array]
+
+
+class ColumnarBlock:
+    """
+    Columns of one block as flat memoryviews of the mapping (copies only on big-endian machines):
+    the coefficients of row `i` are coefficients[i * coefficient_width:(i + 1) * coefficient_width]
+    """
+    __slots__ = ('rows', 'coefficient_width', 'root_width', 'columns')
+
+    def __init__(self, rows: int, coefficient_width: int, root_width: int, columns: Dict[str, Column]) -> None:
+        self.rows = rows
+        self.coefficient_width = coefficient_width
+        self.root_width = root_width
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def coefficients(self, row: int) -> List[float]:
+        start = row * self.coefficient_width
+        return list(self.columns['coefficients'][start:start + self.coefficient_width])
+
+    def roots(self, row: int) -> List[Tuple[float, float]]:
+        start = row * self.root_width
+        end = start + self.columns['root_count'][row]
+        return list(zip(self.columns['roots_real'][start:end], self.columns['roots_imaginary'][start:end]))
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        The columns as numpy arrays sharing the memory of the mapping, the wide ones with one row per equation
+        """
+        import numpy as np
+        result = {}
+        widths = {'coefficients': self.coefficient_width, 'roots_real': self.root_width,
+                  'roots_imaginary': self.root_width}
+        for name, typecode in COLUMNS:
+            values = np.frombuffer(self.columns[name], dtype=np.dtype(typecode).newbyteorder('<'))
+            result[name] = values.reshape(self.rows, widths[name]) if name in widths else values
+        return result
+
+
+class ColumnarReader:
+    """
+    Maps a file written by ColumnarWriter and exposes its blocks without parsing the values.
+    Iteration yields (line number, kind, degree, coefficients, roots) per equation, `kind` is None for errors
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.data)
+        try:
+            self.blocks = self.read_blocks()
+        except Exception:
+            self.close()
+            raise
+
+    def read_blocks(self) -> List[ColumnarBlock]:
+        if len(self.data) < FILE_HEADER.size:
+            raise ValueError('Файл слишком короткий для заголовка')
+        magic, version = FILE_HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError('Файл не является колоночным файлом решений')
+        if version != VERSION:
+            raise ValueError(f'Неподдерживаемая версия формата {version}')
+        blocks = []
+        offset = FILE_HEADER.size
+        while offset < len(self.data):
+            if offset + BLOCK_HEADER.size > len(self.data):
+                raise ValueError('Файл обрезан')
+            rows, coefficient_width, root_width = BLOCK_HEADER.unpack_from(self.data, offset)
+            offset += BLOCK_HEADER.size
+            lengths = {'coefficients': rows * coefficient_width, 'roots_real': rows * root_width,
+                       'roots_imaginary': rows * root_width}
+            columns: Dict[str, Column] = {}
+            for name, typecode in COLUMNS:
+                size = lengths.get(name, rows) * array(typecode).itemsize
+                if offset + size > len(self.data):
+                    raise ValueError('Файл обрезан')
+                columns[name] = self.column(self.view[offset:offset + size], typecode)
+                offset += size + len(padding(size))
+            blocks.append(ColumnarBlock(rows, coefficient_width, root_width, columns))
+        return blocks
+
+    @staticmethod
+    def column(view: memoryview, typecode: str) -> Column:
+        if sys.byteorder == 'little':
+            return view.cast(typecode)
+        values = array(typecode, view.tobytes())
+        values.byteswap()
+        return values
+
+    def __len__(self) -> int:
+        return sum(block.rows for block in self.blocks)
+
+    def __iter__(self) -> Iterator[Tuple[int, Optional[str], int, List[float], List[Tuple[float, float]]]]:
+        for block in self.blocks:
+            for row in range(block.rows):
+                yield (block['line'][row], KINDS.get(block['kind'][row]), block['degree'][row],
+                       block.coefficients(row), block.roots(row))
+
+    def close(self) -> None:
+        """
+        Numpy arrays returned by ColumnarBlock.to_numpy must be dropped before
+        """
+        for block in getattr(self, 'blocks', ()):
+            for column in block.columns.values():
+                if isinstance(column, memoryview):
+                    column.release()
+        self.view.release()
+        self.data.close()
+
+    def __enter__(self) -> 'ColumnarReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def write_columnar(solutions: Iterable[Tuple[int, Optional[Solution]]], output, block_rows: int = BLOCK_ROWS) -> int:
+    """
+    Writes (line number, Solution) pairs (see batch.solve_solutions) to the binary `output`, returns their number
+    """
+    with ColumnarWriter(output, block_rows) as writer:
+        return writer.write_all(solutions)
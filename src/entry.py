@@ -0,0 +1,72 @@
+"""
+Entry point of the `computor` command.
+
+Solving one equation is the most frequent invocation, so it is handled without importing click:
+the arguments are checked by a small hand-written scan and only the parser, the solver and the formatters
+are imported. Anything else (other options, --help, usage errors) goes to the full interface in src.cli
+"""
+import sys
+from typing import Any, Dict, List, Optional
+
+FAST_FLAGS = {'--verbose': 'verbose', '--any-degree': 'any_degree', '--exact': 'exact'}
+FAST_FORMATS = ('human', 'json', 'csv')
+
+
+def parse_fast_arguments(argv: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Options of the single-equation mode or None if `argv` needs the full command line interface
+    """
+    options: Dict[str, Any] = {'equation': None, 'verbose': False, 'any_degree': False, 'exact': False,
+                               'output_format': 'human'}
+    i = 0
+    while i < len(argv):
+        argument = argv[i]
+        if argument in FAST_FLAGS:
+            options[FAST_FLAGS[argument]] = True
+        elif argument == '--format' and i + 1 < len(argv) and argv[i + 1] in FAST_FORMATS:
+            options['output_format'] = argv[i + 1]
+            i += 1
+        elif argument.startswith('--format=') and argument[len('--format='):] in FAST_FORMATS:
+            options['output_format'] = argument[len('--format='):]
+        elif argument.startswith('-') or options['equation'] is not None:
+            return None
+        else:
+            options['equation'] = argument
+        i += 1
+    return options if options['equation'] is not None else None
+
+
+def solve_single(equation: str, verbose: bool = False, max_degree: Optional[int] = 2, exact: bool = False,
+                 output_format: str = 'human') -> None:
+    from src.equation_parser import EquationParser
+    from src.equation_solver import EquationSolver
+    from src.instrumentation import enable_verbose, info
+    from src.limits import guard
+    from src.solution import render
+
+    if verbose:
+        enable_verbose()
+    with guard():
+        info('Начинаем парсинг уравнения')
+        equation_parser: EquationParser = EquationParser(equation, max_degree=max_degree, exact=exact)
+        equation_parser.parse_equation()
+        info('Парсинг уравнения успешен')
+        info('Начинаем решать уравнение')
+        equation_solver: EquationSolver = EquationSolver(equation_parser.multipliers)
+        solution = equation_solver.solve()
+    render([solution], sys.stdout, output_format)
+    info('Уравнение успешно решено')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        options = parse_fast_arguments(argv)
+        if options is None:
+            from src.cli import main as cli_main
+            cli_main(args=argv, prog_name='computor')
+        else:
+            solve_single(options['equation'], options['verbose'], None if options['any_degree'] else 2,
+                         options['exact'], options['output_format'])
+    except Exception as e:
+        print(f'Error happened: {e}')
@@ -0,0 +1,130 @@
+import math
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from src import limits, profiling
+from src.equation_parser import WHITESPACE_PATTERN, EquationParser
+from src.limits import LimitExceeded
+
+EVICTION_POLICIES = ('lru', 'fifo')
+
+
+class CachedEquation(NamedTuple):
+    """
+    `coefficients[i]` is the reduced multiplier of X^i; `solution` is None until somebody solved the equation.
+    Invalid equations are cached too: `error` keeps the exception raised by the parser
+    """
+    coefficients: Tuple[float, ...]
+    error: Optional[Exception] = None
+    solution: Optional[Any] = None
+
+    @property
+    def multipliers(self) -> Dict[float, float]:
+        return {float(degree): coefficient for degree, coefficient in enumerate(self.coefficients)}
+
+
+def normalize_equation(equation: str) -> str:
+    return WHITESPACE_PATTERN.sub('', equation)
+
+
+def make_key(equation: str, max_degree: Optional[int] = 2) -> Hashable:
+    """
+    An equation accepted under some limits may exceed tighter ones, so the active limits are a part of the key;
+    the deadline is not (LimitExceeded is never cached and a hit takes no time)
+    """
+    return normalize_equation(equation), max_degree, limits.get_active_limits()._replace(deadline=None)
+
+
+class EquationCache:
+    """
+    Bounded cache of parsed (and optionally solved) equations keyed by the equation without whitespace
+    (and the limits it was parsed under, see make_key).
+    With the 'lru' policy a hit moves the entry to the end of the eviction queue, with 'fifo' it does not
+    """
+
+    def __init__(self, max_size: int = 4096, policy: str = 'lru') -> None:
+        if max_size < 0:
+            raise ValueError('max_size не может быть отрицательным')
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f'Неизвестная политика вытеснения {policy}')
+        self.max_size = max_size
+        self.policy = policy
+        self.entries: 'OrderedDict[Hashable, CachedEquation]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable) -> Optional[CachedEquation]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            if profiling.stats is not None:
+                profiling.stats.count('cache_misses')
+            return None
+        self.hits += 1
+        if profiling.stats is not None:
+            profiling.stats.count('cache_hits')
+        if self.policy == 'lru':
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, entry: CachedEquation) -> None:
+        if self.max_size == 0:
+            return
+        if key in self.entries:
+            self.entries[key] = entry
+            if self.policy == 'lru':
+                self.entries.move_to_end(key)
+            return
+        while len(self.entries) >= self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = entry
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self.entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def parse(self, equation: str, max_degree: Optional[int] = 2) -> CachedEquation:
+        """
+        Returns the cached entry or parses the equation and caches the result.
+        Raises the same exception as EquationParser.parse_equation for invalid equations
+        and ValueError if a reduced coefficient overflowed to an infinity or NaN;
+        LimitExceeded is not cached (the deadline depends on the load, not only on the equation)
+        """
+        key = make_key(equation, max_degree)
+        entry = self.get(key)
+        if entry is None:
+            equation_parser: EquationParser = EquationParser(equation, False, max_degree)
+            try:
+                equation_parser.parse_equation()
+            except LimitExceeded:
+                raise
+            except (ValueError, ZeroDivisionError) as e:
+                entry = CachedEquation((), error=e)
+            else:
+                multipliers = equation_parser.multipliers
+                degree = int(max(multipliers.keys(), default=0))
+                coefficients = tuple(multipliers[float(i)] for i in range(max(3, degree + 1)))
+                if all(map(math.isfinite, coefficients)):
+                    entry = CachedEquation(coefficients)
+                else:
+                    entry = CachedEquation((), error=ValueError(
+                        'Коэффициенты уравнения не представимы числом с плавающей точкой'))
+            self.put(key, entry)
+        if entry.error is not None:
+            raise type(entry.error)(*entry.error.args)
+        return entry
+
+    def store_solution(self, equation: str, solution: Any, max_degree: Optional[int] = 2) -> None:
+        key = make_key(equation, max_degree)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries[key] = entry._replace(solution=solution)
@@ -1,71 +1,130 @@
 import re
 from collections import defaultdict
-from typing import Tuple, List, DefaultDict
+from typing import Any, Dict, Tuple, List, DefaultDict, Optional
 
-from utils import compare_floats_with_epsilon, pow, FloatOrStr
+from src import limits, polynomial_arithmetic, profiling
+from src.expression_dag import ConstantTable, get_constant_table, parse_number
+from src.instrumentation import info, is_verbose
+from src.limits import Limits
+from src.types.rational_number import RationalNumber
+from src.utils import compare_floats_with_epsilon, is_zero
+
+TOKEN_PATTERN = re.compile(r'([+*/^-])')
+GROUPED_TOKEN_PATTERN = re.compile(r'([+*/^()-])')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+CHARSET_PATTERN = re.compile('[+*/^0-9.=X()-]*')
+# binary operators of parenthesized expressions and the unary minus `neg` (only before X or a parenthesis)
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, 'neg': 3, '^': 4}
+RIGHT_ASSOCIATIVE = ('^', 'neg')
+
+
+def replace_one_value(value: float) -> str:
+    if compare_floats_with_epsilon(value, 1.0):
+        return ''
+    return f'{value}*'
+
+
+def format_terms(multipliers: Dict[float, Any]) -> str:
+    """
+    `multipliers` as `a*X^n + ... + c`, from the highest degree down, without zero terms
+    """
+    terms = []
+    for key in sorted((key for key, value in multipliers.items() if not is_zero(value)), reverse=True):
+        value = multipliers[key]
+        if key == 0:
+            term = f'{abs(value)}'
+        elif key == 1:
+            term = f'{replace_one_value(abs(value))}X'
+        else:
+            term = f'{replace_one_value(abs(value))}X^{int(key)}'
+        if terms:
+            term = f'- {term}' if value < 0.0 else f'+ {term}'
+        elif value < 0.0:
+            term = f'-{term}'
+        terms.append(term)
+    return ' '.join(terms) if terms else '0.0'
+
+
+def format_reduced_form(multipliers: Dict[float, Any]) -> str:
+    """
+    `multipliers` as `a*X^n + ... + c = 0.0`
+    """
+    return format_terms(multipliers) + ' = 0.0'
+
+
+class ReducedForm:
+    """
+    Read-only view of the multipliers: the degree and the reduced form (with a positive leading multiplier)
+    are computed on the first access and never change the multipliers
+    """
+    __slots__ = ('multipliers', '_degree', '_text')
+
+    def __init__(self, multipliers: Dict[float, Any]) -> None:
+        self.multipliers = multipliers
+        self._degree: Optional[int] = None
+        self._text: Optional[str] = None
+
+    @property
+    def degree(self) -> int:
+        if self._degree is None:
+            self._degree = int(max((key for key, value in self.multipliers.items() if not is_zero(value)), default=0))
+        return self._degree
+
+    def __str__(self) -> str:
+        if self._text is None:
+            multipliers = self.multipliers
+            if multipliers.get(float(self.degree), 0.0) < 0.0:
+                multipliers = {key: -value for key, value in multipliers.items()}
+            self._text = format_reduced_form(multipliers)
+        return self._text
 
 
 class EquationParser:
-    def __init__(self, equation: str, verbose: bool) -> None:
-        self.equation = re.sub(r'\s+', '', equation)
-        self.multipliers: DefaultDict[float, float] = defaultdict(float)
+    def __init__(self, equation: str, verbose: bool = False, max_degree: Optional[int] = 2,
+                 exact: bool = False, constants: Optional[ConstantTable] = None,
+                 limits: Optional[Limits] = None) -> None:
+        """
+        `max_degree` is the largest allowed degree of X, None allows any non-negative integer degree.
+        With `exact` the multipliers are accumulated as RationalNumber without rounding
+        (only powers with a non-integer exponent are computed with floats) and compared with zero exactly.
+        Constant power chains are folded through `constants` (the table of this process by default,
+        see expression_dag), so a chain that occurs again is not recomputed.
+        The equation is parsed under `limits` (the limits of the process by default, see limits.guard):
+        its length, tokens, degrees, nesting and work are bounded and LimitExceeded is raised beyond them.
+        The degree and the reduced form are reported through the `computor` logger (see instrumentation),
+        with `verbose=True` they are printed to stdout even if that logger is not enabled
+        """
         self.verbose = verbose
+        self.length = len(equation)
+        self.equation = WHITESPACE_PATTERN.sub('', equation)
+        self.multipliers: DefaultDict[float, Any] = defaultdict(RationalNumber if exact else float)
+        self.max_degree = max_degree
+        self.exact = exact
+        self.one = RationalNumber(1) if exact else 1.0
+        self.zero = RationalNumber(0) if exact else 0.0
+        self.x = {1.0: self.one}
+        self.constants = get_constant_table() if constants is None else constants
+        self.limits = limits
 
-    @staticmethod
-    def replace_one_value(value: float) -> str:
-        if compare_floats_with_epsilon(value, 1.0):
-            return ''
-        return f'{value}*'
-
-    def check_verbose(self) -> None:
-        if self.verbose:
-            degree_two = not compare_floats_with_epsilon(self.multipliers[2.0], 0.0)
-            degree_one = not compare_floats_with_epsilon(self.multipliers[1.0], 0.0)
-            degree_zero = not compare_floats_with_epsilon(self.multipliers[0.0], 0.0)
-            degree = 0
-            if degree_two:
-                degree = 2
-            elif degree_one:
-                degree = 1
-            equation = ''
-            need_sign = False
-            if degree_two:
-                if self.multipliers[2.0] < 0.0:
-                    for key, value in self.multipliers.items():
-                        self.multipliers[key] = -value
-                equation += f'{self.replace_one_value(self.multipliers[2.0])}X^2 '
-                need_sign = True
-            if degree_one:
-                if not need_sign:
-                    if self.multipliers[1.0] < 0.0:
-                        for key, value in self.multipliers.items():
-                            self.multipliers[key] = -value
-                    equation += f'{self.replace_one_value(self.multipliers[1.0])}X '
-                    need_sign = True
-                else:
-                    if self.multipliers[1.0] < 0.0:
-                        equation += f'- {self.replace_one_value(-self.multipliers[1.0])}X '
-                    else:
-                        equation += f'+ {self.replace_one_value(self.multipliers[1.0])}X '
-            if degree_zero:
-                if not need_sign:
-                    if self.multipliers[0.0] < 0.0:
-                        for key, value in self.multipliers.items():
-                            self.multipliers[key] = -value
-                    equation += f'{self.multipliers[0.0]} '
-                else:
-                    if self.multipliers[0.0] < 0.0:
-                        equation += f'- {-self.multipliers[0.0]} '
-                    else:
-                        equation += f'+ {self.multipliers[0.0]} '
-            if not equation:
-                equation += '0.0 '
-            equation += '= 0.0'
-            print(f'Степень уравнения: {degree}')
-            print(f'Сокращённая форма: {equation}')
+    @property
+    def reduced_form(self) -> ReducedForm:
+        return ReducedForm(self.multipliers)
 
+    def report(self) -> None:
+        if self.verbose or is_verbose():
+            reduced_form = self.reduced_form
+            info('Степень уравнения: %s', reduced_form.degree, verbose=self.verbose)
+            info('Сокращённая форма: %s', reduced_form, verbose=self.verbose)
+
+    @profiling.timed('parse')
     def parse_equation(self) -> None:
-        if not re.fullmatch('[+*/^0-9.=X-]*', self.equation):
+        with limits.guard(self.limits) as budget:
+            if self.length > budget.limits.max_length:
+                raise limits.LimitExceeded('max_length', self.length, budget.limits.max_length)
+            self.parse_sides()
+
+    def parse_sides(self) -> None:
+        if not CHARSET_PATTERN.fullmatch(self.equation):
             raise ValueError("Уравнение некорректно (в уравнении есть недопустимый символ)")
         parts = self.equation.split('=')
         if len(parts) != 2:
@@ -74,90 +133,212 @@ class EquationParser:
             self.parse_part(part, 1 - 2 * i)
         to_delete = []
         for key, value in self.multipliers.items():
-            if key not in range(3) and compare_floats_with_epsilon(value, 0.0):
+            if key not in range(3) and is_zero(value):
                 to_delete.append(key)
         for key in to_delete:
             del self.multipliers[key]
-        if set(self.multipliers.keys()) - set(range(3)):
-            raise ValueError('Уравнение некорректно (есть компонент с некорректной степенью либо меньше 0, '
-                             'либо больше 2, либо нецелой)')
-        self.check_verbose()
+        if limits.budget is not None:
+            for key in self.multipliers.keys():
+                limits.budget.check_exponent(key)
+        for key in self.multipliers.keys():
+            if key < 0 or key != int(key) or (self.max_degree is not None and key > self.max_degree):
+                if self.max_degree is None:
+                    raise ValueError('Уравнение некорректно (есть компонент с некорректной степенью либо меньше 0, '
+                                     'либо нецелой)')
+                raise ValueError('Уравнение некорректно (есть компонент с некорректной степенью либо меньше 0, '
+                                 f'либо больше {self.max_degree}, либо нецелой)')
+        self.report()
 
     def parse_part(self, part: str, sign: int) -> None:
-        compounds = re.sub(r'([^+*^/-])(\+)', r'\1|', part).split('|')
-        if len(compounds) > 1:
-            for compound in compounds:
-                self.parse_part(compound, sign)
+        """
+        Single pass over the operator tokens of one side of the equation.
+        A `+`/`-` is a binary operator only right after a literal character, otherwise it is a sign of the literal.
+        `*` and `/` have higher precedence than `+`/`-`, `^` is right-associative and binds the tightest.
+        A part with parentheses is expanded by parse_grouped instead
+        """
+        if '(' in part or ')' in part:
+            for degree, value in self.parse_grouped(part).items():
+                self.multipliers[degree] += value * sign
             return
-        compounds = re.sub(r'([^+*^/-])(-)', r'\1|', part).split('|')
-        if len(compounds) > 1:
-            self.parse_part(compounds[0], sign)
-            for compound in compounds[1:]:
-                self.parse_part(compound, sign * -1)
+        chunks = TOKEN_PATTERN.split(part)
+        if profiling.stats is not None:
+            profiling.stats.count('tokens', len(chunks))
+        if limits.budget is not None:
+            limits.budget.add_terms(len(chunks))
+            limits.budget.charge(len(chunks))
+        term_sign = sign
+        literals: List[str] = []
+        in_denominator = False
+        one, zero = self.one, self.zero
+        nominator_multiplier, nominator_degree = one, zero
+        denominator_multiplier, denominator_degree = one, zero
+        literal = chunks[0]
+        for i in range(1, len(chunks), 2):
+            operator = chunks[i]
+            if operator in '+-' and not chunks[i - 1]:
+                literal += operator + chunks[i + 1]
+                continue
+            literals.append(literal)
+            literal = chunks[i + 1]
+            if operator == '^':
+                continue
+            multiplier, degree = self.parse_operand(literals)
+            literals.clear()
+            if in_denominator:
+                denominator_multiplier *= multiplier
+                denominator_degree += degree
+            else:
+                nominator_multiplier *= multiplier
+                nominator_degree += degree
+            if operator == '*' or operator == '/':
+                in_denominator = operator == '/'
+                continue
+            self.add_term(nominator_multiplier, nominator_degree, denominator_multiplier, denominator_degree, term_sign)
+            term_sign = sign if operator == '+' else -sign
+            in_denominator = False
+            nominator_multiplier, nominator_degree = one, zero
+            denominator_multiplier, denominator_degree = one, zero
+        literals.append(literal)
+        multiplier, degree = self.parse_operand(literals)
+        if in_denominator:
+            denominator_multiplier *= multiplier
+            denominator_degree += degree
+        else:
+            nominator_multiplier *= multiplier
+            nominator_degree += degree
+        self.add_term(nominator_multiplier, nominator_degree, denominator_multiplier, denominator_degree, term_sign)
+
+    def parse_grouped(self, part: str) -> polynomial_arithmetic.Sparse:
+        """
+        Expands an expression with parentheses, e.g. `(X + 1) * (X - 2)^2 / (X - 2)`, into a sparse polynomial
+        (see polynomial_arithmetic) with an operator-precedence parser. Signs are read as in parse_part,
+        a `-` before X or `(` negates the operand. A polynomial can be raised only to a non-negative integer
+        constant power and divided only by a polynomial that divides it without a remainder
+        """
+        tokens = [token for token in GROUPED_TOKEN_PATTERN.split(part) if token]
+        if profiling.stats is not None:
+            profiling.stats.count('tokens', len(tokens))
+        budget = limits.budget
+        if budget is not None:
+            budget.add_terms(len(tokens))
+        operands: List[polynomial_arithmetic.Sparse] = []
+        operators: List[str] = []
+        expect_operand = True
+        depth = 0
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            i += 1
+            if budget is not None:
+                budget.charge()
+            if expect_operand:
+                if token == '(':
+                    operators.append(token)
+                    depth += 1
+                    if budget is not None:
+                        budget.check_depth(depth)
+                elif token in '+-':
+                    following = tokens[i] if i < len(tokens) else ''
+                    if following and following not in PRECEDENCE and following not in '()X':
+                        operands.append(polynomial_arithmetic.constant(self.parse_literal(token + following)))
+                        expect_operand = False
+                        i += 1
+                    elif token == '-':
+                        operators.append('neg')
+                elif token in PRECEDENCE or token == ')':
+                    raise ValueError("Уравнение некорректно (пропущено слагаемое)")
+                elif token == 'X':
+                    operands.append(self.x)
+                    expect_operand = False
+                else:
+                    operands.append(polynomial_arithmetic.constant(self.parse_literal(token)))
+                    expect_operand = False
+            elif token == ')':
+                while operators and operators[-1] != '(':
+                    self.apply_operator(operators.pop(), operands)
+                if not operators:
+                    raise ValueError("Уравнение некорректно (непарные скобки)")
+                operators.pop()
+                depth -= 1
+            elif token in PRECEDENCE:
+                while operators and operators[-1] != '(' and (
+                        PRECEDENCE[operators[-1]] > PRECEDENCE[token] or
+                        PRECEDENCE[operators[-1]] == PRECEDENCE[token] and token not in RIGHT_ASSOCIATIVE):
+                    self.apply_operator(operators.pop(), operands)
+                operators.append(token)
+                expect_operand = True
+            else:
+                raise ValueError(f"Уравнение некорректно (пропущен оператор перед {token})")
+        if expect_operand:
+            raise ValueError("Уравнение некорректно (пропущено слагаемое)")
+        while operators:
+            operator = operators.pop()
+            if operator == '(':
+                raise ValueError("Уравнение некорректно (непарные скобки)")
+            self.apply_operator(operator, operands)
+        return operands[0]
+
+    def apply_operator(self, operator: str, operands: List[polynomial_arithmetic.Sparse]) -> None:
+        if operator == 'neg':
+            operands[-1] = polynomial_arithmetic.scale(operands[-1], -1)
             return
-        self.parse_compound(part, sign)
-
-    def parse_compound(self, compound: str, sign: int):
-        fractions = compound.split('*')
-        nominators = []
-        denominators = []
-        for fraction in fractions:
-            nominator, literal_denominators = self.parse_fraction(fraction)
-            nominators.append(nominator)
-            denominators.extend(literal_denominators)
-        multiplier, degree = self.check_fraction(nominators, denominators)
-        self.multipliers[degree] += multiplier * sign
+        right = operands.pop()
+        left = operands[-1]
+        if operator == '+' or operator == '-':
+            operands[-1] = polynomial_arithmetic.add(left, right, 1 if operator == '+' else -1)
+        elif operator == '*':
+            operands[-1] = polynomial_arithmetic.multiply(left, right)
+        elif operator == '/':
+            quotient, remainder = polynomial_arithmetic.divide(left, right)
+            if remainder:
+                raise ValueError("Уравнение некорректно (многочлен не делится нацело)")
+            operands[-1] = quotient
+        else:
+            operands[-1] = self.power(left, right)
 
-    def parse_fraction(self, fraction: str) -> Tuple[FloatOrStr, List[FloatOrStr]]:
-        operands = fraction.split('/')
-        nominator = self.parse_operand(operands[0])
-        denominators = [self.parse_operand(operand) for operand in operands[1:]]
-        return nominator, denominators
-
-    def parse_operand(self, operand: str) -> FloatOrStr:
-        literals = operand.split('^', 1)
-        if len(literals) == 1:
-            if literals[0] == 'X':
-                return f'{literals[0]}^1'
-            return self.parse_number(literals[0])
-        power = self.parse_operand(literals[1])
-        if isinstance(power, str):
+    def power(self, base: polynomial_arithmetic.Sparse,
+              exponent: polynomial_arithmetic.Sparse) -> polynomial_arithmetic.Sparse:
+        if profiling.stats is not None:
+            profiling.stats.count('pow_calls')
+        return polynomial_arithmetic.raise_power(base, exponent, self.exact)
+
+    def parse_operand(self, literals: List[str]) -> Tuple[Any, Any]:
+        """
+        Evaluates `literals[0]^literals[1]^...^literals[-1]` from right to left
+        and returns the numeric multiplier and the degree of X of the operand.
+        Only the first literal may be X: the rest is a constant chain evaluated through the constant table
+        """
+        if len(literals) > 1 and profiling.stats is not None:
+            profiling.stats.count('pow_calls', len(literals) - 1)
+            profiling.stats.observe_max('pow_chain_depth', len(literals) - 1)
+        is_x = literals[0] == 'X'
+        constants = literals[1:] if is_x else literals
+        if 'X' in constants:
             raise ValueError("X не может быть в степени, X может быть только возводиться в степень")
-        if literals[0] == 'X':
-            return f'{literals[0]}^{power}'
-        return pow(self.parse_number(literals[0]), power)
+        if not constants:
+            return self.one, self.one
+        value = self.constants.evaluate(constants, self.exact)
+        if is_x and limits.budget is not None:
+            limits.budget.check_exponent(value)
+        return (self.one, value) if is_x else (value, self.zero)
+
+    def parse_literal(self, literal: str) -> Any:
+        value = self.parse_number(literal)
+        return RationalNumber(literal) if self.exact else value
 
     @staticmethod
     def parse_number(literal: str) -> float:
-        if not re.fullmatch(r'[+-]?\d+(\.\d+)?', literal):
-            raise ValueError(f"Уравнение некорректно (некорректный литерал {literal})")
-        if not literal:
-            raise ValueError("Уравнение некорректно (пропущено слагаемое)")
-        try:
-            value = float(literal)
-        except ValueError:
-            raise ValueError(f"Уравнение некорректно (некорректный литерал {literal})")
-        return value
-
-    def check_fraction(self, nominators: List[FloatOrStr], denominators: List[FloatOrStr]) -> Tuple[float, float]:
-        nominator_multiplier, nominator_degree = self.get_multiplier_and_degree(nominators)
-        denominator_multiplier, denominator_degree = self.get_multiplier_and_degree(denominators)
-        if compare_floats_with_epsilon(denominator_multiplier, 0.0):
+        return parse_number(literal)
+
+    def add_term(self, nominator_multiplier: Any, nominator_degree: Any, denominator_multiplier: Any,
+                 denominator_degree: Any, sign: int) -> None:
+        if is_zero(denominator_multiplier):
             raise ZeroDivisionError('Уравнение некорректно (есть деление на 0)')
         multiplier = nominator_multiplier / denominator_multiplier
         degree = nominator_degree - denominator_degree
-        return multiplier, degree
-
-    @staticmethod
-    def get_multiplier_and_degree(values: List[FloatOrStr]) -> Tuple[float, float]:
-        multiplier = 1.0
-        degree = 0.0
-        for value in values:
-            if isinstance(value, float):
-                multiplier *= float(value)
-            else:
-                degree += float(value[2:])
-        return multiplier, degree
+        if self.exact:
+            degree = float(degree)
+        self.multipliers[degree] += multiplier * sign
 
     def __str__(self):
         string = f'{self.multipliers[2]}*X^2 '
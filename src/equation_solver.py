@@ -1,68 +1,187 @@
-from typing import Dict, Tuple, Any, List
+import math
+from typing import Dict, Any, List, Tuple
 
-from utils import compare_floats_with_epsilon, sqrt
+from src import limits, profiling
+from src.instrumentation import info, is_verbose
+from src.polynomial_solver import PolynomialSolver
+from src.solution import (KIND_ANY, KIND_DOUBLE_ROOT, KIND_LINEAR, KIND_NO_SOLUTIONS, KIND_POLYNOMIAL, KIND_TWO_COMPLEX,
+                      KIND_TWO_REAL, Solution, format_human)
+from src.types.complex_number import ComplexNumber
+from src.types.rational_number import RationalNumber
+from src.utils import compare_floats_with_epsilon, is_zero, sqrt
+
+DISCRIMINANT_MESSAGES = {
+    KIND_DOUBLE_ROOT: 'Дискриминант равен нулю',
+    KIND_TWO_REAL: 'Дискриминант больше нуля',
+    KIND_TWO_COMPLEX: 'Дискриминант меньше нуля',
+}
+
+
+def to_float(value) -> float:
+    """
+    A root as a float: exact roots beyond the float range raise ValueError instead of OverflowError
+    """
+    try:
+        return float(value)
+    except OverflowError:
+        raise ValueError('Корень уравнения не представим числом с плавающей точкой')
+
+
+def saturated_float(value) -> float:
+    """
+    A reported coefficient or discriminant as a float: exact ones beyond the float range become ±inf
+    """
+    try:
+        return float(value)
+    except OverflowError:
+        return math.copysign(math.inf, value.sign())
+
+
+def scale_exact(multipliers: Dict[float, Any], degree: int) -> Tuple[Dict[float, float], int]:
+    """
+    Float multipliers of the exact polynomial divided by its leading multiplier after X = 2^scale * Y,
+    where 2^scale is about the magnitude of the largest root (the largest |a_i / a_n|^(1 / (n - i))):
+    they stay within the float range even if the exact ones are not. The roots are those of Y times 2^scale
+    """
+    leading = RationalNumber(multipliers[degree])
+    ratios = {int(key): RationalNumber(value) / leading for key, value in multipliers.items() if key < degree and value}
+    scale = max((math.ceil((ratio.numerator.bit_length() - ratio.denominator.bit_length()) / (degree - key))
+                 for key, ratio in ratios.items()), default=0)
+    scaled: Dict[float, float] = {float(degree): 1.0}
+    for key, ratio in ratios.items():
+        shift = scale * (key - degree)
+        numerator = abs(ratio.numerator) << max(shift, 0)
+        denominator = ratio.denominator << max(-shift, 0)
+        scaled[float(key)] = math.copysign(numerator / denominator, ratio.sign())
+    return scaled, scale
 
 
 class EquationSolver:
-    def __init__(self, multipliers: Dict[float, float], verbose: bool):
-        self.c = multipliers[0]
-        self.b = multipliers[1]
-        self.a = multipliers[2]
+    """
+    Multipliers may be floats (compared with zero up to epsilon) or exact RationalNumber values:
+    then the degree and the sign of the discriminant are decided exactly and floats are used only for the roots.
+    `solve` returns a Solution, `solve_equation` also prints it.
+    The intermediate steps are reported through the `computor` logger (see instrumentation),
+    with `verbose=True` they are printed to stdout even if that logger is not enabled
+    """
+
+    def __init__(self, multipliers: Dict[float, Any], verbose: bool = False):
         self.verbose = verbose
+        self.multipliers = multipliers
+        self.c = multipliers.get(0, 0.0)
+        self.b = multipliers.get(1, 0.0)
+        self.a = multipliers.get(2, 0.0)
+        self.degree = int(max((key for key, value in multipliers.items() if not is_zero(value)), default=0))
 
-    def solve_equation(self) -> List[Any]:
-        if not compare_floats_with_epsilon(self.a, 0.0):
-            result = self.solve_quadratic_equation()
-        elif not compare_floats_with_epsilon(self.b, 0.0):
-            result = self.solve_linear_equation()
-        else:
-            result = self.solve_zero_degree_equation()
-        return sorted(result)
+    def coefficients(self) -> List[float]:
+        return [saturated_float(self.multipliers.get(degree, 0.0)) for degree in range(self.degree + 1)]
 
-    def solve_zero_degree_equation(self) -> Tuple[str]:
-        if compare_floats_with_epsilon(self.c, 0.0):
-            print('Любое значение X является решением данного уравнения.')
-            return 'any',
-        else:
-            print('У данного уравнения нет решений.')
-            return 'no',
-
-    def solve_linear_equation(self) -> Tuple[float]:
-        x = -self.c / self.b
-        print(f'Уравнение имеет одно решение.\nРешение данного уравнения: X = {x}')
-        return x,
-
-    def solve_quadratic_equation(self) -> Tuple[Any, ...]:
-        discriminant: float = self.b * self.b - 4 * self.a * self.c
-        if compare_floats_with_epsilon(discriminant, 0.0):
-            x = -self.b / (2 * self.a)
-            if self.verbose:
-                print(f'Дискриминант равен нулю')
-            print(f'Уравнение имеет 2 совпадающих вещественных решения:\nx0 = {x}\nx1 = {x}')
-            return x,
-        elif discriminant > 0:
-            discriminant_sqrt = sqrt(discriminant)
-            x0 = (-self.b + discriminant_sqrt) / (2 * self.a)
-            x1 = (-self.b - discriminant_sqrt) / (2 * self.a)
-            if self.verbose:
-                print(f'Дискриминант больше нуля')
-            print(f'Уравнение имеет 2 вещественных решения:\nx0 = {x0}\nx1 = {x1}')
-            return x0, x1
+    @profiling.timed('solve')
+    def solve(self) -> Solution:
+        if self.degree > 2:
+            solution = self.solve_higher_degree_equation()
+        elif not is_zero(self.a):
+            solution = self.solve_quadratic_equation()
+        elif not is_zero(self.b):
+            solution = self.solve_linear_equation()
         else:
-            discriminant_sqrt = sqrt(-discriminant)
-            operand1 = -self.b / (2 * self.a)
-            if compare_floats_with_epsilon(operand1, 0.0):
-                operand1 = abs(operand1)
-            operand2 = discriminant_sqrt / (2 * self.a)
-            if operand2 > 0.0:
-                signs = ['+', '-']
+            solution = self.solve_zero_degree_equation()
+        if self.verbose or is_verbose():
+            self.report(solution)
+        return solution
+
+    def report(self, solution: Solution) -> None:
+        if solution.kind in DISCRIMINANT_MESSAGES:
+            info(DISCRIMINANT_MESSAGES[solution.kind], verbose=self.verbose)
+        elif solution.iterations:
+            info('Корни найдены итерационным методом за %s итераций', solution.iterations, verbose=self.verbose)
+
+    def solve_equation(self) -> List[Any]:
+        solution = self.solve()
+        print(format_human(solution), end='')
+        return solution.legacy_roots()
+
+    def solve_zero_degree_equation(self) -> Solution:
+        kind = KIND_ANY if is_zero(self.c) else KIND_NO_SOLUTIONS
+        return Solution(kind, 0, self.coefficients(), [])
+
+    def solve_linear_equation(self) -> Solution:
+        x = to_float(-self.c / self.b)
+        return Solution(KIND_LINEAR, 1, self.coefficients(), [ComplexNumber(x, 0.0)])
+
+    def solve_quadratic_equation(self) -> Solution:
+        discriminant = self.b * self.b - 4 * self.a * self.c
+        if isinstance(discriminant, RationalNumber):
+            return self.solve_exact_quadratic_equation(discriminant)
+        if is_zero(discriminant):
+            x = float(-self.b / (2 * self.a))
+            return Solution(KIND_DOUBLE_ROOT, 2, self.coefficients(), [ComplexNumber(x, 0.0), ComplexNumber(x, 0.0)],
+                            float(discriminant))
+        # the discriminant is known to be non-zero here, so sqrt must not round small values to 0
+        a, b, discriminant = float(self.a), float(self.b), float(discriminant)
+        if discriminant > 0:
+            discriminant_sqrt = sqrt(discriminant, epsilon=0.0)
+            x0 = (-b + discriminant_sqrt) / (2 * a)
+            x1 = (-b - discriminant_sqrt) / (2 * a)
+            return Solution(KIND_TWO_REAL, 2, self.coefficients(), [ComplexNumber(x0, 0.0), ComplexNumber(x1, 0.0)],
+                            discriminant)
+        discriminant_sqrt = sqrt(-discriminant, epsilon=0.0)
+        operand1 = -b / (2 * a)
+        if compare_floats_with_epsilon(operand1, 0.0):
+            operand1 = abs(operand1)
+        operand2 = discriminant_sqrt / (2 * a)
+        return Solution(KIND_TWO_COMPLEX, 2, self.coefficients(),
+                        [ComplexNumber(operand1, operand2), ComplexNumber(operand1, -operand2)], discriminant)
+
+    def solve_exact_quadratic_equation(self, discriminant: RationalNumber) -> Solution:
+        """
+        The sign of the discriminant is exact and the roots are computed with rationals (the square root of
+        the discriminant with RationalNumber.sqrt), they are rounded to floats only at the end: multipliers
+        beyond the float range work as long as the roots are within it
+        """
+        a, b, c = RationalNumber(self.a), RationalNumber(self.b), RationalNumber(self.c)
+        reported = saturated_float(discriminant)
+        if discriminant.sign() == 0:
+            x = to_float(-b / (2 * a))
+            return Solution(KIND_DOUBLE_ROOT, 2, self.coefficients(), [ComplexNumber(x, 0.0), ComplexNumber(x, 0.0)],
+                            reported)
+        root = abs(discriminant).sqrt()
+        if discriminant.sign() > 0:
+            # x0 = (-b + root) / 2a and x1 = (-b - root) / 2a: the one without cancellation is computed directly,
+            # the other one from x0 * x1 = c / a
+            if b.sign() >= 0:
+                q = -(b + root) / 2
+                x0, x1 = c / q, q / a
             else:
-                operand2 *= -1
-                signs = ['-', '+']
-            x0 = f'{operand1} {signs[0]} {operand2} * i'
-            x1 = f'{operand1} {signs[1]} {operand2} * i'
-            if self.verbose:
-                print(f'Дискриминант меньше нуля')
-            print(f'Уравнение не имеет вещественных решений и имеет 2 мнимых решения:\nx0 = {x0}\nx1 = {x1}')
-            return x0, x1
+                q = (root - b) / 2
+                x0, x1 = q / a, c / q
+            return Solution(KIND_TWO_REAL, 2, self.coefficients(),
+                            [ComplexNumber(to_float(x0), 0.0), ComplexNumber(to_float(x1), 0.0)], reported)
+        operand1 = to_float(-b / (2 * a))
+        if compare_floats_with_epsilon(operand1, 0.0):
+            operand1 = abs(operand1)
+        operand2 = to_float(root / (2 * a))
+        return Solution(KIND_TWO_COMPLEX, 2, self.coefficients(),
+                        [ComplexNumber(operand1, operand2), ComplexNumber(operand1, -operand2)], reported)
 
+    def solve_higher_degree_equation(self) -> Solution:
+        """
+        The roots are in the order of PolynomialSolver.solve, the iterations are bounded by the limits of
+        the equation (see limits.guard). Exact multipliers are scaled first (see scale_exact)
+        """
+        multipliers, scale = self.multipliers, 0
+        if isinstance(multipliers.get(self.degree), RationalNumber):
+            multipliers, scale = scale_exact(multipliers, self.degree)
+        with limits.guard():
+            polynomial_solver = PolynomialSolver(multipliers)
+            roots = polynomial_solver.solve()
+        if scale:
+            try:
+                roots = [ComplexNumber(math.ldexp(root.real, scale), math.ldexp(root.imaginary, scale))
+                         for root in roots]
+            except OverflowError:
+                raise ValueError('Корень уравнения не представим числом с плавающей точкой')
+        if profiling.stats is not None:
+            profiling.stats.count('polynomial_iterations', polynomial_solver.iterations)
+        return Solution(KIND_POLYNOMIAL, self.degree, self.coefficients(), roots,
+                        iterations=polynomial_solver.iterations)
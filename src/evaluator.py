@@ -0,0 +1,121 @@
+"""
+Compiled evaluators of reduced polynomials (the `multipliers` maps of EquationParser).
+
+compile_polynomial turns the map into a Python function with Horner's scheme unrolled into straight-line code,
+one statement per degree, so evaluating at a point runs no loop and looks up no dictionary.
+CompiledPolynomial.evaluate_many evaluates the same scheme over a NumPy array of real or complex X values
+(numpy is imported only there): the array is processed in blocks of BLOCK_SIZE values that stay in the CPU cache
+while every coefficient is applied to them in place
+"""
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+from src import profiling
+from src.solution import Solution
+from src.types.complex_number import ComplexNumber, as_pair
+from src.utils import is_zero
+
+BLOCK_SIZE = 1 << 15
+
+Point = Union[ComplexNumber, complex, float, int]
+
+
+def dense_coefficients(multipliers: Dict[float, Any]) -> List[float]:
+    """
+    `coefficients[i]` is the multiplier of X^i as a float, up to the highest non-zero one
+    """
+    coefficients = [0.0]
+    for degree, value in multipliers.items():
+        if degree < 0 or degree != int(degree):
+            raise ValueError(f'Некорректная степень {degree}')
+        if is_zero(value):
+            continue
+        if degree >= len(coefficients):
+            coefficients.extend([0.0] * (int(degree) + 1 - len(coefficients)))
+        coefficients[int(degree)] = float(value)
+    return coefficients
+
+
+def compile_horner(coefficients: List[float]) -> Callable[[Any], Any]:
+    """
+    def horner(x):
+        result = c2                (c0 + 0 * x for a constant, to keep the type of x)
+        result = result * x + c1
+        result = result * x        (zero multipliers are skipped)
+        ...
+    The coefficients are bound as default arguments, i.e. they are local variables of the function
+    """
+    names = [f'c{degree}' for degree in range(len(coefficients))]
+    lines = [f'def horner(x, {", ".join(f"{name}={name}" for name in names)}):',
+             f'    result = {names[-1]}' if len(names) > 1 else '    result = c0 + 0 * x']
+    for degree in range(len(coefficients) - 2, -1, -1):
+        lines.append(f'    result = result * x + {names[degree]}' if coefficients[degree] else
+                     '    result = result * x')
+    lines.append('    return result')
+    namespace = dict(zip(names, coefficients))
+    exec(compile('\n'.join(lines), '<horner>', 'exec'), namespace)
+    return namespace['horner']
+
+
+class CompiledPolynomial:
+    """
+    Evaluator of a reduced polynomial: call it with an int, float, complex, RationalNumber or ComplexNumber X
+    (ComplexNumber and RationalNumber are converted to complex and float), `evaluate_many` with an array of X values
+    and `residuals` with the roots of a Solution. The multipliers must have non-negative integer degrees
+    """
+    __slots__ = ('coefficients', 'degree', 'function')
+
+    def __init__(self, multipliers: Dict[float, Any]) -> None:
+        self.coefficients = dense_coefficients(multipliers)
+        self.degree = len(self.coefficients) - 1
+        self.function = compile_horner(self.coefficients)
+
+    def __call__(self, x: Point) -> Union[float, complex]:
+        if type(x) is not float and type(x) is not complex:
+            pair = as_pair(x)
+            if pair is None:
+                raise TypeError(f'Нельзя вычислить многочлен от {type(x).__name__}')
+            x = complex(*pair) if pair[1] else pair[0]
+        return self.function(x)
+
+    def evaluate_all(self, xs: Iterable[Point]) -> List[Union[float, complex]]:
+        return [self(x) for x in xs]
+
+    def evaluate_many(self, xs, out=None):
+        """
+        Values at every X of the array `xs` (float64, or complex128 if `xs` is complex) with the shape of `xs`,
+        written to the contiguous array `out` of the same size and type if it is given
+        """
+        import numpy as np
+        xs = np.asarray(xs)
+        dtype = np.complex128 if np.iscomplexobj(xs) else np.float64
+        flat = np.ascontiguousarray(xs, dtype=dtype).ravel()
+        if out is None:
+            result = np.empty(flat.shape, dtype=dtype)
+        elif out.size != flat.size or out.dtype != dtype or not out.flags.c_contiguous:
+            raise ValueError('out должен быть непрерывным массивом того же размера и типа, что и xs')
+        else:
+            result = out.reshape(-1)
+        leading, rest = self.coefficients[-1], self.coefficients[-2::-1]
+        for start in range(0, flat.shape[0], BLOCK_SIZE):
+            block = flat[start:start + BLOCK_SIZE]
+            values = result[start:start + BLOCK_SIZE]
+            values.fill(leading)
+            for coefficient in rest:
+                values *= block
+                if coefficient:
+                    values += coefficient
+        if profiling.stats is not None:
+            profiling.stats.count('evaluated_points', flat.shape[0])
+        return result.reshape(xs.shape) if out is None else out
+
+    def residuals(self, roots: Union[Solution, Iterable[Point]]) -> List[float]:
+        """
+        |P(root)| for every root reported by the solver (none for the 'any' and 'no solutions' cases)
+        """
+        if isinstance(roots, Solution):
+            roots = roots.roots
+        return [abs(self(root)) for root in roots]
+
+
+def compile_polynomial(multipliers: Dict[float, Any]) -> CompiledPolynomial:
+    return CompiledPolynomial(multipliers)
@@ -0,0 +1,151 @@
+"""
+Hash-consed constant sub-expressions of the parser.
+
+A power chain `a^b^c` without X is the node Power(a, Power(b, Power(c))): every node is interned by its literal,
+its exponent node and the arithmetic (float or exact), so identical chains and identical tails of different chains
+are the same node, and the value of a node is folded once, when it is created. The table of interned nodes
+is bounded (least recently used nodes are evicted) and shared by all parsers of a process (see get_constant_table)
+"""
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from src import limits, profiling
+from src.types.rational_number import RationalNumber
+from src.utils import pow
+
+NUMBER_PATTERN = re.compile(r'[+-]?\d+(\.\d+)?')
+DEFAULT_TABLE_SIZE = 1 << 12
+
+
+def parse_number(literal: str) -> float:
+    if not NUMBER_PATTERN.fullmatch(literal):
+        raise ValueError(f"Уравнение некорректно (некорректный литерал {literal})")
+    if not literal:
+        raise ValueError("Уравнение некорректно (пропущено слагаемое)")
+    try:
+        value = float(literal)
+    except ValueError:
+        raise ValueError(f"Уравнение некорректно (некорректный литерал {literal})")
+    return value
+
+
+class ConstantNode:
+    """
+    `literal` raised to the power `exponent` (None for the literal itself) with its folded `value`:
+    a float, or a RationalNumber if `exact` (see EquationParser)
+    """
+    __slots__ = ('literal', 'exponent', 'exact', 'value')
+
+    def __init__(self, literal: str, exponent: Optional['ConstantNode'], exact: bool) -> None:
+        self.literal = literal
+        self.exponent = exponent
+        self.exact = exact
+        value = parse_number(literal)
+        if exponent is None:
+            self.value = RationalNumber(literal) if exact else value
+            return
+        self.check_exponent()
+        if exact:
+            self.value = RationalNumber(literal) ** exponent.value
+        else:
+            self.value = float(pow(value, exponent.value))
+
+    def check_exponent(self) -> None:
+        """
+        Raises LimitExceeded if the exponent is not finite (e.g. 2^10^400, where 10^400 overflowed)
+        or exceeds max_exponent, unless the literal is 0 or ±1. Also called for interned nodes,
+        since they may have been created under other limits
+        """
+        if self.exponent is not None and abs(float(self.literal)) not in (0.0, 1.0):
+            limits.check_exponent(self.exponent.value)
+
+    def __str__(self) -> str:
+        if self.exponent is None:
+            return self.literal
+        return f'{self.literal}^{self.exponent}'
+
+    def __repr__(self) -> str:
+        return f'ConstantNode({str(self)!r}, {self.value!r})'
+
+
+class ConstantTable:
+    """
+    Bounded table of interned ConstantNode objects; `max_size=0` interns nothing
+    (every chain is then evaluated from scratch)
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TABLE_SIZE) -> None:
+        if max_size < 0:
+            raise ValueError('max_size не может быть отрицательным')
+        self.max_size = max_size
+        self.entries: 'OrderedDict[Hashable, ConstantNode]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def node(self, literal: str, exponent: Optional[ConstantNode], exact: bool = False) -> ConstantNode:
+        key = (literal, exponent, exact)
+        node = self.entries.get(key)
+        if node is not None:
+            self.hits += 1
+            if profiling.stats is not None:
+                profiling.stats.count('constant_hits')
+            self.entries.move_to_end(key)
+            node.check_exponent()
+            return node
+        self.misses += 1
+        if profiling.stats is not None:
+            profiling.stats.count('constant_misses')
+        node = ConstantNode(literal, exponent, exact)
+        if self.max_size:
+            while len(self.entries) >= self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self.entries[key] = node
+        return node
+
+    def chain(self, literals: Sequence[str], exact: bool = False) -> ConstantNode:
+        """
+        The node of `literals[0]^literals[1]^...^literals[-1]` (right-associative)
+        """
+        node = None
+        for literal in reversed(literals):
+            node = self.node(literal, node, exact)
+        return node
+
+    def evaluate(self, literals: Sequence[str], exact: bool = False) -> Any:
+        return self.chain(literals, exact).value
+
+    def nodes(self) -> List[ConstantNode]:
+        """
+        The interned nodes from the least to the most recently used
+        """
+        return list(self.entries.values())
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self.entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+
+_constant_table: Optional[ConstantTable] = None
+
+
+def get_constant_table(max_size: Optional[int] = None) -> ConstantTable:
+    """
+    The table shared by the parsers of this process (it is recreated if `max_size` is given and changes)
+    """
+    global _constant_table
+    if _constant_table is None:
+        _constant_table = ConstantTable(DEFAULT_TABLE_SIZE if max_size is None else max_size)
+    elif max_size is not None and _constant_table.max_size != max_size:
+        _constant_table = ConstantTable(max_size)
+    return _constant_table
+
@@ -0,0 +1,66 @@
+"""
+Instrumentation of the parser and the solver: explanations of the intermediate steps (the reduced form,
+the sign of the discriminant, ...) are INFO records of the `computor` logger.
+They are computed only if a consumer enabled that level, so the default path only pays for one level check.
+The logging module is not imported until somebody uses it: if it is not loaded, nobody could enable the level
+"""
+import sys
+from typing import Optional, TextIO
+
+LOGGER_NAME = 'computor'
+INFO = 20
+
+_logger = None
+
+
+def get_logger():
+    global _logger
+    if _logger is None:
+        import logging
+        _logger = logging.getLogger(LOGGER_NAME)
+    return _logger
+
+
+def is_verbose() -> bool:
+    if _logger is None:
+        if 'logging' not in sys.modules:
+            return False
+        get_logger()
+    return _logger.isEnabledFor(INFO)
+
+
+def info(message: str, *args, verbose: bool = False) -> None:
+    """
+    Logs the record if the level is enabled, otherwise prints it to stdout if the caller itself is `verbose`
+    (a verbose parser or solver does not turn on the logger of the whole process)
+    """
+    if is_verbose():
+        _logger.info(message, *args)
+    elif verbose:
+        print(message % args if args else message)
+
+
+def enable_verbose(stream: Optional[TextIO] = None):
+    """
+    Prints the INFO records of the `computor` logger as plain lines to `stream` (stdout by default).
+    Calling it again replaces the previous handler
+    """
+    import logging
+    logger = get_logger()
+    disable_verbose()
+    handler = logging.StreamHandler(sys.stdout if stream is None else stream)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler.computor_verbose = True
+    logger.addHandler(handler)
+    logger.setLevel(INFO)
+    logger.propagate = False
+    return handler
+
+
+def disable_verbose() -> None:
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        if getattr(handler, 'computor_verbose', False):
+            logger.removeHandler(handler)
+    logger.setLevel(0)
+    logger.propagate = True
@@ -0,0 +1,264 @@
+"""
+An asyncio worker that solves equation jobs pulled from a broker (see brokers).
+
+Jobs are fetched in batches of `batch_size`; every batch is solved by batch.solve_chunk in a process pool
+(or right in the event loop with one worker, like server.EquationServer) and at most `max_in_flight` batches
+are being solved at a time. Records are acknowledged in batches: once `ack_batch_size` of them are pending
+or every `ack_interval` seconds. An invalid equation is a result like any other (a record with `error`).
+If solving a batch raised (e.g. a job crashed its worker process, which breaks the pool and every batch in it),
+no attempt is charged: its jobs are solved again one at a time in a separate single-process pool, and only a job
+that fails alone is returned to the broker, to be retried until it has failed `max_attempts` times
+"""
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from src import limits, profiling
+from src.batch import Record, read_equations, solve_chunk
+from src.brokers import Broker, Job, SQLiteBroker
+
+LATENCY_WINDOW = 1 << 14
+
+
+class WorkerMetrics:
+    """
+    Counters of a JobWorker and the latencies (from fetch to ack) of its last `window` jobs;
+    while profiling stats are enabled the counters are also counted into them with the `jobs_` prefix
+    """
+    __slots__ = ('started', 'done', 'errors', 'isolated', 'retried', 'failed', 'batches', 'acks', 'latencies')
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.started = time.perf_counter()
+        self.done = 0
+        self.errors = 0
+        self.isolated = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+        self.acks = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def count(self, name: str, value: int = 1) -> None:
+        setattr(self, name, getattr(self, name) + value)
+        if profiling.stats is not None:
+            profiling.stats.count('jobs_' + name, value)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        p50, p99 = self.percentile(0.5), self.percentile(0.99)
+        return {'done': self.done, 'errors': self.errors, 'isolated': self.isolated, 'retried': self.retried,
+                'failed': self.failed, 'batches': self.batches, 'acks': self.acks, 'elapsed_s': elapsed,
+                'jobs_per_s': self.done / elapsed if elapsed > 0 else 0.0,
+                'latency_p50_ms': None if p50 is None else p50 * 1e3,
+                'latency_p99_ms': None if p99 is None else p99 * 1e3}
+
+
+class JobWorker:
+    """
+    `solve` has the signature of batch.solve_chunk; it is called with (job id, equation) pairs,
+    so the `line` of every record is replaced with the `id` of its job
+    """
+
+    def __init__(self, broker: Broker, workers: int = 1, batch_size: int = 64, max_in_flight: Optional[int] = None,
+                 max_attempts: int = 3, ack_batch_size: int = 256, ack_interval: float = 0.05,
+                 poll_interval: float = 0.05, max_degree: Optional[int] = 2, cache_size: int = 4096,
+                 solve: Callable = solve_chunk) -> None:
+        if workers < 1:
+            raise ValueError('workers должно быть положительным')
+        if batch_size < 1:
+            raise ValueError('batch_size должно быть положительным')
+        if max_attempts < 1:
+            raise ValueError('max_attempts должно быть положительным')
+        self.broker = broker
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_in_flight = 2 * workers if max_in_flight is None else max_in_flight
+        self.max_attempts = max_attempts
+        self.ack_batch_size = ack_batch_size
+        self.ack_interval = ack_interval
+        self.poll_interval = poll_interval
+        self.max_degree = max_degree
+        self.cache_size = cache_size
+        self.solve = solve
+        self.metrics = WorkerMetrics()
+        self.pending: List[Tuple[Job, Record, float]] = []
+        self.executor: Optional[ProcessPoolExecutor] = self.create_executor(workers) if workers > 1 else None
+        # jobs of failed batches are solved one at a time, in a pool of their own so nothing else can break it
+        # (with one worker they are solved in the event loop like the batches)
+        self.quarantine: Optional[ProcessPoolExecutor] = None
+        self.quarantine_lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def create_executor(workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(workers, initializer=limits.configure, initargs=(limits.get_limits(),))
+
+    async def solve_batch(self, executor: Optional[ProcessPoolExecutor], jobs: List[Job]) -> List[Record]:
+        chunk = [(job.id, job.equation) for job in jobs]
+        if executor is None:
+            records, _ = self.solve(chunk, self.max_degree, self.cache_size)
+            return records
+        loop = asyncio.get_running_loop()
+        records, collected = await loop.run_in_executor(executor, self.solve, chunk, self.max_degree,
+                                                        self.cache_size, profiling.stats is not None)
+        if collected is not None and profiling.stats is not None:
+            profiling.stats.merge(collected)
+        return records
+
+    def accept(self, jobs: List[Job], records: List[Record], fetched: float) -> None:
+        for job, record in zip(jobs, records):
+            record = {'id': record.pop('line'), **record}
+            if 'error' in record:
+                self.metrics.count('errors')
+            self.pending.append((job, record, fetched))
+
+    async def process(self, jobs: List[Job], fetched: float) -> None:
+        executor = self.executor
+        try:
+            records = await self.solve_batch(executor, jobs)
+        except Exception as e:
+            # the pool is replaced only by the first batch that finds it broken, not by every batch that was in it
+            if isinstance(e, BrokenProcessPool) and self.executor is executor:
+                executor.shutdown(wait=False)
+                self.executor = self.create_executor(self.workers)
+            await self.isolate(jobs, fetched)
+        else:
+            self.metrics.count('batches')
+            self.accept(jobs, records, fetched)
+        if len(self.pending) >= self.ack_batch_size:
+            await self.flush()
+
+    async def isolate(self, jobs: List[Job], fetched: float) -> None:
+        """
+        Solves the jobs of a failed batch one at a time: only a job that fails alone is charged an attempt
+        """
+        if self.quarantine_lock is None:
+            self.quarantine_lock = asyncio.Lock()
+        self.metrics.count('isolated', len(jobs))
+        for job in jobs:
+            async with self.quarantine_lock:
+                if self.quarantine is None and self.executor is not None:
+                    self.quarantine = self.create_executor(1)
+                try:
+                    records = await self.solve_batch(self.quarantine, [job])
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        self.quarantine.shutdown(wait=False)
+                        self.quarantine = None
+                    failed = await self.broker.nack([job], f'{type(e).__name__}: {e}', self.max_attempts)
+                    self.metrics.count('failed' if failed else 'retried')
+                    continue
+            self.accept([job], records, fetched)
+
+    async def flush(self) -> None:
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        await self.broker.ack([(job, record) for job, record, _ in pending])
+        now = time.perf_counter()
+        self.metrics.latencies.extend(now - fetched for _, _, fetched in pending)
+        self.metrics.count('done', len(pending))
+        self.metrics.count('acks')
+
+    async def flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.ack_interval)
+            await self.flush()
+
+    async def run(self, until_idle: bool = False) -> Dict[str, Any]:
+        """
+        Processes jobs until cancelled or, with `until_idle`, until the broker has no queued jobs
+        and no batch is being solved; returns the metrics (see WorkerMetrics.as_dict)
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
+        tasks: Set[asyncio.Future] = set()
+
+        def finished(task: asyncio.Future) -> None:
+            tasks.discard(task)
+            slots.release()
+
+        flusher = asyncio.ensure_future(self.flush_periodically())
+        try:
+            while True:
+                await slots.acquire()
+                # checked before fetching: a batch that finishes during the fetch may return its jobs to the queue
+                idle = not tasks
+                jobs = await self.broker.fetch(self.batch_size, self.poll_interval)
+                if not jobs:
+                    slots.release()
+                    if until_idle and idle:
+                        break
+                    continue
+                task = asyncio.ensure_future(self.process(jobs, time.perf_counter()))
+                tasks.add(task)
+                task.add_done_callback(finished)
+        finally:
+            flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await flusher
+            await asyncio.gather(*tasks)
+            await self.flush()
+        return self.metrics.as_dict()
+
+    def close(self) -> None:
+        for executor in (self.executor, self.quarantine):
+            if executor is not None:
+                executor.shutdown()
+
+
+async def enqueue(broker: Broker, equations: Iterable[str], batch_size: int = 1024) -> int:
+    count = 0
+    batch: List[str] = []
+    for equation in equations:
+        batch.append(equation)
+        if len(batch) >= batch_size:
+            count += len(await broker.put(batch))
+            batch = []
+    if batch:
+        count += len(await broker.put(batch))
+    return count
+
+
+def enqueue_file(path: str, input_stream: Iterable[str], batch_size: int = 1024) -> int:
+    """
+    Queues the equations of `input_stream` (one per line) as jobs of the SQLite queue at `path`
+    """
+    async def put() -> int:
+        broker = SQLiteBroker(path)
+        try:
+            return await enqueue(broker, (equation for _, equation in read_equations(input_stream)), batch_size)
+        finally:
+            await broker.close()
+
+    return asyncio.run(put())
+
+
+def consume_file(path: str, workers: int = 1, batch_size: int = 64, max_degree: Optional[int] = 2,
+                 cache_size: int = 4096, output=sys.stderr) -> Dict[str, Any]:
+    """
+    Solves the queued jobs of the SQLite queue at `path` until there are none left and writes the metrics
+    of the worker to `output` as one JSON record
+    """
+    async def consume() -> Dict[str, Any]:
+        broker = SQLiteBroker(path)
+        worker = JobWorker(broker, workers, batch_size, max_degree=max_degree, cache_size=cache_size)
+        try:
+            return await worker.run(until_idle=True)
+        finally:
+            worker.close()
+            await broker.close()
+
+    metrics = asyncio.run(consume())
+    print(json.dumps(metrics), file=output)
+    return metrics
@@ -0,0 +1,153 @@
+"""
+Resource limits of one equation, so that an adversarial input is rejected instead of stalling a worker.
+
+The parser, the polynomial arithmetic, the solvers and the symbol table charge their work to the active Budget
+(`budget`, None outside of guard()) the same way they count into profiling.stats: one operation per literal,
+operator or expression node, len(left) * len(right) per product of polynomials, degree^2 per Aberth iteration.
+guard() starts a budget for one equation with the limits of the process (see configure) unless others are given;
+a guard inside another one reuses its budget, so the deadline of an equation covers both parsing and solving.
+Exceeding any limit raises LimitExceeded: a ValueError (invalid equations are reported the same way)
+whose type and `limit` (the name of the field of Limits) tell it apart from a malformed equation
+"""
+import math
+import time
+from typing import NamedTuple, Optional
+
+
+class Limits(NamedTuple):
+    """
+    max_length: characters of an equation
+    max_terms: tokens of an equation
+    max_exponent: magnitude of a degree of X, of the exponent of a polynomial raised to a power
+                  and of the exponent of a constant power other than 0 and ±1 (a non-finite one is always rejected)
+    max_depth: nesting of parentheses and of function calls
+    max_operations: work of one equation, see the module docstring
+    deadline: wall-clock seconds of one equation, None for no deadline
+    """
+    max_length: int = 1 << 22
+    max_terms: int = 1 << 20
+    max_exponent: float = 1 << 16
+    max_depth: int = 1 << 10
+    max_operations: int = 1 << 22
+    deadline: Optional[float] = None
+
+
+class LimitExceeded(ValueError):
+    def __init__(self, limit: str, value, maximum) -> None:
+        super().__init__(f'Превышен лимит {limit}: {value} > {maximum}')
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+
+    def __reduce__(self):
+        return LimitExceeded, (self.limit, self.value, self.maximum)
+
+
+class Budget:
+    """
+    What one equation has used of its Limits
+    """
+    __slots__ = ('limits', 'operations', 'terms', 'deadline_at')
+
+    def __init__(self, limits: Limits) -> None:
+        self.limits = limits
+        self.operations = 0
+        self.terms = 0
+        self.deadline_at = None if limits.deadline is None else time.perf_counter() + limits.deadline
+
+    def check_length(self, text: str) -> None:
+        if len(text) > self.limits.max_length:
+            raise LimitExceeded('max_length', len(text), self.limits.max_length)
+
+    def add_terms(self, count: int) -> None:
+        self.terms += count
+        if self.terms > self.limits.max_terms:
+            raise LimitExceeded('max_terms', self.terms, self.limits.max_terms)
+
+    def check_exponent(self, value) -> None:
+        check_exponent(value, self.limits.max_exponent)
+
+    def check_depth(self, depth: int) -> None:
+        if depth > self.limits.max_depth:
+            raise LimitExceeded('max_depth', depth, self.limits.max_depth)
+
+    def charge(self, operations: int = 1) -> None:
+        self.operations += operations
+        if self.operations > self.limits.max_operations:
+            raise LimitExceeded('max_operations', self.operations, self.limits.max_operations)
+        if self.deadline_at is not None:
+            now = time.perf_counter()
+            if now > self.deadline_at:
+                raise LimitExceeded('deadline', f'{now - self.deadline_at + self.limits.deadline:g} с',
+                                    f'{self.limits.deadline:g} с')
+
+
+DEFAULT_LIMITS = Limits()
+
+_limits: Limits = DEFAULT_LIMITS
+budget: Optional[Budget] = None
+
+
+def configure(limits: Optional[Limits] = None) -> None:
+    """
+    Sets the limits of the equations of this process (the defaults if None);
+    it is also the initializer of the worker processes, see batch.solve_equations_parallel
+    """
+    global _limits
+    _limits = DEFAULT_LIMITS if limits is None else limits
+
+
+def get_limits() -> Limits:
+    return _limits
+
+
+def get_active_limits() -> Limits:
+    """
+    The limits of the active budget, or of the process outside of guard()
+    """
+    return _limits if budget is None else budget.limits
+
+
+class Guard:
+    """
+    Runs one equation under a budget of the process limits (or of `limits`);
+    the budget of an enclosing guard is reused unless other `limits` are given
+    """
+    __slots__ = ('limits', 'previous')
+
+    def __init__(self, limits: Optional[Limits] = None) -> None:
+        self.limits = limits
+        self.previous: Optional[Budget] = None
+
+    def __enter__(self) -> Budget:
+        global budget
+        self.previous = budget
+        if budget is None or self.limits is not None:
+            budget = Budget(_limits if self.limits is None else self.limits)
+        return budget
+
+    def __exit__(self, *exc_info) -> None:
+        global budget
+        budget = self.previous
+
+
+def check_exponent(value, maximum: Optional[float] = None) -> None:
+    """
+    Raises LimitExceeded if the exponent `value` is not finite or its magnitude exceeds `maximum`
+    (max_exponent of the active budget, or of the process outside of guard(), by default)
+    """
+    if maximum is None:
+        maximum = get_active_limits().max_exponent
+    try:
+        magnitude = abs(float(value))
+    except OverflowError:
+        magnitude = math.inf
+    if not magnitude <= maximum:
+        raise LimitExceeded('max_exponent', value if isinstance(value, float) else f'{magnitude:g}', maximum)
+
+
+def guard(limits: Optional[Limits] = None) -> Guard:
+    """
+    `with guard():` around everything one equation does
+    """
+    return Guard(limits)
@@ -0,0 +1,162 @@
+"""
+Batch input read from a memory-mapped file instead of a text stream.
+
+The file is not read into Python strings: newlines are found with `mmap.find` directly in the mapping
+and only the stripped bytes of every non-empty line are decoded for the parser.
+With several workers the file is split into byte ranges that end at newlines, every worker maps the file itself
+and solves its own range, so only the offsets are sent to the worker processes
+"""
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from src import limits, profiling
+from src.batch import Solver, get_process_cache, solve_chunk, solve_equations, write_records
+
+# bytes of the file solved by one worker task
+RANGE_SIZE = 1 << 22
+NEWLINE = b'\n'
+# bytes.strip() without arguments strips exactly these
+WHITESPACE = frozenset(b' \t\n\r\x0b\x0c')
+
+Buffer = Union[mmap.mmap, bytes]
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[Buffer]:
+    """
+    Read-only mapping of the whole file (an empty file, which cannot be mapped, is an empty bytes object)
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield data
+        finally:
+            data.close()
+
+
+class MappedLines:
+    """
+    Iterates over (line number, equation) of the lines in data[start:end] like batch.read_equations;
+    line numbers start from 1 at `start`. After the iteration `lines` is the number of lines in the range
+    """
+    __slots__ = ('data', 'start', 'end', 'lines')
+
+    def __init__(self, data: Buffer, start: int = 0, end: Optional[int] = None) -> None:
+        self.data = data
+        self.start = start
+        self.end = len(data) if end is None else end
+        self.lines = 0
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        data, position, end = self.data, self.start, self.end
+        view = memoryview(data)
+        try:
+            line_number = 0
+            while position < end:
+                newline = data.find(NEWLINE, position, end)
+                line_end = end if newline < 0 else newline
+                line_number += 1
+                while position < line_end and data[position] in WHITESPACE:
+                    position += 1
+                stripped_end = line_end
+                while stripped_end > position and data[stripped_end - 1] in WHITESPACE:
+                    stripped_end -= 1
+                if position < stripped_end:
+                    yield line_number, str(view[position:stripped_end], 'utf-8', 'replace')
+                position = line_end + 1
+            self.lines = line_number
+        finally:
+            view.release()
+
+
+def split_ranges(data: Buffer, range_size: int = RANGE_SIZE) -> List[Tuple[int, int]]:
+    """
+    Consecutive (start, end) byte ranges of about `range_size` bytes covering `data`, every range but the last
+    ends right after a newline
+    """
+    if range_size < 1:
+        raise ValueError('range_size должно быть положительным')
+    ranges = []
+    start, size = 0, len(data)
+    while start < size:
+        if start + range_size >= size:
+            end = size
+        else:
+            newline = data.find(NEWLINE, start + range_size - 1)
+            end = size if newline < 0 else newline + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def solve_range(path: str, start: int, end: int, max_degree: Optional[int] = 2, cache_size: int = 0,
+                collect_stats: bool = False,
+                solver: Solver = solve_equations) -> Tuple[List[Any], int, Optional[Dict[str, Any]]]:
+    """
+    Runs in a worker process: maps the file and solves data[start:end] with line numbers relative to `start`,
+    also returns the number of lines in the range
+    """
+    with map_file(path) as data:
+        lines = MappedLines(data, start, end)
+        results, collected = solve_chunk(lines, max_degree, cache_size, collect_stats, solver)
+    return results, lines.lines, collected
+
+
+def shift_line(result: Any, first_line: int) -> Any:
+    if isinstance(result, dict):
+        result['line'] += first_line
+        return result
+    line_number, solution = result
+    return line_number + first_line, solution
+
+
+def collect_range(future: Future, first_line: int) -> Tuple[List[Any], int]:
+    results, lines, collected = future.result()
+    if collected is not None and profiling.stats is not None:
+        profiling.stats.merge(collected)
+    return [shift_line(result, first_line) for result in results], lines
+
+
+def solve_file(path: str, workers: int = 1, range_size: int = RANGE_SIZE, max_in_flight: Optional[int] = None,
+               max_degree: Optional[int] = 2, cache_size: int = 0, solver: Solver = solve_equations) -> Iterator[Any]:
+    """
+    What batch.solve_equations_parallel yields for the lines of the file at `path` (records by default,
+    (line number, Solution) pairs with batch.solve_solutions), in the same order
+    """
+    if workers < 1:
+        raise ValueError('workers должно быть положительным')
+    with map_file(path) as data:
+        if workers == 1:
+            yield from solver(MappedLines(data), max_degree, get_process_cache(cache_size))
+            return
+        ranges = split_ranges(data, range_size)
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+    collect_stats = profiling.stats is not None
+    with ProcessPoolExecutor(max_workers=workers, initializer=limits.configure,
+                             initargs=(limits.get_limits(),)) as executor:
+        in_flight: Deque[Future] = deque()
+        first_line = 0
+        for start, end in ranges:
+            in_flight.append(executor.submit(solve_range, path, start, end, max_degree, cache_size, collect_stats,
+                                             solver))
+            if len(in_flight) >= max_in_flight:
+                records, lines = collect_range(in_flight.popleft(), first_line)
+                first_line += lines
+                yield from records
+        while in_flight:
+            records, lines = collect_range(in_flight.popleft(), first_line)
+            first_line += lines
+            yield from records
+
+
+def run_file_batch(path: str, output: TextIO, workers: int = 1, range_size: int = RANGE_SIZE,
+                   max_degree: Optional[int] = 2, cache_size: int = 0) -> int:
+    return write_records(solve_file(path, workers, range_size, max_degree=max_degree, cache_size=cache_size), output)
@@ -0,0 +1,129 @@
+"""
+Bounded-iteration kernels for powers, roots, exponents and logarithms of positive floats.
+Only math.frexp and math.ldexp are used: they split a float into its mantissa and exponent without rounding
+"""
+from math import frexp, ldexp
+
+INFINITY = float('inf')
+LN2_HIGH = 6.93147180369123816490e-01
+LN2_LOW = 1.90821492927058770002e-10
+LN2 = LN2_HIGH + LN2_LOW
+INVERSE_LN2 = 1.44269504088896338700e+00
+SQRT_HALF = 0.7071067811865476
+# exp overflows above log(max float) and underflows to 0 below log(min subnormal float)
+EXP_MAX = 709.782712893384
+EXP_MIN = -745.1332191019412
+# |x| <= ln(2)/2 after the range reduction, 0.35^14/14! < 2^-53
+EXP_TERMS = 14
+# |s| <= (sqrt(2) - 1)/(sqrt(2) + 1) after the range reduction, 0.1716^(2*12)/(2*12+1) < 2^-53
+LOG_TERMS = 12
+# the linear seed has a relative error below 2^-5, every Newton step squares it
+SQRT_ITERATIONS = 4
+# integer powers up to this exponent are computed by squaring, at most 2*53 multiplications
+MAX_INTEGER_EXPONENT = 2 ** 53
+
+
+def int_power(num: float, exponent: int) -> float:
+    if exponent < 0:
+        result = int_power(num, -exponent)
+        if result == INFINITY:
+            return int_power(1.0 / num, -exponent)
+        return 1.0 / result if result else INFINITY
+    result = 1.0
+    while exponent:
+        if exponent & 1:
+            result *= num
+        exponent >>= 1
+        if exponent:
+            num *= num
+    return result
+
+
+def exp(num: float) -> float:
+    if num != num:
+        return num
+    if num > EXP_MAX:
+        return INFINITY
+    if num < EXP_MIN:
+        return 0.0
+    k = int(num * INVERSE_LN2 + (0.5 if num >= 0 else -0.5))
+    reduced = (num - k * LN2_HIGH) - k * LN2_LOW
+    term = 1.0
+    result = 1.0
+    for i in range(1, EXP_TERMS):
+        term *= reduced / i
+        result += term
+    try:
+        return ldexp(result, k)
+    except OverflowError:
+        return INFINITY
+
+
+def log(num: float) -> float:
+    if num <= 0.0:
+        raise ValueError('log принимает только положительные значения')
+    if num == INFINITY or num != num:
+        return num
+    mantissa, exponent = frexp(num)
+    if mantissa < SQRT_HALF:
+        mantissa *= 2.0
+        exponent -= 1
+    s = (mantissa - 1.0) / (mantissa + 1.0)
+    s_square = s * s
+    series = 0.0
+    for i in range(LOG_TERMS, 0, -1):
+        series = series * s_square + 1.0 / (2 * i - 1)
+    return exponent * LN2_HIGH + (exponent * LN2_LOW + 2.0 * s * series)
+
+
+def sqrt(num: float) -> float:
+    if num < 0.0:
+        raise ValueError('sqrt принимает только положительные значения')
+    if num == 0.0 or num == INFINITY or num != num:
+        return num
+    mantissa, exponent = frexp(num)
+    if exponent & 1:
+        mantissa *= 2.0
+        exponent -= 1
+    guess = 0.41731 + 0.59016 * mantissa
+    for _ in range(SQRT_ITERATIONS):
+        guess = 0.5 * (guess + mantissa / guess)
+    return ldexp(guess, exponent // 2)
+
+
+def int_sqrt(num: int) -> int:
+    """
+    floor(sqrt(num)) of a non-negative int of any size, by Newton's method on ints
+    """
+    if num < 0:
+        raise ValueError('sqrt принимает только положительные значения')
+    if num < 2:
+        return num
+    guess = 1 << (num.bit_length() + 1) // 2
+    while True:
+        better = (guess + num // guess) // 2
+        if better >= guess:
+            return guess
+        guess = better
+
+
+def power(num: float, degree: float) -> float:
+    """
+    num^degree for num > 0: the integer part of the degree is raised by squaring,
+    the fractional part goes through exp(fraction * log(num))
+    """
+    if degree != degree or num != num:
+        return degree + num
+    if abs(degree) >= MAX_INTEGER_EXPONENT:
+        return exp(degree * log(num))
+    integer_part = int(degree)
+    fraction = degree - integer_part
+    result = int_power(num, integer_part)
+    if fraction:
+        if fraction == 0.5:
+            result *= sqrt(num)
+        elif fraction == -0.5:
+            result /= sqrt(num)
+        else:
+            result *= exp(fraction * log(num))
+    return result
@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from src import polynomial_arithmetic
+from src.equation_parser import EquationParser, format_reduced_form
+from src.equation_solver import EquationSolver
+from src.evaluator import CompiledPolynomial
+from src.utils import is_zero
+
+
+class Polynomial:
+    """
+    Left part of `... = 0` edited term by term without building and parsing an equation string.
+    Only non-zero terms are stored in `multipliers` (the same map as EquationParser.multipliers),
+    so adding, removing and scaling a term is O(1). The degree and the reduced form are recomputed lazily
+    and only after the leading term or the coefficients change; `solve` reuses the previous solutions
+    while the coefficients stay the same.
+    Polynomials can be added, subtracted, multiplied, raised to a non-negative integer power and divided with
+    a remainder (divmod) without printing and parsing them again, see polynomial_arithmetic
+    """
+
+    def __init__(self, multipliers: Optional[Dict[float, Any]] = None, max_degree: Optional[int] = 2) -> None:
+        self.max_degree = max_degree
+        self.multipliers: Dict[float, Any] = {}
+        self.version = 0
+        self._degree: Optional[int] = 0
+        self._reduced_form: Optional[str] = None
+        self._solutions: Optional[List[Any]] = None
+        self._solved_version = -1
+        self._compiled: Optional[CompiledPolynomial] = None
+        self._compiled_version = -1
+        for degree, value in (multipliers or {}).items():
+            self.set_term(degree, value)
+
+    @classmethod
+    def from_equation(cls, equation: str, max_degree: Optional[int] = 2, exact: bool = False) -> 'Polynomial':
+        equation_parser: EquationParser = EquationParser(equation, False, max_degree, exact)
+        equation_parser.parse_equation()
+        return cls(equation_parser.multipliers, max_degree)
+
+    def check_degree(self, degree: float) -> float:
+        if degree < 0 or degree != int(degree) or (self.max_degree is not None and degree > self.max_degree):
+            raise ValueError(f'Некорректная степень {degree}')
+        return float(degree)
+
+    def get_term(self, degree: float) -> Any:
+        return self.multipliers.get(degree, 0.0)
+
+    def set_term(self, degree: float, value: Any) -> None:
+        degree = self.check_degree(degree)
+        old_value = self.multipliers.get(degree)
+        if is_zero(value):
+            if old_value is None:
+                return
+            del self.multipliers[degree]
+            if degree == self._degree:
+                self._degree = None
+        else:
+            if old_value is not None and old_value == value:
+                return
+            self.multipliers[degree] = value
+            if self._degree is not None and degree > self._degree:
+                self._degree = int(degree)
+        self.version += 1
+        self._reduced_form = None
+
+    def add_term(self, degree: float, value: Any) -> None:
+        self.set_term(degree, self.get_term(degree) + value)
+
+    def remove_term(self, degree: float) -> None:
+        self.set_term(degree, 0.0)
+
+    def scale_term(self, degree: float, factor: Any) -> None:
+        self.set_term(degree, self.get_term(degree) * factor)
+
+    @property
+    def degree(self) -> int:
+        if self._degree is None:
+            self._degree = int(max(self.multipliers, default=0))
+        return self._degree
+
+    @property
+    def reduced_form(self) -> str:
+        if self._reduced_form is None:
+            self._reduced_form = format_reduced_form(self.multipliers)
+        return self._reduced_form
+
+    def solve(self) -> List[Any]:
+        """
+        Solutions in the format of EquationSolver.solve_equation, computed again only if a term changed since
+        the previous call
+        """
+        if self._solved_version != self.version:
+            self._solutions = EquationSolver(self.multipliers, False).solve().legacy_roots()
+            self._solved_version = self.version
+        return list(self._solutions)
+
+    def compile(self) -> CompiledPolynomial:
+        """
+        Horner-form evaluator of the left part (see evaluator), compiled again only if a term changed
+        """
+        if self._compiled_version != self.version:
+            self._compiled = CompiledPolynomial(self.multipliers)
+            self._compiled_version = self.version
+        return self._compiled
+
+    def combine_max_degree(self, other: 'Polynomial') -> Optional[int]:
+        if self.max_degree is None or other.max_degree is None:
+            return None
+        return max(self.max_degree, other.max_degree)
+
+    def __add__(self, other: 'Polynomial') -> 'Polynomial':
+        return Polynomial(polynomial_arithmetic.add(self.multipliers, other.multipliers),
+                          self.combine_max_degree(other))
+
+    def __sub__(self, other: 'Polynomial') -> 'Polynomial':
+        return Polynomial(polynomial_arithmetic.add(self.multipliers, other.multipliers, -1),
+                          self.combine_max_degree(other))
+
+    def __mul__(self, other: 'Polynomial') -> 'Polynomial':
+        """
+        The result may have any degree (its `max_degree` is None)
+        """
+        return Polynomial(polynomial_arithmetic.multiply(self.multipliers, other.multipliers), None)
+
+    def __pow__(self, exponent: int) -> 'Polynomial':
+        return Polynomial(polynomial_arithmetic.power(self.multipliers, exponent), None)
+
+    def __divmod__(self, other: 'Polynomial') -> Tuple['Polynomial', 'Polynomial']:
+        quotient, remainder = polynomial_arithmetic.divide(self.multipliers, other.multipliers)
+        return Polynomial(quotient, self.max_degree), Polynomial(remainder, self.max_degree)
+
+    def __str__(self) -> str:
+        return self.reduced_form
@@ -0,0 +1,224 @@
+"""
+Arithmetic of sparse polynomials: maps of the degree of X to a non-zero multiplier (the same maps as
+EquationParser.multipliers). The multipliers may be floats or RationalNumber values, the result keeps their type.
+
+Products of two polynomials with at least KARATSUBA_THRESHOLD terms and non-negative integer degrees are computed
+on dense coefficient lists with Karatsuba's algorithm, smaller or sparser ones term by term
+
+Products, powers and divisions charge their work to the budget of the equation, see limits
+"""
+from typing import Any, Dict, List, Tuple
+
+from src import limits
+from src.types.rational_number import RationalNumber
+from src.utils import is_zero, pow
+
+Sparse = Dict[float, Any]
+
+KARATSUBA_THRESHOLD = 32
+# below this length the halves of a Karatsuba product are multiplied with the schoolbook algorithm
+KARATSUBA_CUTOFF = 16
+# a Karatsuba product of two polynomials of degree n takes about n^log2(3) multiplications
+KARATSUBA_EXPONENT = 1.585
+
+
+def constant(value: Any) -> Sparse:
+    return {} if is_zero(value) else {0.0: value}
+
+
+def is_constant(polynomial: Sparse) -> bool:
+    return all(degree == 0 for degree in polynomial)
+
+
+def constant_value(polynomial: Sparse, zero: Any = 0.0) -> Any:
+    return polynomial.get(0.0, zero)
+
+
+def is_dense(polynomial: Sparse) -> bool:
+    return all(degree >= 0 and degree == int(degree) for degree in polynomial)
+
+
+def zero_of(*polynomials: Sparse) -> Any:
+    for polynomial in polynomials:
+        for value in polynomial.values():
+            return value * 0
+    return 0.0
+
+
+def add(left: Sparse, right: Sparse, sign: int = 1) -> Sparse:
+    """
+    left + sign * right
+    """
+    result = dict(left)
+    for degree, value in right.items():
+        value = result[degree] + value * sign if degree in result else value * sign
+        if is_zero(value):
+            result.pop(degree, None)
+        else:
+            result[degree] = value
+    return result
+
+
+def scale(polynomial: Sparse, factor: Any, shift: float = 0.0) -> Sparse:
+    """
+    factor * X^shift * polynomial
+    """
+    result = {}
+    for degree, value in polynomial.items():
+        value *= factor
+        if not is_zero(value):
+            result[degree + shift] = value
+    return result
+
+
+def to_dense(polynomial: Sparse, zero: Any) -> List[Any]:
+    coefficients = [zero] * (int(max(polynomial, default=-1)) + 1)
+    for degree, value in polynomial.items():
+        coefficients[int(degree)] = value
+    return coefficients
+
+
+def from_dense(coefficients: List[Any]) -> Sparse:
+    return {float(degree): value for degree, value in enumerate(coefficients) if not is_zero(value)}
+
+
+def schoolbook(left: List[Any], right: List[Any], zero: Any) -> List[Any]:
+    if not left or not right:
+        return []
+    result = [zero] * (len(left) + len(right) - 1)
+    for i, a in enumerate(left):
+        for j, b in enumerate(right):
+            result[i + j] += a * b
+    return result
+
+
+def add_dense(left: List[Any], right: List[Any]) -> List[Any]:
+    if len(left) < len(right):
+        left, right = right, left
+    result = list(left)
+    for i, value in enumerate(right):
+        result[i] += value
+    return result
+
+
+def karatsuba(left: List[Any], right: List[Any], zero: Any) -> List[Any]:
+    """
+    Dense product: with a = a0 + a1 * X^m and b = b0 + b1 * X^m, a * b needs only the three products
+    a0 * b0, a1 * b1 and (a0 + a1) * (b0 + b1) instead of four
+    """
+    if min(len(left), len(right)) <= KARATSUBA_CUTOFF:
+        return schoolbook(left, right, zero)
+    middle = max(len(left), len(right)) // 2
+    left_low, left_high = left[:middle], left[middle:]
+    right_low, right_high = right[:middle], right[middle:]
+    low = karatsuba(left_low, right_low, zero)
+    high = karatsuba(left_high, right_high, zero)
+    mixed = karatsuba(add_dense(left_low, left_high), add_dense(right_low, right_high), zero)
+    result = [zero] * (len(left) + len(right) - 1)
+    for i, value in enumerate(low):
+        result[i] += value
+        mixed[i] -= value
+    for i, value in enumerate(high):
+        result[i + 2 * middle] += value
+        mixed[i] -= value
+    for i, value in enumerate(mixed):
+        if i + middle < len(result):
+            result[i + middle] += value
+    return result
+
+
+def multiply(left: Sparse, right: Sparse) -> Sparse:
+    if not left or not right:
+        return {}
+    if len(right) == 1:
+        (degree, value), = right.items()
+        return scale(left, value, degree)
+    if len(left) == 1:
+        (degree, value), = left.items()
+        return scale(right, value, degree)
+    zero = zero_of(left, right)
+    if min(len(left), len(right)) >= KARATSUBA_THRESHOLD and is_dense(left) and is_dense(right):
+        if limits.budget is not None:
+            limits.budget.charge(int(max(max(left), max(right)) ** KARATSUBA_EXPONENT))
+        return from_dense(karatsuba(to_dense(left, zero), to_dense(right, zero), zero))
+    if limits.budget is not None:
+        limits.budget.charge(len(left) * len(right))
+    result: Sparse = {}
+    for left_degree, left_value in left.items():
+        for right_degree, right_value in right.items():
+            degree = left_degree + right_degree
+            result[degree] = result.get(degree, zero) + left_value * right_value
+    return {degree: value for degree, value in result.items() if not is_zero(value)}
+
+
+def power(polynomial: Sparse, exponent: int) -> Sparse:
+    """
+    polynomial ^ exponent for a non-negative integer exponent, by repeated squaring
+    """
+    if exponent < 0 or exponent != int(exponent):
+        raise ValueError('Уравнение некорректно (многочлен можно возводить только в целую неотрицательную степень)')
+    if limits.budget is not None:
+        limits.budget.check_exponent(exponent)
+    exponent = int(exponent)
+    result = constant(zero_of(polynomial) + 1)
+    base = polynomial
+    while exponent:
+        if exponent & 1:
+            result = multiply(result, base)
+        exponent >>= 1
+        if exponent:
+            base = multiply(base, base)
+    return result
+
+
+def raise_power(base: Sparse, exponent: Sparse, exact: bool = False) -> Sparse:
+    """
+    base ^ exponent for a constant exponent: a constant base is raised to any power (with floats unless `exact`),
+    X itself to any power (a non-integer degree is rejected later, like X^0.5 of EquationParser),
+    other polynomials only to non-negative integer powers
+    """
+    if not is_constant(exponent):
+        raise ValueError("X не может быть в степени, X может быть только возводиться в степень")
+    zero = RationalNumber(0) if exact else 0.0
+    value = constant_value(exponent, zero)
+    if is_constant(base):
+        number = constant_value(base, zero)
+        if exact:
+            return constant(number ** value)
+        return constant(float(pow(number, value)))
+    if len(base) == 1 and base.get(1.0) == 1:
+        if limits.budget is not None:
+            limits.budget.check_exponent(value)
+        return {float(value): base[1.0]}
+    return power(base, value)
+
+
+def divide(numerator: Sparse, denominator: Sparse) -> Tuple[Sparse, Sparse]:
+    """
+    Long division: (quotient, remainder) with numerator = quotient * denominator + remainder and the degree of
+    the remainder less than the degree of the denominator. Division by a single term is exact for any degrees
+    """
+    if not denominator:
+        raise ZeroDivisionError('Уравнение некорректно (есть деление на 0)')
+    if len(denominator) == 1:
+        (degree, value), = denominator.items()
+        return {key - degree: coefficient / value for key, coefficient in numerator.items()}, {}
+    if not is_dense(numerator) or not is_dense(denominator):
+        raise ValueError('Уравнение некорректно (делить на многочлен можно только многочлен с целыми степенями)')
+    if limits.budget is not None:
+        limits.budget.check_exponent(max(numerator, default=0.0))
+    zero = zero_of(numerator, denominator)
+    remainder = to_dense(numerator, zero)
+    divisor = to_dense(denominator, zero)
+    leading = divisor[-1]
+    quotient = [zero] * max(len(remainder) - len(divisor) + 1, 0)
+    if limits.budget is not None:
+        limits.budget.charge(len(quotient) * len(divisor))
+    for shift in range(len(quotient) - 1, -1, -1):
+        factor = remainder[shift + len(divisor) - 1] / leading
+        quotient[shift] = factor
+        if is_zero(factor):
+            continue
+        for i, value in enumerate(divisor):
+            remainder[shift + i] -= factor * value
+    return from_dense(quotient), from_dense(remainder[:len(divisor) - 1])
@@ -0,0 +1,223 @@
+from typing import Dict, List
+
+from src import limits
+from src.types.complex_number import ComplexNumber
+from src.utils import compare_floats_with_epsilon
+
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-14
+POLISH_ITERATIONS = 3
+# |p(z)| below this share of sum(|a_i| * |z|^i) is indistinguishable from the rounding error of Horner's scheme
+ROUNDING_ERROR = 8 * 2.220446049250313e-16
+
+
+def evaluate(coefficients: List[complex], x: complex) -> complex:
+    """
+    Horner's scheme, `coefficients[i]` is the multiplier of X^i
+    """
+    result = 0j
+    for coefficient in reversed(coefficients):
+        result = result * x + coefficient
+    return result
+
+
+def evaluate_with_derivative(coefficients: List[complex], x: complex):
+    value = 0j
+    derivative = 0j
+    for coefficient in reversed(coefficients):
+        derivative = derivative * x + value
+        value = value * x + coefficient
+    return value, derivative
+
+
+def cube_root(value: complex) -> complex:
+    if value == 0:
+        return 0j
+    if value.imag == 0.0 and value.real < 0.0:
+        return -((-value.real) ** (1 / 3)) + 0j
+    return value ** (1 / 3)
+
+
+class PolynomialSolver:
+    """
+    Finds all complex roots of a polynomial of any degree:
+    - degrees 1 and 2: direct formulas
+    - degree 3: Cardano's formula
+    - degree 4: Ferrari's method on top of the cubic resolvent
+    - degree 5 and more: Aberth–Ehrlich simultaneous iteration; every iteration costs O(degree^2),
+      at most `max_iterations` iterations are made; a root stops moving as soon as its correction
+      is smaller than `tolerance` relative to the root or the value of the polynomial at it is within
+      the rounding error of its evaluation; every iteration is charged to the budget of the equation (see limits)
+
+    Closed-form roots are refined with POLISH_ITERATIONS steps of Newton's method
+    """
+
+    def __init__(self, multipliers: Dict[float, float], max_iterations: int = MAX_ITERATIONS,
+                 tolerance: float = TOLERANCE) -> None:
+        degree = int(max(multipliers.keys(), default=0))
+        if limits.budget is not None:
+            limits.budget.check_exponent(degree)
+        coefficients = [float(multipliers.get(i, 0.0)) for i in range(degree + 1)]
+        while len(coefficients) > 1 and compare_floats_with_epsilon(coefficients[-1], 0.0):
+            coefficients.pop()
+        self.coefficients: List[float] = coefficients
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.iterations = 0
+
+    @property
+    def degree(self) -> int:
+        return len(self.coefficients) - 1
+
+    def solve(self) -> List[ComplexNumber]:
+        """
+        Returns the roots with their multiplicity, sorted by the real and then by the imaginary part.
+        A polynomial of degree 0 has no roots (every X is a solution if its only coefficient is 0)
+        """
+        if self.degree == 0:
+            return []
+        leading = self.coefficients[-1]
+        monic = [coefficient / leading for coefficient in self.coefficients]
+        if self.degree == 1:
+            roots = [complex(-monic[0])]
+        elif self.degree == 2:
+            roots = self.solve_quadratic(monic[1], monic[0])
+        elif self.degree == 3:
+            roots = self.polish(monic, self.solve_cubic(monic[2], monic[1], monic[0]))
+        elif self.degree == 4:
+            roots = self.polish(monic, self.solve_quartic(monic[3], monic[2], monic[1], monic[0]))
+        else:
+            roots = self.solve_aberth(monic)
+        roots = [self.clean(root) for root in roots]
+        roots.sort(key=lambda root: (root.real, root.imag))
+        return [ComplexNumber(root.real, root.imag) for root in roots]
+
+    def clean(self, root: complex) -> complex:
+        real, imaginary = root.real, root.imag
+        scale = max(1.0, abs(root))
+        if abs(imaginary) < 1e3 * self.tolerance * scale:
+            imaginary = 0.0
+        if abs(real) < 1e3 * self.tolerance * scale:
+            real = 0.0
+        return complex(real, imaginary)
+
+    @staticmethod
+    def solve_quadratic(b: complex, c: complex) -> List[complex]:
+        """
+        Roots of X^2 + b*X + c without the cancellation of -b ± sqrt(D)
+        """
+        discriminant_sqrt = (b * b - 4 * c) ** 0.5
+        if (b.conjugate() * discriminant_sqrt).real < 0:
+            discriminant_sqrt = -discriminant_sqrt
+        q = -(b + discriminant_sqrt) / 2
+        if q == 0:
+            return [0j, 0j]
+        return [q, c / q]
+
+    @staticmethod
+    def solve_cubic(b: complex, c: complex, d: complex) -> List[complex]:
+        """
+        Roots of X^3 + b*X^2 + c*X + d via the depressed cubic t^3 + p*t + q, X = t - b/3
+        """
+        shift = b / 3
+        p = c - b * shift
+        q = 2 * shift * shift * shift - shift * c + d
+        discriminant_sqrt = (q * q / 4 + p * p * p / 27) ** 0.5
+        u_cube = -q / 2 + discriminant_sqrt
+        if abs(-q / 2 - discriminant_sqrt) > abs(u_cube):
+            u_cube = -q / 2 - discriminant_sqrt
+        u = cube_root(u_cube)
+        if u == 0:
+            return [-shift, -shift, -shift]
+        rotation = complex(-0.5, 3 ** 0.5 / 2)
+        roots = []
+        for _ in range(3):
+            roots.append(u - p / (3 * u) - shift)
+            u *= rotation
+        return roots
+
+    @classmethod
+    def solve_quartic(cls, b: complex, c: complex, d: complex, e: complex) -> List[complex]:
+        """
+        Roots of X^4 + b*X^3 + c*X^2 + d*X + e via the depressed quartic y^4 + p*y^2 + q*y + r, X = y - b/4
+        """
+        shift = b / 4
+        shift_square = shift * shift
+        p = c - 6 * shift_square
+        q = d - 2 * c * shift + 8 * shift_square * shift
+        r = e - d * shift + c * shift_square - 3 * shift_square * shift_square
+        if abs(q) < TOLERANCE * max(1.0, abs(p), abs(r)):
+            roots = []
+            for y_square in cls.solve_quadratic(p, r):
+                y = y_square ** 0.5
+                roots.extend([y - shift, -y - shift])
+            return roots
+        m = max(cls.solve_cubic(p, p * p / 4 - r, -q * q / 8), key=abs)
+        m_sqrt = (2 * m) ** 0.5
+        roots = []
+        for sign in (1, -1):
+            radical = (-(2 * p + 2 * m + sign * 2 * q / m_sqrt)) ** 0.5
+            roots.append((sign * m_sqrt + radical) / 2 - shift)
+            roots.append((sign * m_sqrt - radical) / 2 - shift)
+        return roots
+
+    def polish(self, coefficients: List[complex], roots: List[complex]) -> List[complex]:
+        polished = []
+        for root in roots:
+            for _ in range(POLISH_ITERATIONS):
+                value, derivative = evaluate_with_derivative(coefficients, root)
+                if derivative == 0:
+                    break
+                step = value / derivative
+                candidate = root - step
+                if abs(evaluate(coefficients, candidate)) > abs(value):
+                    break
+                root = candidate
+            polished.append(root)
+        return polished
+
+    def solve_aberth(self, coefficients: List[complex]) -> List[complex]:
+        """
+        Initial approximations are spread over a circle around the centroid of the roots
+        whose radius is the largest |a_i|^(1/(n-i)) of the monic polynomial
+        """
+        degree = len(coefficients) - 1
+        center = -coefficients[degree - 1] / degree
+        radius = max(abs(coefficients[i]) ** (1 / (degree - i)) for i in range(degree))
+        if radius == 0:
+            return [0j] * degree
+        rotation = 1j ** (4 / degree)
+        point = radius * 1j ** (1 / degree)
+        roots = []
+        for _ in range(degree):
+            roots.append(center + point)
+            point *= rotation
+        absolute_coefficients = [abs(coefficient) for coefficient in coefficients]
+        converged = [False] * degree
+        self.iterations = 0
+        budget = limits.budget
+        while not all(converged) and self.iterations < self.max_iterations:
+            self.iterations += 1
+            if budget is not None:
+                budget.charge(degree * degree)
+            for k in range(degree):
+                if converged[k]:
+                    continue
+                root = roots[k]
+                value, derivative = evaluate_with_derivative(coefficients, root)
+                if abs(value) <= ROUNDING_ERROR * evaluate(absolute_coefficients, abs(root)).real:
+                    converged[k] = True
+                    continue
+                ratio = value / derivative if derivative != 0 else value
+                repulsion = 0j
+                for j in range(degree):
+                    if j != k:
+                        difference = root - roots[j]
+                        if difference != 0:
+                            repulsion += 1 / difference
+                denominator = 1 - ratio * repulsion
+                correction = ratio / denominator if denominator != 0 else ratio
+                roots[k] = root - correction
+                if abs(correction) <= self.tolerance * max(1.0, abs(root)):
+                    converged[k] = True
+        return roots
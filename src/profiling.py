@@ -0,0 +1,137 @@
+"""
+Opt-in counters and per-stage timers of the parser and the solver.
+
+Nothing is collected until enable_stats() is called: the instrumented code checks the module-level `stats`
+and skips the bookkeeping while it is None. Collected values are dumped as JSON or as Prometheus text
+"""
+import functools
+import time
+from typing import Any, Callable, Dict, Optional
+
+PROMETHEUS_PREFIX = 'computor'
+
+
+class Stats:
+    """
+    `counters` only grow, `maxima` keep the largest value observed (e.g. the longest power chain),
+    `gauges` are set from outside (e.g. the cache statistics), `timers` map a stage to [calls, total nanoseconds]
+    """
+    __slots__ = ('counters', 'maxima', 'gauges', 'timers')
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, int] = {}
+        self.maxima: Dict[str, int] = {}
+        self.gauges: Dict[str, float] = {}
+        self.timers: Dict[str, list] = {}
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_max(self, name: str, value: int) -> None:
+        if value > self.maxima.get(name, value - 1):
+            self.maxima[name] = value
+
+    def add_time(self, stage: str, nanoseconds: int) -> None:
+        timer = self.timers.get(stage)
+        if timer is None:
+            self.timers[stage] = [1, nanoseconds]
+        else:
+            timer[0] += 1
+            timer[1] += nanoseconds
+
+    def set_gauges(self, values: Dict[str, float], prefix: str = '') -> None:
+        for name, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.gauges[prefix + name] = value
+
+    def merge(self, other: Dict[str, Any]) -> None:
+        """
+        Adds the values of another Stats dumped with as_dict (e.g. by a worker process).
+        Gauges are snapshots, so a merged gauge replaces the previous value of the same name
+        (a worker process keys its gauges by its pid, see batch.solve_chunk)
+        """
+        self.gauges.update(other.get('gauges', {}))
+        for name, value in other.get('counters', {}).items():
+            self.count(name, value)
+        for name, value in other.get('maxima', {}).items():
+            self.observe_max(name, value)
+        for stage, timer in other.get('timers', {}).items():
+            current = self.timers.setdefault(stage, [0, 0])
+            current[0] += timer['calls']
+            current[1] += round(timer['total_us'] * 1e3)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'counters': dict(self.counters),
+            'maxima': dict(self.maxima),
+            'gauges': dict(self.gauges),
+            'timers': {stage: {'calls': calls, 'total_us': total / 1e3, 'mean_us': total / calls / 1e3}
+                       for stage, (calls, total) in self.timers.items()},
+        }
+
+    def to_json(self) -> str:
+        import json
+        return json.dumps(self.as_dict())
+
+    def to_prometheus(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines += [f'# TYPE {prefix}_{name}_total counter', f'{prefix}_{name}_total {value}']
+        for name, value in sorted({**self.maxima, **self.gauges}.items()):
+            lines += [f'# TYPE {prefix}_{name} gauge', f'{prefix}_{name} {value}']
+        if self.timers:
+            lines.append(f'# TYPE {prefix}_stage_seconds_total counter')
+            lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {total / 1e9}'
+                      for stage, (_, total) in sorted(self.timers.items())]
+            lines.append(f'# TYPE {prefix}_stage_calls_total counter')
+            lines += [f'{prefix}_stage_calls_total{{stage="{stage}"}} {calls}'
+                      for stage, (calls, _) in sorted(self.timers.items())]
+        return '\n'.join(lines) + '\n'
+
+
+stats: Optional[Stats] = None
+
+
+def enable_stats() -> Stats:
+    """
+    Starts collecting into a new Stats object (the previous values are dropped)
+    """
+    global stats
+    stats = Stats()
+    return stats
+
+
+def disable_stats() -> Optional[Stats]:
+    """
+    Stops collecting and returns what was collected
+    """
+    global stats
+    collected, stats = stats, None
+    return collected
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """
+    Adds the duration of every call of the decorated function to the timer of `stage` while stats are enabled
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            current = stats
+            if current is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                current.add_time(stage, time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+
+def format_stats(collected: Stats, output_format: str) -> str:
+    if output_format == 'json':
+        return collected.to_json() + '\n'
+    if output_format == 'prometheus':
+        return collected.to_prometheus()
+    raise ValueError(f'Неизвестный формат статистики {output_format}')
@@ -0,0 +1,206 @@
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, TextIO
+
+from src import limits, profiling
+from src.batch import Record, fill_record, get_process_cache, solve_cached
+from src.equation_solver import EquationSolver
+from src.solution import format_human
+
+EXIT_COMMANDS = ('exit', 'quit')
+STATS_COMMAND = 'stats'
+METRICS_COMMAND = 'metrics'
+
+
+def answer(equation: str, max_degree: Optional[int] = 2, cache_size: int = 4096) -> Record:
+    """
+    Solves one request with the warm cache of the current process and reports how long it took
+    """
+    start = time.perf_counter_ns()
+    record = fill_record({'equation': equation}, equation, max_degree, get_process_cache(cache_size))
+    record['latency_us'] = (time.perf_counter_ns() - start) / 1e3
+    return record
+
+
+def error_record(equation: str, error: Exception) -> Record:
+    return {'equation': equation, 'error': str(error), 'error_type': type(error).__name__}
+
+
+def encode_record(record: Record) -> bytes:
+    return json.dumps(record, ensure_ascii=False, allow_nan=False).encode('utf-8') + b'\n'
+
+
+async def read_request(reader: asyncio.StreamReader) -> bytes:
+    """
+    The next request line (b'' at the end of the stream). A line longer than the limit of the stream
+    (see EquationServer.start) is discarded and LimitExceeded is raised, so the connection can go on
+    """
+    try:
+        return await reader.readuntil(b'\n')
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        overrun = e
+    length = 0
+    while True:
+        length += overrun.consumed
+        try:
+            await reader.readexactly(overrun.consumed)
+            length += len(await reader.readuntil(b'\n')) - 1
+            break
+        except asyncio.LimitOverrunError as e:
+            overrun = e
+        except asyncio.IncompleteReadError as e:
+            length += len(e.partial)
+            break
+    raise limits.LimitExceeded('max_length', length, limits.get_limits().max_length)
+
+
+class EquationServer:
+    """
+    Line protocol: every request is one equation terminated by a newline,
+    every response is one JSON record (see batch.fill_record) with `latency_us`.
+    Connections are served concurrently; with `workers` > 1 the equations are solved in a process pool,
+    otherwise right in the event loop, which is faster for short equations.
+    While profiling stats are enabled, the request `stats` returns them as one JSON record and `metrics`
+    as Prometheus text terminated by `# EOF` (with `workers` > 1 only the stats of the server process are included)
+    """
+
+    def __init__(self, max_degree: Optional[int] = 2, cache_size: int = 4096, workers: int = 1) -> None:
+        self.max_degree = max_degree
+        self.cache_size = cache_size
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = self.create_executor()
+
+    def create_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers == 1:
+            return None
+        return ProcessPoolExecutor(self.workers, initializer=limits.configure, initargs=(limits.get_limits(),))
+
+    async def answer(self, equation: str) -> Record:
+        """
+        With a process pool, a request whose worker died is answered with an error record,
+        and the broken pool is replaced (only once, by the first request that notices it)
+        """
+        executor = self.executor
+        if executor is None:
+            return answer(equation, self.max_degree, self.cache_size)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, answer, equation, self.max_degree, self.cache_size)
+        except BrokenProcessPool as e:
+            if self.executor is executor:
+                executor.shutdown(wait=False)
+                self.executor = self.create_executor()
+            return error_record(equation, e)
+
+    def stats_response(self, command: str) -> bytes:
+        collected = profiling.stats
+        if collected is None:
+            return encode_record({'error': 'Сбор статистики не включён', 'error_type': 'RuntimeError'})
+        collected.set_gauges(get_process_cache(self.cache_size).stats(), prefix='cache_')
+        if command == METRICS_COMMAND:
+            return (collected.to_prometheus() + '# EOF\n').encode('utf-8')
+        return json.dumps({'stats': collected.as_dict()}).encode('utf-8') + b'\n'
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await read_request(reader)
+                except limits.LimitExceeded as e:
+                    writer.write(encode_record(error_record('', e)))
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                equation = line.decode('utf-8', errors='replace').strip()
+                if not equation:
+                    continue
+                if equation in (STATS_COMMAND, METRICS_COMMAND):
+                    writer.write(self.stats_response(equation))
+                else:
+                    writer.write(encode_record(await self.answer(equation)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self, host: Optional[str] = None, port: Optional[int] = None,
+                    unix_socket: Optional[str] = None) -> asyncio.AbstractServer:
+        """
+        A request line may be as long as the max_length limit (plus the newline)
+        """
+        limit = limits.get_limits().max_length + 2
+        if unix_socket is not None:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_socket, limit=limit)
+        return await asyncio.start_server(self.handle_connection, host, port, limit=limit)
+
+    async def serve_forever(self, host: Optional[str] = None, port: Optional[int] = None,
+                            unix_socket: Optional[str] = None) -> None:
+        server = await self.start(host, port, unix_socket)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None, unix_socket: Optional[str] = None,
+          max_degree: Optional[int] = 2, cache_size: int = 4096, workers: int = 1) -> None:
+    equation_server = EquationServer(max_degree, cache_size, workers)
+    try:
+        asyncio.run(equation_server.serve_forever(host, port, unix_socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        equation_server.close()
+
+
+def run_repl(max_degree: Optional[int] = 2, cache_size: int = 4096, input_stream: TextIO = sys.stdin,
+             output: TextIO = sys.stdout, prompt: str = '> ', exact: bool = False) -> None:
+    """
+    Plain equations are solved through the cache of the process (see batch.solve_cached); with `exact` the numbers
+    are RationalNumber values (see EquationParser) and plain equations bypass the cache
+    """
+    from src.equation_parser import EquationParser
+    from src.symbol_table import SymbolTable, format_result, is_symbol_command
+    cache = get_process_cache(cache_size)
+    symbols = SymbolTable(exact=exact)
+    while True:
+        output.write(prompt)
+        output.flush()
+        line = input_stream.readline()
+        if not line:
+            output.write('\n')
+            break
+        equation = line.strip()
+        if not equation:
+            continue
+        if equation in EXIT_COMMANDS:
+            break
+        start = time.perf_counter_ns()
+        try:
+            if is_symbol_command(equation):
+                output.write(format_result(symbols.execute(equation)))
+            elif exact:
+                with limits.guard():
+                    equation_parser = EquationParser(equation, False, max_degree, exact=True)
+                    equation_parser.parse_equation()
+                    solution = EquationSolver(equation_parser.multipliers, False).solve()
+                output.write(format_human(solution))
+            else:
+                _, solution = solve_cached(equation, max_degree, cache)
+                output.write(format_human(solution))
+        except Exception as e:
+            print(f'Error happened: {e}', file=output)
+        print(f'({(time.perf_counter_ns() - start) / 1e3:.1f} мкс)', file=output)
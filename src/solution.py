@@ -0,0 +1,146 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+from src import profiling
+from src.types.complex_number import ComplexNumber
+
+KIND_NO_SOLUTIONS = 'no_solutions'
+KIND_ANY = 'any'
+KIND_LINEAR = 'linear'
+KIND_DOUBLE_ROOT = 'double_root'
+KIND_TWO_REAL = 'two_real'
+KIND_TWO_COMPLEX = 'two_complex'
+KIND_POLYNOMIAL = 'polynomial'
+
+FORMATS = ('human', 'json', 'csv')
+CSV_HEADER = ('kind', 'degree', 'coefficients', 'roots')
+# rendered text is written to the stream in pieces of at least this many characters
+RENDER_BUFFER_SIZE = 1 << 16
+
+
+def format_complex(real: float, imaginary: float) -> str:
+    if imaginary < 0.0:
+        return f'{real} - {-imaginary} * i'
+    return f'{real} + {imaginary} * i'
+
+
+class Solution:
+    """
+    Result of EquationSolver.solve: `coefficients[i]` is the reduced multiplier of X^i (up to `degree`),
+    `roots` are in the order the solver found them (x0, x1, ...), `discriminant` is set for quadratic equations
+    and `iterations` for polynomials solved iteratively
+    """
+    __slots__ = ('kind', 'degree', 'coefficients', 'roots', 'discriminant', 'iterations')
+
+    def __init__(self, kind: str, degree: int, coefficients: List[float], roots: List[ComplexNumber],
+                 discriminant: Optional[float] = None, iterations: int = 0) -> None:
+        self.kind = kind
+        self.degree = degree
+        self.coefficients = coefficients
+        self.roots = roots
+        self.discriminant = discriminant
+        self.iterations = iterations
+
+    def legacy_roots(self) -> List[Any]:
+        """
+        Solutions in the format of EquationSolver.solve_equation: 'any' or 'no', real roots as floats
+        and complex ones as strings, sorted for equations up to degree 2
+        """
+        if self.kind == KIND_ANY:
+            return ['any']
+        if self.kind == KIND_NO_SOLUTIONS:
+            return ['no']
+        result = [root.real if root.imaginary == 0.0 else format_complex(root.real, root.imaginary)
+                  for root in self.roots]
+        if self.kind == KIND_DOUBLE_ROOT:
+            result = result[:1]
+        return result if self.kind == KIND_POLYNOMIAL else sorted(result)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'degree': self.degree,
+            'coefficients': self.coefficients,
+            'roots': [[root.real, root.imaginary] for root in self.roots],
+        }
+
+    def __repr__(self) -> str:
+        return f'Solution({self.kind!r}, {self.degree}, {self.coefficients!r}, {self.roots!r})'
+
+
+def format_human(solution: Solution) -> str:
+    """
+    The messages the command line tool prints for a solved equation
+    """
+    roots = solution.roots
+    lines = []
+    if solution.kind == KIND_ANY:
+        lines.append('Любое значение X является решением данного уравнения.')
+    elif solution.kind == KIND_NO_SOLUTIONS:
+        lines.append('У данного уравнения нет решений.')
+    elif solution.kind == KIND_LINEAR:
+        lines.append(f'Уравнение имеет одно решение.\nРешение данного уравнения: X = {roots[0].real}')
+    elif solution.kind == KIND_DOUBLE_ROOT:
+        lines.append(f'Уравнение имеет 2 совпадающих вещественных решения:\n'
+                     f'x0 = {roots[0].real}\nx1 = {roots[1].real}')
+    elif solution.kind == KIND_TWO_REAL:
+        lines.append(f'Уравнение имеет 2 вещественных решения:\nx0 = {roots[0].real}\nx1 = {roots[1].real}')
+    elif solution.kind == KIND_TWO_COMPLEX:
+        lines.append(f'Уравнение не имеет вещественных решений и имеет 2 мнимых решения:\n'
+                     f'x0 = {roots[0]}\nx1 = {roots[1]}')
+    else:
+        lines.append(f'Уравнение степени {solution.degree} имеет {len(roots)} решений (с учётом кратности):')
+        lines.extend(f'x{i} = {root}' for i, root in enumerate(solution.legacy_roots()))
+    return '\n'.join(lines) + '\n'
+
+
+def format_json(solution: Solution) -> str:
+    import json
+    return json.dumps(solution.as_dict()) + '\n'
+
+
+def format_csv_header() -> str:
+    return ','.join(CSV_HEADER) + '\r\n'
+
+
+def format_csv(solution: Solution) -> str:
+    """
+    One CSV row: the coefficients are separated by spaces, the roots are `real imaginary` pairs separated by `;`
+    """
+    import csv
+    import io
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([
+        solution.kind,
+        solution.degree,
+        ' '.join(map(str, solution.coefficients)),
+        ';'.join(f'{root.real} {root.imaginary}' for root in solution.roots),
+    ])
+    return buffer.getvalue()
+
+
+@profiling.timed('output')
+def render(solutions: Iterable[Solution], output: TextIO, output_format: str = 'human',
+           buffer_size: int = RENDER_BUFFER_SIZE) -> None:
+    """
+    Formats the solutions and writes them to `output` in large pieces instead of one write per line
+    """
+    formatters: Dict[str, Callable[[Solution], str]] = {
+        'human': format_human,
+        'json': format_json,
+        'csv': format_csv,
+    }
+    if output_format not in formatters:
+        raise ValueError(f'Неизвестный формат {output_format}, допустимые: {", ".join(FORMATS)}')
+    formatter = formatters[output_format]
+    pieces: List[str] = [format_csv_header()] if output_format == 'csv' else []
+    size = 0
+    for solution in solutions:
+        piece = formatter(solution)
+        pieces.append(piece)
+        size += len(piece)
+        if size >= buffer_size:
+            output.write(''.join(pieces))
+            pieces.clear()
+            size = 0
+    if pieces:
+        output.write(''.join(pieces))
@@ -0,0 +1,495 @@
+"""
+Variables and user-defined functions of computor v2.
+
+Commands (see SymbolTable.execute):
+- `name = expression` defines a variable, `name(parameter) = expression` a function of one parameter;
+- `expression = ?` evaluates an expression, `left = right ?` solves the equation in X.
+
+Values are sparse polynomials in X (see polynomial_arithmetic), a number is a polynomial of degree 0.
+Definitions are parsed once into expression trees. Every definition knows the names it depends on, so
+redefining a name recomputes only the variables that depend on it (directly or through other names).
+Function calls are memoized per argument value in a bounded table; a function whose dependencies change gets
+a new version, so its old results are never used again and are evicted like any other entry
+"""
+import re
+from collections import OrderedDict, deque
+from typing import Any, Dict, FrozenSet, Hashable, Iterator, List, Optional, Set, Tuple, Union
+
+from src import limits, polynomial_arithmetic
+from src.equation_parser import format_terms
+from src.equation_solver import EquationSolver
+from src.expression_dag import parse_number
+from src.limits import Limits
+from src.solution import Solution, format_human
+from src.types.rational_number import RationalNumber
+
+Sparse = polynomial_arithmetic.Sparse
+
+NAME_PATTERN = re.compile(r'[A-Za-z_]\w*')
+TOKEN_PATTERN = re.compile(r'\s*(?:(\d+(?:\.\d+)?)|([A-Za-z_]\w*)|(\S))')
+DEFINITION_PATTERN = re.compile(r'\s*([A-Za-z_]\w*)\s*(?:\(\s*([A-Za-z_]\w*)\s*\))?\s*=(.*)')
+UNKNOWN = 'X'
+# binary operators and the unary minus `neg`
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, 'neg': 3, '^': 4}
+RIGHT_ASSOCIATIVE = ('^', 'neg')
+DEFAULT_MEMO_SIZE = 1 << 12
+# tasks of SymbolTable.evaluate
+VISIT, APPLY, RETURN = range(3)
+
+
+class Node:
+    __slots__ = ()
+
+    def children(self) -> Tuple['Node', ...]:
+        return ()
+
+    def __str__(self) -> str:
+        return format_node(self)
+
+
+class Number(Node):
+    __slots__ = ('literal',)
+
+    def __init__(self, literal: str) -> None:
+        parse_number(literal)
+        self.literal = literal
+
+
+class Name(Node):
+    __slots__ = ('name',)
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+class Call(Node):
+    __slots__ = ('name', 'argument')
+
+    def __init__(self, name: str, argument: Node) -> None:
+        self.name = name
+        self.argument = argument
+
+    def children(self) -> Tuple[Node, ...]:
+        return self.argument,
+
+
+class Negation(Node):
+    __slots__ = ('operand',)
+
+    def __init__(self, operand: Node) -> None:
+        self.operand = operand
+
+    def children(self) -> Tuple[Node, ...]:
+        return self.operand,
+
+
+class Operation(Node):
+    __slots__ = ('operator', 'left', 'right')
+
+    def __init__(self, operator: str, left: Node, right: Node) -> None:
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+    def children(self) -> Tuple[Node, ...]:
+        return self.left, self.right
+
+
+def names(node: Node) -> Iterator[str]:
+    """
+    Names of the variables and functions used by the expression (X excluded).
+    Trees are walked with an explicit stack here and below, so a deep expression cannot overflow the Python stack
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Name):
+            if node.name != UNKNOWN:
+                yield node.name
+        elif isinstance(node, Call):
+            yield node.name
+        stack.extend(reversed(node.children()))
+
+
+def format_node(node: Node) -> str:
+    texts: List[str] = []
+    stack: List[Tuple[Node, bool]] = [(node, False)]
+    while stack:
+        node, visited = stack.pop()
+        if isinstance(node, Number):
+            texts.append(node.literal)
+        elif isinstance(node, Name):
+            texts.append(node.name)
+        elif not visited:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children()))
+        elif isinstance(node, Call):
+            texts[-1] = f'{node.name}({texts[-1]})'
+        elif isinstance(node, Negation):
+            texts[-1] = f'-({texts[-1]})'
+        else:
+            right = texts.pop()
+            texts[-1] = f'({texts[-1]} {node.operator} {right})'
+    return texts[0]
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        token = match.group(0).strip()
+        if match.group(3) is not None and token not in PRECEDENCE and token not in '()':
+            raise ValueError(f'Выражение некорректно (недопустимый символ {token})')
+        tokens.append(token)
+        position = match.end()
+    return tokens
+
+
+def apply(operator: Union[str, Tuple[str, str]], operands: List[Node]) -> None:
+    if isinstance(operator, tuple):
+        operands[-1] = Call(operator[1], operands[-1])
+    elif operator == 'neg':
+        operands[-1] = Negation(operands[-1])
+    else:
+        right = operands.pop()
+        operands[-1] = Operation(operator, operands[-1], right)
+
+
+def parse_expression(text: str) -> Node:
+    """
+    Expression tree of `text`: numbers, names, calls `name(expression)`, parentheses, `+ - * / ^`
+    (`^` is right-associative and binds the tightest) and the unary minus.
+    The length, the tokens and the nesting of parentheses are bounded by the budget of the command, see limits
+    """
+    budget = limits.budget
+    if budget is not None:
+        budget.check_length(text)
+    tokens = tokenize(text)
+    if budget is not None:
+        budget.add_terms(len(tokens))
+    operands: List[Node] = []
+    operators: List[Union[str, Tuple[str, str]]] = []
+    expect_operand = True
+    depth = 0
+    for i, token in enumerate(tokens):
+        if expect_operand:
+            if token == '(':
+                operators.append(token)
+                depth += 1
+                if budget is not None:
+                    budget.check_depth(depth)
+            elif token == '-':
+                operators.append('neg')
+            elif token == '+':
+                continue
+            elif token in PRECEDENCE or token == ')':
+                raise ValueError('Выражение некорректно (пропущен операнд)')
+            elif NAME_PATTERN.fullmatch(token) and i + 1 < len(tokens) and tokens[i + 1] == '(':
+                operators.append(('call', token))
+            else:
+                operands.append(Name(token) if NAME_PATTERN.fullmatch(token) else Number(token))
+                expect_operand = False
+        elif token == ')':
+            while operators and operators[-1] != '(':
+                apply(operators.pop(), operands)
+            if not operators:
+                raise ValueError('Выражение некорректно (непарные скобки)')
+            operators.pop()
+            depth -= 1
+            if operators and isinstance(operators[-1], tuple):
+                apply(operators.pop(), operands)
+        elif token in PRECEDENCE:
+            while operators and operators[-1] != '(' and (
+                    isinstance(operators[-1], tuple) or PRECEDENCE[operators[-1]] > PRECEDENCE[token] or
+                    PRECEDENCE[operators[-1]] == PRECEDENCE[token] and token not in RIGHT_ASSOCIATIVE):
+                apply(operators.pop(), operands)
+            operators.append(token)
+            expect_operand = True
+        else:
+            raise ValueError(f'Выражение некорректно (пропущен оператор перед {token})')
+    if expect_operand:
+        raise ValueError('Выражение некорректно (пропущен операнд)')
+    while operators:
+        operator = operators.pop()
+        if operator == '(' or isinstance(operator, tuple):
+            raise ValueError('Выражение некорректно (непарные скобки)')
+        apply(operator, operands)
+    return operands[0]
+
+
+class Definition:
+    """
+    `parameter` is None for a variable; `dependencies` are the names used by `expression`
+    except the parameter
+    """
+    __slots__ = ('name', 'parameter', 'expression', 'dependencies')
+
+    def __init__(self, name: str, parameter: Optional[str], expression: Node) -> None:
+        self.name = name
+        self.parameter = parameter
+        self.expression = expression
+        self.dependencies: FrozenSet[str] = frozenset(names(expression)) - {parameter}
+
+    @property
+    def is_function(self) -> bool:
+        return self.parameter is not None
+
+    def __str__(self) -> str:
+        if self.is_function:
+            return f'{self.name}({self.parameter}) = {self.expression}'
+        return f'{self.name} = {self.expression}'
+
+
+class SymbolTable:
+    """
+    Definitions, the values of the variables and the memoized function calls of one session.
+    With `exact` the numbers are RationalNumber values (see EquationParser)
+    """
+
+    def __init__(self, memo_size: int = DEFAULT_MEMO_SIZE, exact: bool = False,
+                 limits: Optional[Limits] = None) -> None:
+        if memo_size < 0:
+            raise ValueError('memo_size не может быть отрицательным')
+        self.exact = exact
+        self.memo_size = memo_size
+        self.limits = limits
+        self.definitions: Dict[str, Definition] = {}
+        self.values: Dict[str, Sparse] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+        self.versions: Dict[str, int] = {}
+        self.memo: 'OrderedDict[Hashable, Sparse]' = OrderedDict()
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.recomputations = 0
+        one = RationalNumber(1) if exact else 1.0
+        self.unknown: Sparse = {1.0: one}
+
+    def execute(self, line: str) -> Union[Sparse, Solution, Definition]:
+        """
+        Runs one command: returns the value of a variable or of `expression = ?`, the Definition of a function
+        or the Solution of `left = right ?`. Every command runs under one budget of `limits`
+        (the limits of the process by default, see limits.guard)
+        """
+        with limits.guard(self.limits):
+            return self.run(line)
+
+    def run(self, line: str) -> Union[Sparse, Solution, Definition]:
+        text = line.strip()
+        if text.endswith('?'):
+            left, separator, right = text[:-1].partition('=')
+            if not separator:
+                raise ValueError('Выражение некорректно (нет знака =)')
+            if not right.strip():
+                return self.evaluate(parse_expression(left))
+            difference = polynomial_arithmetic.add(self.evaluate(parse_expression(left)),
+                                                   self.evaluate(parse_expression(right)), -1)
+            return EquationSolver(difference, False).solve()
+        match = DEFINITION_PATTERN.fullmatch(text)
+        if match is None:
+            raise ValueError('Выражение некорректно (ожидается `имя = выражение` или `выражение = ?`)')
+        name, parameter, expression = match.groups()
+        definition = self.define(name, parameter, expression)
+        return definition if definition.is_function else self.values[name]
+
+    def define(self, name: str, parameter: Optional[str], text: str) -> Definition:
+        if name == UNKNOWN or parameter == UNKNOWN:
+            raise ValueError(f'{UNKNOWN} - неизвестное уравнения, его нельзя переопределить')
+        definition = Definition(name, parameter, parse_expression(text))
+        for dependency in definition.dependencies:
+            if dependency == name or name in self.closure(dependency):
+                raise ValueError(f'Циклическая зависимость: {name} зависит от самого себя')
+        previous = self.definitions.get(name)
+        if not definition.is_function:
+            value = self.evaluate(definition.expression)
+        if previous is not None:
+            for dependency in previous.dependencies:
+                self.dependents.get(dependency, set()).discard(name)
+        for dependency in definition.dependencies:
+            self.dependents.setdefault(dependency, set()).add(name)
+        self.definitions[name] = definition
+        self.versions[name] = self.versions.get(name, 0) + 1
+        if definition.is_function:
+            self.values.pop(name, None)
+        else:
+            self.values[name] = value
+        self.update_dependents(name)
+        return definition
+
+    def closure(self, name: str) -> Set[str]:
+        """
+        All names `name` depends on, directly or through other definitions
+        """
+        result: Set[str] = set()
+        stack = [name]
+        while stack:
+            definition = self.definitions.get(stack.pop())
+            if definition is None:
+                continue
+            for dependency in definition.dependencies:
+                if dependency not in result:
+                    result.add(dependency)
+                    stack.append(dependency)
+        return result
+
+    def affected(self, name: str) -> List[str]:
+        """
+        The names depending on `name` in an order where every name follows the names it depends on
+        """
+        reached: Set[str] = set()
+        stack = [name]
+        while stack:
+            for dependent in self.dependents.get(stack.pop(), ()):
+                if dependent not in reached:
+                    reached.add(dependent)
+                    stack.append(dependent)
+        pending = {dependent: len(self.definitions[dependent].dependencies & reached) for dependent in reached}
+        ready = deque(dependent for dependent, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            current = ready.popleft()
+            order.append(current)
+            for dependent in self.dependents.get(current, ()):
+                if dependent in pending:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        ready.append(dependent)
+        return order
+
+    def update_dependents(self, name: str) -> None:
+        """
+        Recomputes the variables depending on `name`; the functions get a new version (their memoized calls
+        become unreachable). A variable that cannot be computed any more is left undefined until redefined.
+        LimitExceeded stops the recomputation: it is raised with the variables not recomputed yet left undefined
+        """
+        variables = []
+        for dependent in self.affected(name):
+            self.versions[dependent] = self.versions.get(dependent, 0) + 1
+            if not self.definitions[dependent].is_function:
+                self.values.pop(dependent, None)
+                variables.append(dependent)
+        for dependent in variables:
+            try:
+                self.values[dependent] = self.evaluate(self.definitions[dependent].expression)
+            except limits.LimitExceeded:
+                raise
+            except (ValueError, ZeroDivisionError):
+                continue
+            self.recomputations += 1
+
+    def value(self, name: str) -> Sparse:
+        if name == UNKNOWN:
+            return self.unknown
+        if name not in self.values:
+            if name in self.definitions and self.definitions[name].is_function:
+                raise ValueError(f'{name} - функция, а не переменная')
+            raise ValueError(f'Неизвестная переменная {name}')
+        return self.values[name]
+
+    def lookup_call(self, name: str, argument: Sparse) -> Tuple[Definition, Hashable, Optional[Sparse]]:
+        """
+        The definition of the function, the memo key of the call and its memoized result (None if not memoized)
+        """
+        definition = self.definitions.get(name)
+        if definition is None or not definition.is_function:
+            raise ValueError(f'Неизвестная функция {name}')
+        key = (name, self.versions[name], tuple(sorted(argument.items())))
+        result = self.memo.get(key)
+        if result is not None:
+            self.memo_hits += 1
+            self.memo.move_to_end(key)
+        else:
+            self.memo_misses += 1
+        return definition, key, result
+
+    def remember(self, key: Hashable, result: Sparse) -> None:
+        if self.memo_size:
+            while len(self.memo) >= self.memo_size:
+                self.memo.popitem(last=False)
+            self.memo[key] = result
+
+    def evaluate(self, node: Node, scope: Optional[Dict[str, Sparse]] = None) -> Sparse:
+        """
+        Evaluates the tree in post-order with explicit stacks instead of recursion: `tasks` are the nodes
+        to visit and the nodes whose operands are ready on `values`. The body of a function that is not memoized
+        is pushed as more tasks followed by a task that memoizes its result, so nested calls do not grow
+        the Python stack either; their depth is bounded by the budget of the command (see limits)
+        """
+        budget = limits.budget
+        values: List[Sparse] = []
+        tasks: List[Tuple[int, Any, Optional[Dict[str, Sparse]]]] = [(VISIT, node, scope)]
+        depth = 0
+        while tasks:
+            action, item, scope = tasks.pop()
+            if budget is not None:
+                budget.charge()
+            if action == VISIT:
+                if isinstance(item, Number):
+                    values.append(polynomial_arithmetic.constant(RationalNumber(item.literal) if self.exact
+                                                                 else parse_number(item.literal)))
+                elif isinstance(item, Name):
+                    values.append(scope[item.name] if scope is not None and item.name in scope
+                                  else self.value(item.name))
+                else:
+                    tasks.append((APPLY, item, scope))
+                    tasks.extend((VISIT, child, scope) for child in reversed(item.children()))
+            elif action == APPLY:
+                if isinstance(item, Call):
+                    definition, key, result = self.lookup_call(item.name, values[-1])
+                    if result is not None:
+                        values[-1] = result
+                        continue
+                    depth += 1
+                    if budget is not None:
+                        budget.check_depth(depth)
+                    tasks.append((RETURN, key, None))
+                    tasks.append((VISIT, definition.expression, {definition.parameter: values.pop()}))
+                elif isinstance(item, Negation):
+                    values[-1] = polynomial_arithmetic.scale(values[-1], -1)
+                else:
+                    right = values.pop()
+                    values[-1] = self.operate(item.operator, values[-1], right)
+            else:
+                depth -= 1
+                self.remember(item, values[-1])
+        return values[0]
+
+    def operate(self, operator: str, left: Sparse, right: Sparse) -> Sparse:
+        if operator == '+' or operator == '-':
+            return polynomial_arithmetic.add(left, right, 1 if operator == '+' else -1)
+        if operator == '*':
+            return polynomial_arithmetic.multiply(left, right)
+        if operator == '/':
+            quotient, remainder = polynomial_arithmetic.divide(left, right)
+            if remainder:
+                raise ValueError('Выражение некорректно (многочлен не делится нацело)')
+            return quotient
+        return polynomial_arithmetic.raise_power(left, right, self.exact)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'definitions': len(self.definitions), 'memo_size': len(self.memo), 'memo_max_size': self.memo_size,
+                'memo_hits': self.memo_hits, 'memo_misses': self.memo_misses,
+                'recomputations': self.recomputations}
+
+
+def format_result(result: Union[Sparse, Solution, Definition]) -> str:
+    """
+    What the REPL prints for a result of SymbolTable.execute
+    """
+    if isinstance(result, Solution):
+        return format_human(result)
+    if isinstance(result, Definition):
+        return f'{result}\n'
+    return format_terms(result) + '\n'
+
+
+def is_symbol_command(line: str) -> bool:
+    """
+    Whether a REPL line is a command of the symbol table rather than a plain equation in X
+    """
+    text = line.strip()
+    if text.endswith('?'):
+        return True
+    match = DEFINITION_PATTERN.fullmatch(text)
+    return match is not None and match.group(1) != UNKNOWN
@@ -1,10 +1,44 @@
 from typing import Dict, Tuple, Any
 
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import struct
+import subprocess
+import sys
+
 import pytest
 
-from equation_parser import EquationParser
-from equation_solver import EquationSolver
-from utils import compare_floats_with_epsilon, sqrt, pow, compare_with_list_of_floats
+from src import numeric, profiling
+from src.batch import (get_process_cache, read_equations, run_batch, solve_chunk, solve_equations,
+                       solve_equations_parallel, solve_solutions)
+from src.brokers import MemoryBroker, SQLiteBroker
+from src.columnar import ColumnarReader, write_columnar
+from src.equation_cache import EquationCache
+from src.equation_parser import EquationParser
+from src.equation_solver import EquationSolver
+from src.evaluator import compile_polynomial
+from src.expression_dag import ConstantTable
+from src.entry import parse_fast_arguments
+from src.instrumentation import disable_verbose, enable_verbose
+from src.job_worker import JobWorker, consume_file, enqueue_file
+from src import limits
+from src.limits import LimitExceeded, Limits
+from src.mapped_input import MappedLines, map_file, solve_file, split_ranges
+from src import polynomial_arithmetic
+from src.polynomial import Polynomial
+from src.polynomial_solver import PolynomialSolver
+from src.server import EquationServer, run_repl
+from src.solution import KIND_DOUBLE_ROOT, KIND_TWO_COMPLEX, format_human, render
+from src.symbol_table import SymbolTable
+from src.types.complex_array import ComplexArray
+from src.types.complex_number import ComplexNumber
+from src.types.matrix import Matrix, MatrixBatch
+from src.types.rational_number import RationalNumber
+from src.utils import compare_floats_with_epsilon, sqrt, pow, compare_with_list_of_floats
 
 
 class TestParser:
@@ -63,12 +97,26 @@ class TestParser:
             ["X^2^1^1^3^6 + X^0^0.0 + X^0=0",
              {0: 1, 1: 1, 2: 1}],
             ["-2*X + X*X + X^0=0",
-             {0: 1, 1: -2, 2: 1}]
+             {0: 1, 1: -2, 2: 1}],
+            ["2^0*X + 0^2 = 1",
+             {0: -1, 1: 1, 2: 0}]
         ]
         for equation_group in equations:
             equation, equation_multipliers = equation_group
             self.check_equation(equation, equation_multipliers)
 
+    def test_long_equation(self):
+        equation = ' + '.join(['2*X^2/X', '-1/4', 'X^2'] * 5000) + ' = 0'
+        self.check_equation(equation, {0: -1250.0, 1: 10000.0, 2: 5000.0})
+
+    def test_any_degree_equations(self):
+        parser: EquationParser = EquationParser('X^5 - 2 * X^3 + X^2/X^2 = X^4 * X', False, None)
+        parser.parse_equation()
+        assert dict(parser.multipliers) == {3.0: -2.0, 0.0: 1.0}
+        for equation in ['X^-1 = 0', 'X^2.5 = 0']:
+            with pytest.raises(ValueError):
+                EquationParser(equation, False, None).parse_equation()
+
     def test_error_equations(self):
         equations_value_error = [
             "0",
@@ -83,7 +131,7 @@ class TestParser:
             "X^3 = 0",
             "X^100 / X^97 = 0",
             "X^97 / X^100 - 3 = 0",
-            "X^97 / X^(100 - 3) = 0",
+            "X^97 / X^(100 - 2) = 0",
             "X^1 * X^2 = 0",
             "X+^1 = 0",
             "- = 0",
@@ -119,6 +167,159 @@ class TestParser:
             self.check_equation_raises_zero_division_error(equation)
 
 
+class TestRationalNumber:
+    def test_normalization(self):
+        assert (RationalNumber(6, -4).numerator, RationalNumber(6, -4).denominator) == (-3, 2)
+        assert RationalNumber('-2.125') == RationalNumber(-17, 8)
+        assert RationalNumber(0.1) != RationalNumber('0.1')
+        assert RationalNumber(RationalNumber(1, 3), 2) == RationalNumber(1, 6)
+        with pytest.raises(ZeroDivisionError):
+            RationalNumber(1, 0)
+        with pytest.raises(ValueError):
+            RationalNumber('1e5')
+
+    def test_arithmetic(self):
+        third = RationalNumber(1, 3)
+        assert third + third + third == 1
+        assert 1 - third == RationalNumber(2, 3)
+        assert third * 3 == RationalNumber(1)
+        assert 2 / third == 6
+        assert RationalNumber(7, 2) % 2 == RationalNumber(3, 2)
+        assert RationalNumber('0.1') + RationalNumber('0.2') == RationalNumber('0.3')
+        assert RationalNumber(2, 3) ** -2 == RationalNumber(9, 4)
+        assert compare_floats_with_epsilon(float(RationalNumber(2) ** RationalNumber(1, 2)), 2 ** 0.5)
+        assert third.__add__('1') is NotImplemented
+
+    def test_hash_and_order(self):
+        assert hash(RationalNumber(5)) == hash(5)
+        assert hash(RationalNumber(1, 4)) == hash(0.25)
+        assert {RationalNumber(-3, 2): 1}[-1.5] == 1
+        assert sorted([RationalNumber(1, 2), RationalNumber(-1), RationalNumber(1, 3)]) == [-1, RationalNumber(1, 3),
+                                                                                            0.5]
+
+    def test_exact_parser(self):
+        equation_parser: EquationParser = EquationParser('0.1 + 0.2 - 0.3 = 0 * X', False, exact=True)
+        equation_parser.parse_equation()
+        assert all(value == 0 for value in equation_parser.multipliers.values())
+        equation_parser = EquationParser('1/3 * X^2 + 2^2 * X = X / 3 - 1.5', False, exact=True)
+        equation_parser.parse_equation()
+        assert equation_parser.multipliers == {2.0: RationalNumber(1, 3), 1.0: RationalNumber(11, 3),
+                                               0.0: RationalNumber(3, 2)}
+
+    def test_exact_discriminant(self):
+        equation = '0.1 * X^2 - 0.000002 * X = 0'
+        approximate_parser: EquationParser = EquationParser(equation, False)
+        approximate_parser.parse_equation()
+        assert len(EquationSolver(approximate_parser.multipliers, False).solve_equation()) == 1
+        exact_parser: EquationParser = EquationParser(equation, False, exact=True)
+        exact_parser.parse_equation()
+        roots = EquationSolver(exact_parser.multipliers, False).solve_equation()
+        assert len(roots) == 2 and compare_with_list_of_floats(0.00002, roots)
+        result = EquationSolver({2: RationalNumber(1), 1: RationalNumber(-6), 0: RationalNumber(9)},
+                                False).solve_equation()
+        assert result == [3.0]
+
+    @staticmethod
+    def solve_exact(equation: str, max_degree=2):
+        exact_parser: EquationParser = EquationParser(equation, False, max_degree, exact=True)
+        exact_parser.parse_equation()
+        return EquationSolver(exact_parser.multipliers).solve()
+
+    def test_exact_beyond_float_range(self):
+        assert [root.real for root in self.solve_exact('X^2 + 10^155 * X = 0').roots] == [0.0, -1e155]
+        assert [root.real for root in self.solve_exact('10^-200 * X^2 + X + 1 = 0').roots] == [-1.0, -1e200]
+        roots = self.solve_exact('X^3 + 10^400 = 0', None).roots
+        assert math.isclose(roots[0].real, -10.0 ** (400 / 3)) and roots[0].imaginary == 0.0
+        assert [root.real for root in self.solve_exact('X^2 - 2 = 0').roots] == [math.sqrt(2), -math.sqrt(2)]
+        with pytest.raises(ValueError, match='не представим'):
+            self.solve_exact('2^2^2^2^2 * X = 1')
+        with pytest.raises(ValueError, match='не представим'):
+            self.solve_exact('10^-400 * X = 10^400')
+        with pytest.raises(LimitExceeded):
+            self.solve_exact('1.5^100000 * X = 1')
+        assert RationalNumber(9, 4).sqrt() == RationalNumber(3, 2) and RationalNumber(-1) ** 10 ** 400 == 1
+
+
+class TestComplexNumber:
+    @staticmethod
+    def check(actual: ComplexNumber, expected: complex):
+        assert abs(actual.real - expected.real) < 1e-9 and abs(actual.imaginary - expected.imag) < 1e-9
+
+    def test_arithmetic(self):
+        x, y = ComplexNumber(3.0, -2.0), ComplexNumber(-1.5, 4.0)
+        a, b = complex(3.0, -2.0), complex(-1.5, 4.0)
+        self.check(x + y, a + b)
+        self.check(x - y, a - b)
+        self.check(x * y, a * b)
+        self.check(x / y, a / b)
+        self.check(2 - x, 2 - a)
+        self.check(1 / y, 1 / b)
+        self.check(x * RationalNumber(1, 2), a / 2)
+        self.check(x ** 5, a ** 5)
+        self.check(x ** -3, a ** -3)
+        self.check(x ** 0.5, a ** 0.5)
+        self.check(x ** y, a ** b)
+        self.check(2 ** y, 2 ** b)
+        assert ComplexNumber(3.0, 4.0).modulus == 5.0
+        # the squares of these parts overflow or underflow
+        assert ComplexNumber(3 * 2.0 ** 600, 4 * 2.0 ** 600).modulus == 5 * 2.0 ** 600
+        assert ComplexNumber(3 * 2.0 ** -600, 4 * 2.0 ** -600).modulus == 5 * 2.0 ** -600
+        with pytest.raises(ZeroDivisionError):
+            x / ComplexNumber(0.0, 0.0)
+        with pytest.raises(TypeError):
+            x + 'i'
+        assert x.__mul__(None) is NotImplemented
+
+    def test_in_place(self):
+        x = ComplexNumber(1.0, 1.0)
+        same = x
+        x += 1
+        x *= ComplexNumber(0.0, 1.0)
+        x /= 2
+        assert x is same and x == ComplexNumber(-0.5, 1.0)
+        assert not hasattr(x, '__dict__')
+
+
+class TestComplexArray:
+    def test_arithmetic(self):
+        numbers = [complex(1.0, 2.0), complex(-3.0, 0.5), complex(0.0, -1.0)]
+        others = [complex(2.0, -1.0), complex(0.25, 4.0), complex(-2.0, 0.0)]
+        array, other = ComplexArray.from_numbers(numbers), ComplexArray.from_numbers(others)
+        for actual, expected in [(array + other, [a + b for a, b in zip(numbers, others)]),
+                                 (array - other, [a - b for a, b in zip(numbers, others)]),
+                                 (array * other, [a * b for a, b in zip(numbers, others)]),
+                                 (array / other, [a / b for a, b in zip(numbers, others)]),
+                                 (1 - array, [1 - a for a in numbers]),
+                                 (array * ComplexNumber(0.0, 2.0), [a * 2j for a in numbers])]:
+            assert len(actual) == len(expected)
+            for number, expected_number in zip(actual, expected):
+                TestComplexNumber.check(number, expected_number)
+        assert list(array.modulus()) == [abs(number) for number in numbers]
+        large, small = 2.0 ** 600, 2.0 ** -600
+        assert list(ComplexArray([3 * large, 3 * small], [4 * large, 4 * small]).modulus()) == [5 * large, 5 * small]
+        with pytest.raises(ValueError):
+            array + other[:2]
+
+    def test_serialization(self, monkeypatch):
+        array = ComplexArray([1.0, -2.5], [0.0, 3.0])
+        array.append(ComplexNumber(4.0, -4.0))
+        array[0] = 7
+        assert ComplexArray.from_bytes(array.to_bytes()) == array
+        assert list(array.real) == [7.0, -2.5, 4.0] and array[2] == ComplexNumber(4.0, -4.0)
+        data = array.to_bytes()
+        assert data[12:20] == struct.pack('<d', 7.0) and data[36:44] == struct.pack('<d', 0.0)
+        # a big-endian host swaps the parts to little-endian and back
+        monkeypatch.setattr(sys, 'byteorder', 'big')
+        swapped = array.to_bytes()
+        assert swapped[:12] == data[:12] and swapped[12:20] == struct.pack('>d', 7.0)
+        assert ComplexArray.from_bytes(swapped) == array and list(array.real) == [7.0, -2.5, 4.0]
+        monkeypatch.undo()
+        numpy = pytest.importorskip('numpy')
+        assert numpy.array_equal(array.to_numpy(), numpy.array([7.0, -2.5 + 3j, 4.0 - 4j]))
+        large = 2.0 ** 600
+        assert numpy.array_equal(ComplexArray([3 * large], [4 * large]).modulus_numpy(), numpy.array([5 * large]))
+
+
 class TestSolver:
     @staticmethod
     def check_solution(coefs: Dict[float, float], expected_result: Tuple[Any, ...]):
@@ -186,6 +387,379 @@ class TestSolver:
                 self.check_solution(coefs, result)
 
 
+class TestInstrumentation:
+    def test_reduced_form_has_no_side_effects(self):
+        equation_parser: EquationParser = EquationParser('5 * X^0 + 4 * X^1 - 9.3 * X^2 = 1 * X^0')
+        equation_parser.parse_equation()
+        multipliers = dict(equation_parser.multipliers)
+        reduced_form = equation_parser.reduced_form
+        assert reduced_form.degree == 2
+        assert str(reduced_form) == '9.3*X^2 - 4.0*X - 4.0 = 0.0'
+        assert equation_parser.multipliers == multipliers
+
+    def test_log_level(self):
+        stream = io.StringIO()
+        equation_parser: EquationParser = EquationParser('X^2 - 2 * X + 1 = 0')
+        equation_parser.parse_equation()
+        EquationSolver(equation_parser.multipliers).solve()
+        enable_verbose(stream)
+        try:
+            assert stream.getvalue() == ''
+            EquationParser('X^2 - 2 * X + 1 = 0').parse_equation()
+            EquationSolver({0: 1.0, 1: -2.0, 2: 1.0}).solve()
+        finally:
+            disable_verbose()
+        assert stream.getvalue() == ('Степень уравнения: 2\nСокращённая форма: X^2 - 2.0*X + 1.0 = 0.0\n'
+                                     'Дискриминант равен нулю\n')
+
+    def test_verbose_instance(self, capsys):
+        verbose_parser: EquationParser = EquationParser('X = 1', True)
+        verbose_parser.parse_equation()
+        EquationSolver(verbose_parser.multipliers, True).solve()
+        assert capsys.readouterr().out == 'Степень уравнения: 1\nСокращённая форма: X - 1.0 = 0.0\n'
+        quiet_parser: EquationParser = EquationParser('X^2 = 1')
+        quiet_parser.parse_equation()
+        EquationSolver(quiet_parser.multipliers).solve()
+        assert capsys.readouterr().out == ''
+
+
+class TestPolynomial:
+    def test_terms(self):
+        polynomial = Polynomial.from_equation('5 * X^0 + 4 * X^1 - 9.3 * X^2 = 1 * X^0')
+        assert polynomial.degree == 2
+        assert polynomial.reduced_form == '-9.3*X^2 + 4.0*X + 4.0 = 0.0'
+        polynomial.remove_term(2)
+        assert polynomial.degree == 1 and polynomial.reduced_form == '4.0*X + 4.0 = 0.0'
+        polynomial.scale_term(1, 0.5)
+        polynomial.add_term(0, -4.0)
+        assert polynomial.multipliers == {1.0: 2.0} and polynomial.reduced_form == '2.0*X = 0.0'
+        polynomial.remove_term(1)
+        assert polynomial.degree == 0 and polynomial.reduced_form == '0.0 = 0.0'
+        with pytest.raises(ValueError):
+            polynomial.set_term(3, 1.0)
+        with pytest.raises(ValueError):
+            polynomial.set_term(0.5, 1.0)
+
+    def test_solve_only_after_changes(self):
+        polynomial = Polynomial({2: 1.0, 0: -4.0})
+        assert polynomial.solve() == [-2.0, 2.0]
+        version = polynomial.version
+        polynomial.set_term(2, 1.0)
+        polynomial.add_term(1, 0.0)
+        assert polynomial.version == version
+        polynomial.set_term(0, -9.0)
+        assert polynomial.version == version + 1
+        assert polynomial.solve() == [-3.0, 3.0]
+        polynomial = Polynomial({0: -16.0}, max_degree=None)
+        polynomial.set_term(4, 1.0)
+        assert polynomial.degree == 4 and len(polynomial.solve()) == 4
+
+
+class TestPolynomialArithmetic:
+    def test_parentheses(self):
+        tests = [
+            ['(X + 1) * (X - 2) = 0', False, {0.0: -2.0, 1.0: -1.0, 2.0: 1.0}],
+            ['(X + 1)^2 = 4', True, {0.0: RationalNumber(-3), 1.0: RationalNumber(2), 2.0: RationalNumber(1)}],
+            ['(X^3 - 1) / (X - 1) = 3', False, {0.0: -2.0, 1.0: 1.0, 2.0: 1.0}],
+            ['-(X - 3) * 2 = X', False, {0.0: 6.0, 1.0: -3.0}],
+            ['2^(1 + 1) * X = -2^2', False, {0.0: -4.0, 1.0: 4.0}],
+            ['X^97 / X^(100 - 3) = 0', False, {0.0: 1.0}],
+        ]
+        for equation, exact, multipliers in tests:
+            equation_parser: EquationParser = EquationParser(equation, max_degree=None, exact=exact)
+            equation_parser.parse_equation()
+            assert {key: value for key, value in equation_parser.multipliers.items() if value} == multipliers
+        for equation in ['(X + 1 = 0', 'X) = 0', '(X)(X) = 0', '(X^2 + 1) / (X - 1) = 0', '2^(X) = 0',
+                         '(X + 1)^0.5 = 0', '() = 0']:
+            with pytest.raises(ValueError):
+                EquationParser(equation, max_degree=None).parse_equation()
+        with pytest.raises(ZeroDivisionError):
+            EquationParser('(X + 1) / (X - X) = 0').parse_equation()
+
+    def test_karatsuba_matches_schoolbook(self):
+        random.seed(3)
+        left = {float(i): float(random.randint(-9, 9) or 1) for i in range(70)}
+        right = {float(i): float(random.randint(-9, 9) or 1) for i in range(45)}
+        expected = polynomial_arithmetic.from_dense(polynomial_arithmetic.schoolbook(
+            polynomial_arithmetic.to_dense(left, 0.0), polynomial_arithmetic.to_dense(right, 0.0), 0.0))
+        assert polynomial_arithmetic.multiply(left, right) == expected
+        quotient, remainder = polynomial_arithmetic.divide(expected, right)
+        assert remainder == {} and all(compare_floats_with_epsilon(quotient[key], value, 1e-6)
+                                       for key, value in left.items())
+
+    def test_polynomial_operators(self):
+        product = Polynomial({1: 1.0, 0: 1.0}) * Polynomial({1: 1.0, 0: -2.0})
+        assert product.multipliers == {2.0: 1.0, 1.0: -1.0, 0.0: -2.0} and product.solve() == [-1.0, 2.0]
+        quotient, remainder = divmod(product ** 2 + Polynomial({0: 3.0}), Polynomial({1: 1.0, 0: 1.0}))
+        assert remainder.multipliers == {0.0: 3.0} and quotient.degree == 3
+        assert (product - product).multipliers == {}
+
+
+class TestSymbolTable:
+    def test_dependencies(self):
+        table = SymbolTable()
+        assert table.execute('a = 2') == {0.0: 2.0}
+        table.execute('b = a * 3 + 1')
+        table.execute('c = b^2')
+        table.execute('unrelated = 4')
+        table.execute('f(x) = x^2 + a')
+        assert table.execute('f(3) = ?') == {0.0: 11.0}
+        recomputations = table.recomputations
+        table.execute('a = 5')
+        assert table.recomputations == recomputations + 2
+        assert table.execute('c = ?') == {0.0: 256.0}
+        assert table.execute('f(3) = ?') == {0.0: 14.0}
+        assert table.execute('(X + 1) * f(X) = ?') == {3.0: 1.0, 2.0: 1.0, 1.0: 5.0, 0.0: 5.0}
+        assert table.execute('f(X) = 9 ?').legacy_roots() == [-2.0, 2.0]
+        for line in ['a = a + 1', 'f(x) = c * f(x)', 'X = 2', 'd = zz', 'd = 1 +', 'unknown(2) = ?']:
+            with pytest.raises(ValueError):
+                table.execute(line)
+
+    def test_deadline_during_recomputation(self, monkeypatch):
+        table = SymbolTable(limits=Limits(deadline=60.0))
+        for line in ['a = 2', 'b = a * 3', 'c = b + 1']:
+            table.execute(line)
+        evaluate = table.evaluate
+
+        def expire(expression):
+            # the deadline passes while b is being recomputed
+            if expression is table.definitions['b'].expression:
+                limits.budget.deadline_at = 0.0
+            return evaluate(expression)
+
+        monkeypatch.setattr(table, 'evaluate', expire)
+        with pytest.raises(LimitExceeded) as error:
+            table.execute('a = 5')
+        assert error.value.limit == 'deadline'
+        assert table.values['a'] == {0.0: 5.0} and 'b' not in table.values and 'c' not in table.values
+        monkeypatch.setattr(table, 'evaluate', evaluate)
+        table.execute('a = 1')
+        assert table.execute('c = ?') == {0.0: 4.0}
+
+    def test_memoized_calls(self):
+        table = SymbolTable(memo_size=2)
+        table.execute('f(x) = x^3 - x')
+        for argument in ['2', '2', '3', '4', '2']:
+            table.execute(f'f({argument}) = ?')
+        assert table.memo_hits == 1 and table.memo_misses == 4 and len(table.memo) == 2
+        table.execute('k = 2')
+        table.execute('g(x) = x * k')
+        assert table.execute('g(2) = ?') == {0.0: 4.0}
+        table.execute('k = 3')
+        assert table.execute('g(2) = ?') == {0.0: 6.0}
+
+    def test_repl(self):
+        output = io.StringIO()
+        run_repl(input_stream=io.StringIO('a = 3\nf(x) = x * a\nf(X) = 6 ?\nX = 1\n'), output=output)
+        lines = output.getvalue().splitlines()
+        assert '> 3.0' in lines and 'Решение данного уравнения: X = 2.0' in lines
+        assert 'Решение данного уравнения: X = 1.0' in lines
+
+
+class TestLimits:
+    def check_limit(self, equation: str, limit: str, configured: Limits = None, max_degree=None,
+                    exact: bool = False) -> None:
+        with pytest.raises(LimitExceeded) as error:
+            EquationParser(equation, False, max_degree, exact, limits=configured).parse_equation()
+        assert error.value.limit == limit and isinstance(error.value, ValueError)
+
+    def test_parser_limits(self):
+        self.check_limit('X = ' + ' ' * 100 + '1', 'max_length', Limits(max_length=100))
+        self.check_limit(' + '.join(['X'] * 100) + ' = 0', 'max_terms', Limits(max_terms=100))
+        self.check_limit('X^100000 = 0', 'max_exponent')
+        self.check_limit('X^60000 * X^60000 = 0', 'max_exponent')
+        self.check_limit('(X + 1)^100000 = 0', 'max_exponent')
+        self.check_limit('(' * 2000 + 'X' + ')' * 2000 + ' = 0', 'max_depth')
+        self.check_limit('(X + 1)^60000 = 0', 'max_operations', Limits(max_operations=1 << 16))
+        self.check_limit(' + '.join(['X^2'] * 100) + ' = 0', 'deadline', Limits(deadline=1e-9))
+        self.check_limit('X^2^1^100.32^3.12 = 4', 'max_exponent', Limits(max_exponent=2))
+        self.check_limit('-2^10^400 * X = 0', 'max_exponent')
+        self.check_limit('2^10^400 * X = 0', 'max_exponent', exact=True)
+        assert limits.budget is None
+        parser = EquationParser('X^2^1^100.32^3.12 = 4', False, 2)
+        parser.parse_equation()
+        assert parser.multipliers[2.0] == 1.0
+        record = next(solve_equations([(1, '-2^10^400 * X = 0')]))
+        assert record['error_type'] == 'LimitExceeded'
+
+    def test_solver_and_batch(self):
+        equations = [(1, 'X^5 - 1 = 0'), (2, 'X^70000 = 1'), (3, 'X^2 = 4')]
+        records = list(solve_equations(equations, max_degree=None))
+        assert records[1]['error_type'] == 'LimitExceeded' and 'max_exponent' in records[1]['error']
+        assert len(records[0]['roots']) == 5 and records[2]['roots'] == [[2.0, 0.0], [-2.0, 0.0]]
+        try:
+            limits.configure(Limits(max_operations=100))
+            cache = EquationCache(16)
+            equations = [(1, '(X + 1)^20 = 0'), (2, '(X + 1)^20 = 0'), (3, 'X^30 + X = 2')]
+            records = list(solve_equations(equations, None, cache))
+            assert [record['error_type'] for record in records] == ['LimitExceeded'] * 3
+            assert len(cache) == 1 and cache.stats()['hits'] == 0
+        finally:
+            limits.configure()
+        assert limits.get_limits() == limits.DEFAULT_LIMITS
+
+    def test_iterative_evaluation(self):
+        table = SymbolTable(limits=Limits(max_depth=1 << 20))
+        assert table.execute(' + '.join(['1'] * 20000) + ' = ?') == {0.0: 20000.0}
+        assert table.execute('-' * 5001 + '2 = ?') == {0.0: -2.0}
+        table.execute('f0(x) = x + 1')
+        for i in range(1, 1500):
+            table.execute(f'f{i}(x) = f{i - 1}(x) * 1')
+        assert table.execute('long = ' + ' - '.join(['2'] * 20000)) == {0.0: -39996.0}
+        assert str(table.definitions['long']).startswith('long = ((((')
+        assert table.execute('f1499(X) = ?') == {1.0: 1.0, 0.0: 1.0}
+        small = SymbolTable()
+        small.execute('g0(x) = x')
+        for i in range(1, 1100):
+            small.execute(f'g{i}(x) = g{i - 1}(x)')
+        with pytest.raises(LimitExceeded):
+            small.execute('g1099(1) = ?')
+
+
+class TestMatrix:
+    def test_arithmetic(self):
+        a = Matrix.from_rows([[1, 2], [3, 4]])
+        assert a.shape == (2, 2) and a[1, 0] == 3.0
+        assert (a + 1).to_rows() == [[2.0, 3.0], [4.0, 5.0]]
+        assert (a * RationalNumber(1, 2)).to_rows() == [[0.5, 1.0], [1.5, 2.0]]
+        assert (2 - a).to_rows() == [[1.0, 0.0], [-1.0, -2.0]]
+        c = a * ComplexNumber(0.0, 1.0)
+        assert c.is_complex and c[0, 1] == ComplexNumber(0.0, 2.0) and (c / ComplexNumber(0.0, 1.0)) == a
+        assert (a @ Matrix.identity(2)) == a and (a @ a).to_rows() == [[7.0, 10.0], [15.0, 22.0]]
+        assert (c @ a)[0, 0] == ComplexNumber(0.0, 7.0)
+        assert str(a) == '[ 1.0 , 2.0 ]\n[ 3.0 , 4.0 ]'
+        with pytest.raises(ValueError):
+            a + Matrix(2, 3)
+        with pytest.raises(ValueError):
+            a @ Matrix(3, 2)
+
+    def test_blocked_product(self):
+        generator = random.Random(1)
+        left = [[generator.uniform(-1.0, 1.0) for _ in range(70)] for _ in range(5)]
+        right = [[generator.uniform(-1.0, 1.0) for _ in range(130)] for _ in range(70)]
+        product = (Matrix.from_rows(left) @ Matrix.from_rows(right)).to_rows()
+        for i in range(5):
+            for j in range(130):
+                assert math.isclose(product[i][j], sum(left[i][k] * right[k][j] for k in range(70)), abs_tol=1e-9)
+
+    def test_lu(self):
+        a = Matrix.from_rows([[0, 2, 1], [1, 1, 1], [2, 1, 3]])
+        assert math.isclose(a.determinant(), -3.0)
+        assert all(math.isclose(x, y) for x, y in zip(a.solve([7, 6, 13]), [1.0, 2.0, 3.0]))
+        product = a @ a.inverse()
+        assert all(math.isclose(x, y, abs_tol=1e-12) for x, y in zip(product.real, Matrix.identity(3).real))
+        singular = Matrix.from_rows([[1, 2, 3, 4], [2, 4, 6, 8], [0, 1, 0, 1], [1, 0, 1, 0]])
+        assert singular.determinant() == 0.0
+        with pytest.raises(ValueError):
+            singular.inverse()
+        scaled = Matrix.identity(4) * 1e-12
+        assert math.isclose(scaled.determinant(), 1e-48)
+        assert scaled.solve([1e-12, 2e-12, 3e-12, 4e-12]) == [1.0, 2.0, 3.0, 4.0]
+        assert (singular * 1e-12).determinant() == 0.0
+
+    def test_batch(self, monkeypatch):
+        generator = random.Random(2)
+        # with numpy installed the first pass goes through numpy.linalg, the second through the loops without it
+        for loops in [False, True]:
+            if loops:
+                monkeypatch.setattr(MatrixBatch, 'vectorized', lambda batch: None)
+            self.check_batch(generator)
+            singular = MatrixBatch.from_matrices([Matrix.identity(2), Matrix.from_rows([[1, 2], [2, 4]])])
+            assert list(singular.determinants()) == [1.0, 0.0]
+            with pytest.raises(ValueError):
+                singular.solve([1.0] * 4)
+            with pytest.raises(ValueError):
+                singular.inverses()
+
+    @staticmethod
+    def check_batch(generator: random.Random):
+        for size in [2, 3, 5]:
+            matrices = [Matrix(size, size, [generator.uniform(-1.0, 1.0) for _ in range(size * size)])
+                        for _ in range(20)]
+            batch = MatrixBatch.from_matrices(matrices)
+            determinants = batch.determinants()
+            assert all(math.isclose(d, m.determinant(), rel_tol=1e-9)
+                       for d, m in zip(determinants, matrices))
+            inverses = batch.inverses()
+            products = batch @ inverses
+            identity = Matrix.identity(size).real
+            for i in range(len(batch)):
+                assert all(math.isclose(x, y, abs_tol=1e-8) for x, y in zip(products[i].real, identity))
+            rhs = [1.0] * (20 * size)
+            solutions = batch.solve(rhs)
+            assert all(math.isclose(x, y, abs_tol=1e-8)
+                       for x, y in zip(solutions[:size], matrices[0].solve([1.0] * size)))
+
+    def test_numpy(self):
+        np = pytest.importorskip('numpy')
+        a = Matrix.from_rows([[1, 2], [3, 4]])
+        assert np.array_equal(a.to_numpy(), [[1.0, 2.0], [3.0, 4.0]]) and Matrix.from_numpy(a.to_numpy()) == a
+        batch = MatrixBatch.from_matrices([a, a @ a])
+        assert np.allclose(np.linalg.det(batch.to_numpy()), batch.determinants())
+
+
+class TestSolution:
+    def test_silent_solve(self, capsys):
+        solution = EquationSolver({0: 4.42, 1: -4.2, 2: 1.0}, False).solve()
+        assert capsys.readouterr().out == ''
+        assert solution.kind == KIND_TWO_COMPLEX and solution.degree == 2
+        assert solution.coefficients == [4.42, -4.2, 1.0]
+        assert compare_floats_with_epsilon(solution.roots[0].real, 2.1)
+        assert solution.roots[0].imaginary == -solution.roots[1].imaginary > 0
+        assert solution.legacy_roots() == ['2.1 + 0.09999999999999894 * i', '2.1 - 0.09999999999999894 * i']
+        solution = EquationSolver({0: 9.0, 1: -6.0, 2: 1.0}, False).solve()
+        assert solution.kind == KIND_DOUBLE_ROOT and solution.discriminant == 0.0
+        assert format_human(solution) == 'Уравнение имеет 2 совпадающих вещественных решения:\nx0 = 3.0\nx1 = 3.0\n'
+
+    def test_render(self):
+        solutions = [EquationSolver({0: -4.0, 2: 1.0}, False).solve(), EquationSolver({0: 1.0}, False).solve()]
+        output = io.StringIO()
+        render(solutions, output, 'json')
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert records[0] == {'kind': 'two_real', 'degree': 2, 'coefficients': [-4.0, 0.0, 1.0],
+                              'roots': [[2.0, 0.0], [-2.0, 0.0]]}
+        assert records[1]['kind'] == 'no_solutions' and records[1]['roots'] == []
+        output = io.StringIO()
+        render(solutions, output, 'csv', buffer_size=1)
+        assert output.getvalue().splitlines() == ['kind,degree,coefficients,roots',
+                                                  'two_real,2,-4.0 0.0 1.0,2.0 0.0;-2.0 0.0',
+                                                  'no_solutions,0,1.0,']
+        with pytest.raises(ValueError):
+            render(solutions, output, 'xml')
+
+
+class TestPolynomialSolver:
+    @staticmethod
+    def check_roots(multipliers: Dict[float, float], expected_roots):
+        roots = PolynomialSolver(multipliers).solve()
+        assert len(roots) == len(expected_roots)
+        for root, (real, imaginary) in zip(roots, expected_roots):
+            assert abs(root.real - real) < 1e-9 and abs(root.imaginary - imaginary) < 1e-9
+
+    def test_closed_forms(self):
+        half_sqrt_3 = 3 ** 0.5 / 2
+        self.check_roots({3: 1.0, 0: -8.0}, [(-1.0, -2 * half_sqrt_3), (-1.0, 2 * half_sqrt_3), (2.0, 0.0)])
+        self.check_roots({3: 2.0, 2: -12.0, 1: 22.0, 0: -12.0}, [(1.0, 0.0), (2.0, 0.0), (3.0, 0.0)])
+        self.check_roots({3: 1.0}, [(0.0, 0.0)] * 3)
+        self.check_roots({4: 1.0, 0: -16.0}, [(-2.0, 0.0), (0.0, -2.0), (0.0, 2.0), (2.0, 0.0)])
+        self.check_roots({4: 1.0, 3: -10.0, 2: 35.0, 1: -50.0, 0: 24.0},
+                         [(1.0, 0.0), (2.0, 0.0), (3.0, 0.0), (4.0, 0.0)])
+
+    def test_iterative(self):
+        multipliers = {0: -120.0, 1: 274.0, 2: -225.0, 3: 85.0, 4: -15.0, 5: 1.0}
+        self.check_roots(multipliers, [(float(i), 0.0) for i in range(1, 6)])
+        polynomial_solver = PolynomialSolver({7: 1.0, 0: -1.0, 1: 0.0})
+        roots = polynomial_solver.solve()
+        assert 0 < polynomial_solver.iterations <= polynomial_solver.max_iterations
+        for root in roots:
+            assert abs((root.real ** 2 + root.imaginary ** 2) - 1.0) < 1e-9
+        assert PolynomialSolver({0: 5.0, 2: 0.0}).solve() == []
+
+    def test_higher_degree_equation(self):
+        result = EquationSolver({0: -16.0, 4: 1.0}, False).solve_equation()
+        assert result == [-2.0, '0.0 - 2.0 * i', '0.0 + 2.0 * i', 2.0]
+
+
 class TestUtils:
     def test_sqrt(self):
         test_sets = [
@@ -248,3 +822,539 @@ class TestUtils:
         ]
         for left, right, result in tests:
             assert compare_with_list_of_floats(left, right) is result
+
+
+class TestBatch:
+    def test_run_batch(self):
+        input_stream = io.StringIO('X^2 - 4 = 0\n\nX^3 = 0\n1 = 1\n')
+        output = io.StringIO()
+        assert run_batch(input_stream, output) == 3
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [record['line'] for record in records] == [1, 3, 4]
+        assert records[0] == {'line': 1, 'equation': 'X^2 - 4 = 0', 'kind': 'two_real', 'degree': 2,
+                              'coefficients': [-4.0, 0.0, 1.0], 'roots': [[2.0, 0.0], [-2.0, 0.0]]}
+        assert records[1]['error_type'] == 'ValueError'
+        assert 'roots' not in records[1]
+        assert records[2]['kind'] == 'any' and records[2]['roots'] == []
+
+    def test_non_finite_values(self):
+        input_stream = io.StringIO('10^400 * X = 1\n10^400*X - 10^400*X = 1\nX^2 + 10^200 * X + 1 = 0\nX = 2\n')
+        output = io.StringIO()
+        assert run_batch(input_stream, output, cache_size=4) == 4
+        lines = output.getvalue().splitlines()
+        assert not any(word in line for line in lines for word in ('Infinity', 'NaN'))
+        records = [json.loads(line) for line in lines]
+        assert [record.get('error_type') for record in records] == ['ValueError'] * 3 + [None]
+        assert 'Коэффициенты' in records[0]['error'] and 'Коэффициенты' in records[1]['error']
+        assert 'Корни' in records[2]['error'] and 'coefficients' not in records[2]
+        assert records[3]['roots'] == [[2.0, 0.0]]
+
+    def test_parallel_keeps_order(self):
+        equations = list(enumerate([f'X^2 - {i} * X = 0' for i in range(50)] + ['X^3 = 0'], start=1))
+        expected = list(solve_equations(equations))
+        actual = list(solve_equations_parallel(equations, workers=2, chunk_size=7, max_in_flight=2))
+        assert actual == expected
+
+    def test_mapped_lines(self, tmp_path):
+        text = ' X^2 - 4 = 0 \r\n\n\t\nX = 1\nX^2 = -1'
+        path = tmp_path / 'equations.txt'
+        path.write_bytes(text.encode('utf-8'))
+        with map_file(str(path)) as data:
+            lines = MappedLines(data)
+            assert list(lines) == list(read_equations(io.StringIO(text)))
+            assert lines.lines == 5
+            ranges = split_ranges(data, 4)
+            assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+            assert all(data[end - 1:end] == b'\n' for _, end in ranges[:-1])
+        empty = tmp_path / 'empty.txt'
+        empty.write_bytes(b'')
+        assert list(solve_file(str(empty))) == []
+
+    def test_mapped_file_keeps_order(self, tmp_path):
+        text = ''.join(f'X^2 - {i} * X = 0\n' + '\n' * (i % 3) for i in range(50)) + 'X^3 = 0\n'
+        path = tmp_path / 'equations.txt'
+        path.write_text(text, encoding='utf-8')
+        expected = list(solve_equations(read_equations(io.StringIO(text))))
+        assert list(solve_file(str(path))) == expected
+        assert list(solve_file(str(path), workers=2, range_size=64, max_in_flight=2)) == expected
+
+
+class TestColumnar:
+    EQUATIONS = ['X^2 - 4 = 0', 'X^2 + 1 = 0', 'X = 3', '1 = 1', 'X^3 = 0', 'X^3 - X = 0', '2 = 1']
+
+    def test_round_trip(self, tmp_path):
+        equations = list(enumerate(self.EQUATIONS, start=1))
+        solutions = list(solve_solutions(equations, max_degree=None))
+        path = tmp_path / 'solutions.bin'
+        with open(path, 'wb') as output:
+            assert write_columnar(solutions, output, block_rows=3) == len(equations)
+        with ColumnarReader(str(path)) as reader:
+            assert len(reader) == len(equations) and len(reader.blocks) == 3
+            rows = list(reader)
+        for (line_number, solution), (line, kind, degree, coefficients, roots) in zip(solutions, rows):
+            assert line == line_number
+            assert kind == solution.kind and degree == solution.degree
+            assert coefficients[:len(solution.coefficients)] == solution.coefficients
+            assert not any(coefficients[len(solution.coefficients):])
+            assert roots == [(root.real, root.imaginary) for root in solution.roots]
+
+    def test_invalid_equations_and_numpy(self, tmp_path):
+        np = pytest.importorskip('numpy')
+        equations = list(enumerate(['X^2 - 4 = 0', 'X^3 = 0', 'X = 2'], start=1))
+        path = tmp_path / 'solutions.bin'
+        with open(path, 'wb') as output:
+            write_columnar(solve_solutions(equations), output)
+        with ColumnarReader(str(path)) as reader:
+            assert [row[1:3] for row in reader] == [('two_real', 2), (None, -1), ('linear', 1)]
+            columns = reader.blocks[0].to_numpy()
+            assert columns['coefficients'].shape == (3, 3)
+            assert columns['coefficients'][0].tolist() == [-4.0, 0.0, 1.0]
+            assert columns['root_count'].tolist() == [2, 0, 1]
+            assert np.isnan(columns['roots_real'][2, 1])
+            del columns
+        path.write_bytes(b'nope')
+        with pytest.raises(ValueError):
+            ColumnarReader(str(path))
+
+
+class TestVectorSolver:
+    def test_solve_many_matches_solver(self):
+        np = pytest.importorskip('numpy')
+        from src.vector_solver import solve_many, residuals, CASE_NO_SOLUTIONS, CASE_ANY_SOLUTION, CASE_LINEAR, \
+            CASE_DISCRIMINANT_ZERO, CASE_DISCRIMINANT_POSITIVE, CASE_DISCRIMINANT_NEGATIVE
+
+        coefficients = np.array([(0.0, 0.0, 32.1), (0.0, 0.0, 1e-29), (0.0, 2.3, 32.1), (1.0, -6.0, 9.0),
+                                 (1.0, 1.0, -6.0), (-2.1, 8.4, -27.3)],
+                                dtype=[('a', 'f8'), ('b', 'f8'), ('c', 'f8')])
+        result = solve_many(coefficients)
+        assert list(result.cases) == [CASE_NO_SOLUTIONS, CASE_ANY_SOLUTION, CASE_LINEAR, CASE_DISCRIMINANT_ZERO,
+                                      CASE_DISCRIMINANT_POSITIVE, CASE_DISCRIMINANT_NEGATIVE]
+        assert np.isnan(result.roots_real[:2]).all()
+        assert np.allclose(result.roots_real[2:], [[-32.1 / 2.3, np.nan], [3.0, 3.0], [-3.0, 2.0], [2.0, 2.0]],
+                           equal_nan=True)
+        assert np.allclose(result.roots_imaginary[2:], [[0.0, np.nan], [0.0, 0.0], [0.0, 0.0], [3.0, -3.0]],
+                           equal_nan=True)
+        errors = residuals(coefficients['a'], coefficients['b'], coefficients['c'], result)
+        assert np.isnan(errors[:2]).all() and np.isnan(errors[2, 1]) and (errors[3:] < 1e-12).all()
+
+    def test_solve_many_blocks(self):
+        np = pytest.importorskip('numpy')
+        from src.vector_solver import solve_many, BLOCK_SIZE, CASE_DISCRIMINANT_POSITIVE
+
+        size = 2 * BLOCK_SIZE + 3
+        result = solve_many(np.ones(size), 1.0, -np.arange(1.0, size + 1.0))
+        assert (result.cases == CASE_DISCRIMINANT_POSITIVE).all()
+        roots = result.roots_real
+        assert np.allclose(roots * roots + roots, np.arange(1.0, size + 1.0)[:, np.newaxis])
+
+
+class TestEvaluator:
+    def test_compiled_polynomial(self):
+        polynomial = Polynomial.from_equation('X^4 - 3 * X^2 + 2 * X = 5', max_degree=None)
+        compiled = polynomial.compile()
+        assert compiled.coefficients == [-5.0, 2.0, -3.0, 0.0, 1.0] and polynomial.compile() is compiled
+        assert compiled(2) == 3.0 and compiled(RationalNumber(1, 2)) == -4.6875
+        assert compiled(ComplexNumber(0.0, 1.0)) == -1 + 2j
+        assert compile_polynomial({}).degree == 0 and compile_polynomial({0.0: 2.0})(1j) == 2 + 0j
+        assert compile_polynomial({200.0: 1.0, 0.0: -1.0})(1.0) == 0.0
+        solution = EquationSolver(polynomial.multipliers).solve()
+        assert all(residual < 1e-9 for residual in compiled.residuals(solution))
+        polynomial.add_term(0.0, 5.0)
+        assert polynomial.compile() is not compiled and polynomial.compile()(2) == 8.0
+        with pytest.raises(ValueError):
+            compile_polynomial({0.5: 1.0})
+
+    def test_evaluate_many(self):
+        np = pytest.importorskip('numpy')
+        from src.evaluator import BLOCK_SIZE
+
+        compiled = compile_polynomial({3.0: 2.0, 1.0: -1.0, 0.0: 0.5})
+        xs = np.linspace(-3.0, 3.0, 5 * (BLOCK_SIZE // 2 + 1)).reshape(-1, 5)
+        values = compiled.evaluate_many(xs)
+        assert values.shape == xs.shape and np.allclose(values, 2 * xs ** 3 - xs + 0.5)
+        points = np.array([1j, 1 + 1j, -2.0])
+        assert np.allclose(compiled.evaluate_many(points), [compiled(complex(x)) for x in points])
+        out = np.empty(3)
+        assert compiled.evaluate_many([0.0, 1.0, 2.0], out=out) is out and out.tolist() == [0.5, 1.5, 14.5]
+        with pytest.raises(ValueError):
+            compiled.evaluate_many([0.0, 1.0], out=out)
+
+
+class TestExpressionDag:
+    def test_shared_nodes(self):
+        table = ConstantTable()
+        chain = table.chain(['2', '3', '2'])
+        assert chain.value == 512.0 and str(chain) == '2^3^2'
+        assert table.chain(['3', '2']) is chain.exponent
+        assert table.chain(['2', '3', '2']) is chain
+        assert table.stats()['misses'] == 3 and table.stats()['hits'] == 5
+        assert table.chain(['2', '3', '2'], exact=True).value == RationalNumber(512)
+        assert len(table) == 6
+
+    def test_parser_uses_table(self):
+        table = ConstantTable(max_size=8)
+        equations = ['2^2^0.5 * X^1^1 + 2^2^0.5 = 0', '2^2^0.5 * X = 1', '3 * X + 4 + 5 + 6 = 7']
+        for equation in equations:
+            equation_parser = EquationParser(equation, constants=table)
+            equation_parser.parse_equation()
+            reference = EquationParser(equation, constants=ConstantTable(0))
+            reference.parse_equation()
+            assert equation_parser.multipliers == reference.multipliers
+        assert table.hits > 0 and table.evictions > 0 and len(table.nodes()) == 8
+        with pytest.raises(ValueError):
+            EquationParser('2^X = 0', constants=table).parse_equation()
+
+
+class TestEquationCache:
+    def test_hits_and_misses(self):
+        cache = EquationCache(max_size=2)
+        entry = cache.parse('X^2 - 4 = 0')
+        assert entry.coefficients == (-4.0, 0.0, 1.0)
+        assert cache.parse(' X^2-4 =0 ') is entry
+        assert cache.parse('X^2 - 4 = 0', max_degree=None) is not entry
+        assert cache.stats() == {'size': 2, 'max_size': 2, 'hits': 1, 'misses': 2, 'evictions': 0}
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                cache.parse('X^3 = 0')
+        assert cache.stats() == {'size': 2, 'max_size': 2, 'hits': 2, 'misses': 3, 'evictions': 1}
+
+    def test_eviction_policies(self):
+        for policy, expected_keys in [('lru', ['1=0', '3=0']), ('fifo', ['2=0', '3=0'])]:
+            cache = EquationCache(max_size=2, policy=policy)
+            for equation in ['1=0', '2=0', '1=0', '3=0']:
+                cache.parse(equation)
+            assert [key[0] for key in cache.entries] == expected_keys
+
+    def test_tightened_limits(self):
+        cache = EquationCache()
+        equation = '(X + 1)^20 = 0'
+        assert cache.parse(equation, None).coefficients[20] == 1.0
+        try:
+            limits.configure(Limits(max_operations=100))
+            with pytest.raises(LimitExceeded):
+                cache.parse(equation, None)
+            record = next(solve_equations([(1, equation)], None, cache))
+            assert record['error_type'] == 'LimitExceeded'
+        finally:
+            limits.configure()
+        assert cache.parse(equation, None).coefficients[20] == 1.0
+        assert cache.stats()['hits'] == 1
+
+    def test_solutions_are_cached(self):
+        cache = EquationCache()
+        records = list(solve_equations([(1, 'X^2 = 1'), (2, 'X^2=1')], cache=cache))
+        assert records[0]['roots'] == records[1]['roots'] == [[1.0, 0.0], [-1.0, 0.0]]
+        assert cache.parse('X^2=1').solution.kind == 'two_real' and cache.stats()['hits'] == 2
+
+
+class TestNumeric:
+    @staticmethod
+    def relative_error(actual: float, expected: float) -> float:
+        if actual == expected:
+            return 0.0
+        return abs(actual - expected) / abs(expected)
+
+    def test_against_math(self):
+        generator = random.Random(0)
+        for _ in range(5000):
+            num = math.exp(generator.uniform(-700.0, 700.0))
+            assert self.relative_error(numeric.sqrt(num), math.sqrt(num)) < 4e-16
+            assert abs(numeric.log(num) - math.log(num)) < 4e-16 * max(1.0, abs(math.log(num)))
+            exponent = generator.uniform(-700.0, 700.0)
+            assert self.relative_error(numeric.exp(exponent), math.exp(exponent)) < 1e-15
+            base, degree = math.exp(generator.uniform(-5.0, 5.0)), generator.uniform(-100.0, 100.0)
+            assert self.relative_error(numeric.power(base, degree), math.pow(base, degree)) < 1e-13
+            assert self.relative_error(numeric.int_power(base, int(degree)), math.pow(base, int(degree))) < 1e-13
+
+    def test_edge_cases(self):
+        assert numeric.int_power(2.0, 10) == 1024.0
+        assert numeric.int_power(3.0, -2) == 1 / 9
+        assert numeric.power(2.0, 1024.0) == float('inf')
+        assert numeric.power(2.0, -1100.0) == 0.0
+        assert numeric.power(4.0, -0.5) == 0.5
+        assert numeric.exp(0.0) == 1.0 and numeric.log(1.0) == 0.0
+        assert numeric.sqrt(5e-324) == math.sqrt(5e-324)
+        with pytest.raises(ValueError):
+            numeric.log(0.0)
+        with pytest.raises(ValueError):
+            numeric.sqrt(-1.0)
+
+
+class TestServer:
+    def test_line_protocol(self):
+        async def exchange():
+            equation_server = EquationServer()
+            server = await equation_server.start('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b'X^2 = 4\n\nX^3 = 0\n')
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in range(2)]
+                writer.close()
+                await writer.wait_closed()
+            return responses
+
+        responses = asyncio.run(exchange())
+        assert responses[0]['kind'] == 'two_real' and responses[0]['roots'] == [[2.0, 0.0], [-2.0, 0.0]]
+        assert responses[0]['latency_us'] >= 0.0
+        assert responses[1]['error_type'] == 'ValueError'
+
+    def test_long_lines_and_broken_pool(self):
+        async def exchange(equation_server, requests, count):
+            server = await equation_server.start('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=1 << 20)
+                writer.write(requests)
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in range(count)]
+                writer.close()
+                await writer.wait_closed()
+            return responses
+
+        long_equation = ' + '.join(['X'] * 20000) + ' = 0'
+        responses = asyncio.run(exchange(EquationServer(), long_equation.encode() + b'\nX^2 = 4\n', 2))
+        assert responses[0]['roots'] == [[0.0, 0.0]] and responses[1]['roots'] == [[2.0, 0.0], [-2.0, 0.0]]
+        try:
+            limits.configure(Limits(max_length=1000))
+            responses = asyncio.run(exchange(EquationServer(), b'X' * 5000 + b'\nX^2 = 4\n', 2))
+        finally:
+            limits.configure()
+        assert responses[0]['error_type'] == 'LimitExceeded' and '5000 > 1000' in responses[0]['error']
+        assert responses[1]['roots'] == [[2.0, 0.0], [-2.0, 0.0]]
+
+        equation_server = EquationServer(workers=2)
+        try:
+            broken = equation_server.executor
+            with pytest.raises(Exception):
+                broken.submit(os._exit, 1).result()
+            responses = asyncio.run(exchange(equation_server, b'X^2 = 4\nX^2 = 9\n', 2))
+            assert responses[0]['error_type'] == 'BrokenProcessPool'
+            assert equation_server.executor is not broken and responses[1]['roots'] == [[3.0, 0.0], [-3.0, 0.0]]
+        finally:
+            equation_server.close()
+
+    def test_repl(self):
+        output = io.StringIO()
+        run_repl(input_stream=io.StringIO('X = 2\n\nX^^2 = 0\nexit\nX = 3\n'), output=output)
+        assert 'Решение данного уравнения: X = 2.0' in output.getvalue().splitlines()
+        assert 'Error happened: Уравнение некорректно' in output.getvalue()
+        assert 'X = 3.0' not in output.getvalue()
+        output = io.StringIO()
+        run_repl(cache_size=7, input_stream=io.StringIO('X^2 = 4\nX^2=4\n'), output=output)
+        assert output.getvalue().count('x1 = -2.0') == 2
+        cache = get_process_cache(7)
+        assert cache.stats()['hits'] == 1 and [entry.solution.kind for entry in cache.entries.values()] == ['two_real']
+        output = io.StringIO()
+        run_repl(input_stream=io.StringIO('a = 1/3\na * 3 = ?\nX^2 + 10^155 * X = 0\n'), output=output, exact=True)
+        lines = output.getvalue().splitlines()
+        assert lines[2] == '> 1' and lines[5:7] == ['x0 = 0.0', 'x1 = -1e+155']
+
+
+def solve_or_crash(chunk, max_degree, cache_size, collect_stats=False):
+    """
+    batch.solve_chunk that kills its worker process on the job `crash`
+    """
+    if any(equation == 'crash' for _, equation in chunk):
+        os._exit(1)
+    if any(equation == 'fail' for _, equation in chunk):
+        raise RuntimeError(f'job failed in process {os.getpid()}')
+    return solve_chunk(chunk, max_degree, cache_size, collect_stats)
+
+
+class TestJobQueue:
+    def test_memory_broker_retries(self):
+        calls = []
+
+        def flaky(chunk, max_degree, cache_size, collect_stats=False):
+            calls.append(len(chunk))
+            if len(calls) == 1 or any(equation == 'X^2 = 9' for _, equation in chunk):
+                raise RuntimeError('worker crashed')
+            return solve_chunk(chunk, max_degree, cache_size, collect_stats)
+
+        async def work():
+            broker = MemoryBroker()
+            ids = await broker.put(['X^2 = 4', '2 * X = 1', 'X^^2 = 0', 'X^2 = 9'])
+            worker = JobWorker(broker, batch_size=1, max_in_flight=2, max_attempts=2, ack_batch_size=2, solve=flaky)
+            return ids, broker, await worker.run(until_idle=True), await broker.counts()
+
+        ids, broker, metrics, counts = asyncio.run(work())
+        assert counts == {'queued': 0, 'running': 0, 'done': 3, 'failed': 1}
+        assert broker.results[ids[0]] == {'id': ids[0], 'equation': 'X^2 = 4', 'kind': 'two_real', 'degree': 2,
+                                          'coefficients': [-4.0, 0.0, 1.0], 'roots': [[2.0, 0.0], [-2.0, 0.0]]}
+        assert broker.results[ids[2]]['error_type'] == 'ValueError'
+        assert broker.errors[ids[3]] == 'RuntimeError: worker crashed'
+        # the first batch fails as a whole, X^2 = 9 also fails alone: it is retried once, then marked failed
+        assert [metrics[name] for name in ('done', 'errors', 'isolated', 'retried', 'failed')] == [3, 1, 3, 1, 1]
+        assert metrics['latency_p99_ms'] >= metrics['latency_p50_ms'] >= 0.0 and len(calls) == 8
+
+    def test_crashed_pool(self):
+        async def work():
+            broker = MemoryBroker()
+            await broker.put(['crash' if i % 50 == 0 else f'X = {i}' for i in range(200)])
+            worker = JobWorker(broker, workers=4, batch_size=4, solve=solve_or_crash)
+            try:
+                return broker, await worker.run(until_idle=True)
+            finally:
+                worker.close()
+
+        broker, metrics = asyncio.run(work())
+        assert sorted(broker.errors) == [0, 50, 100, 150] and len(broker.results) == 196
+        assert all(broker.results[i]['roots'] == [[float(i), 0.0]] for i in broker.results)
+        assert metrics['failed'] == 4 and metrics['retried'] == 8 and metrics['done'] == 196
+
+    def test_quarantine_pool(self):
+        async def work(workers):
+            broker = MemoryBroker()
+            await broker.put(['X = 1', 'fail', 'X = 2'])
+            worker = JobWorker(broker, workers=workers, batch_size=3, max_attempts=1, solve=solve_or_crash)
+            try:
+                metrics = await worker.run(until_idle=True)
+                quarantine = worker.quarantine
+                return broker, metrics, quarantine and (quarantine._max_workers, worker.executor._max_workers)
+            finally:
+                worker.close()
+
+        broker, metrics, pools = asyncio.run(work(3))
+        assert pools == (1, 3) and metrics['isolated'] == 3 and metrics['failed'] == 1
+        assert sorted(broker.results) == [0, 2] and str(os.getpid()) not in broker.errors[1]
+        broker, metrics, pools = asyncio.run(work(1))
+        assert pools is None and sorted(broker.results) == [0, 2]
+        assert broker.errors[1] == f'RuntimeError: job failed in process {os.getpid()}'
+
+    def test_sqlite_broker(self, tmp_path):
+        path = str(tmp_path / 'jobs.db')
+        assert enqueue_file(path, io.StringIO('X^2 = 4\n\n2 * X = 1\nX^^2 = 0\n' * 50)) == 150
+        output = io.StringIO()
+        metrics = consume_file(path, batch_size=16, output=output)
+        assert json.loads(output.getvalue())['done'] == metrics['done'] == 150
+        assert metrics['batches'] == 10 and metrics['acks'] < 150 and metrics['errors'] == 50
+        broker = SQLiteBroker(path)
+        results = list(broker.results())
+        assert asyncio.run(broker.counts()) == {'queued': 0, 'running': 0, 'done': 150, 'failed': 0}
+        assert results[1][:2] == (2, '2 * X = 1') and results[1][2]['roots'] == [[0.5, 0.0]]
+
+        async def lease():
+            jobs = await broker.fetch(10)
+            assert not jobs
+            await broker.put(['X = 1'])
+            leased = SQLiteBroker(path, lease=0.0)
+            taken, again = await leased.fetch(10), await leased.fetch(10, timeout=0.01)
+            await leased.nack(again, 'ошибка', max_attempts=1)
+            counts = await leased.counts()
+            await leased.close()
+            await broker.close()
+            return taken, again, counts
+
+        taken, again, counts = asyncio.run(lease())
+        assert [job.equation for job in taken] == [job.equation for job in again] == ['X = 1']
+        assert counts['failed'] == 1
+
+
+class TestProfiling:
+    def test_counters_and_timers(self):
+        profiling.enable_stats()
+        try:
+            equation_parser: EquationParser = EquationParser('2^2^0.5 * X^2 - 4 = 0')
+            equation_parser.parse_equation()
+            EquationSolver(equation_parser.multipliers).solve()
+        finally:
+            collected = profiling.disable_stats()
+        assert collected.counters['pow_calls'] == 3 and collected.maxima['pow_chain_depth'] == 2
+        assert collected.counters['sqrt_calls'] == 1 and collected.counters['tokens'] > 0
+        assert collected.as_dict()['timers']['parse']['calls'] == 1
+        metrics = collected.to_prometheus()
+        assert 'computor_pow_calls_total 3' in metrics
+        assert 'computor_stage_calls_total{stage="solve"} 1' in metrics
+        assert profiling.stats is None
+
+    def test_batch_merges_worker_stats(self):
+        profiling.enable_stats()
+        try:
+            records = list(solve_equations_parallel(enumerate(['X^2 = 4', 'X = 1', 'X^2 = 4'], start=1), workers=2,
+                                                    chunk_size=1, cache_size=16))
+        finally:
+            collected = profiling.disable_stats()
+        assert len(records) == 3
+        assert collected.counters['cache_misses'] + collected.counters.get('cache_hits', 0) == 3
+        assert collected.timers['solve'][0] == collected.counters['cache_misses']
+        worker_gauges = {name: value for name, value in collected.gauges.items() if name.startswith('worker_')}
+        assert worker_gauges and all(name.split('_', 2)[2].startswith('cache_') for name in worker_gauges)
+        assert sum(value for name, value in worker_gauges.items() if name.endswith('_misses')) == \
+            collected.counters['cache_misses']
+        merged = profiling.Stats()
+        merged.merge({'gauges': {'worker_1_cache_size': 2}})
+        merged.merge({'gauges': {'worker_1_cache_size': 3, 'worker_2_cache_size': 1}})
+        assert merged.gauges == {'worker_1_cache_size': 3, 'worker_2_cache_size': 1}
+        assert 'computor_worker_2_cache_size 1' in merged.to_prometheus()
+
+    def test_server_stats_request(self):
+        async def exchange():
+            equation_server = EquationServer()
+            server = await equation_server.start('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b'X^2 = 9\nstats\nmetrics\n')
+                await writer.drain()
+                await reader.readline()
+                stats = json.loads(await reader.readline())
+                metrics = (await reader.readuntil(b'# EOF\n')).decode()
+                writer.close()
+                await writer.wait_closed()
+            return stats, metrics
+
+        profiling.enable_stats()
+        try:
+            stats, metrics = asyncio.run(exchange())
+        finally:
+            profiling.disable_stats()
+        assert stats['stats']['timers']['solve']['calls'] >= 1
+        assert 'computor_cache_max_size 4096' in metrics
+
+
+class TestHarness:
+    def test_compare(self):
+        import importlib.util
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'benchmarks', 'harness.py')
+        spec = importlib.util.spec_from_file_location('harness', path)
+        harness = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(harness)
+        baseline = {name: {'ops_per_second': 1000.0} for name in ('inside', 'outside', 'faster')}
+        results = {'inside': {'ops_per_second': 801.0}, 'outside': {'ops_per_second': 799.0},
+                   'faster': {'ops_per_second': 1500.0}, 'new': {'ops_per_second': 1.0}}
+        assert harness.compare(results, baseline, 0.2) == ['outside: 1,000 -> 799 ops/s (-20.1%)']
+        assert harness.compare(results, baseline, 0.21) == []
+
+
+class TestStartup:
+    # cumulative import time of the modules needed to solve one equation, far above the usual 20-30 ms
+    IMPORT_TIME_BUDGET_US = 150_000
+    LAZY_MODULES = ('click', 'asyncio', 'concurrent.futures', 'logging', 'json', 'csv', 'src.batch', 'src.server',
+                    'src.cli')
+
+    def test_fast_arguments(self):
+        assert parse_fast_arguments(['--verbose', 'X = 1', '--format', 'json']) == {
+            'equation': 'X = 1', 'verbose': True, 'any_degree': False, 'exact': False, 'output_format': 'json'}
+        assert parse_fast_arguments(['--any-degree', '--exact', '--format=csv', 'X = 1'])['output_format'] == 'csv'
+        assert parse_fast_arguments(['--batch']) is None
+        assert parse_fast_arguments(['--format', 'xml', 'X = 1']) is None
+        assert parse_fast_arguments(['X = 1', 'X = 2']) is None
+        assert parse_fast_arguments([]) is None
+
+    def test_import_time_budget(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(root, 'computor.py'), 'X^2 = 4'],
+                                cwd=root, capture_output=True, text=True, check=True)
+        assert 'x0 = 2.0' in result.stdout
+        imports = {}
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line and 'self [us]' not in line:
+                _, cumulative, name = line.split('|')
+                imports[name.strip()] = int(cumulative)
+        assert 'src.equation_solver' in imports
+        for module in self.LAZY_MODULES:
+            assert module not in imports
+        assert imports['src.entry'] + imports['src.equation_parser'] + imports['src.equation_solver'] < \
+            self.IMPORT_TIME_BUDGET_US
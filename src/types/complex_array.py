@@ -0,0 +1,184 @@
+import sys
+from array import array
+from math import hypot
+from typing import Iterable, Iterator, Union
+
+from src.types.complex_number import ComplexNumber, as_pair
+
+# 'CA' + format version, then the length as 8 bytes and the real and imaginary parts as doubles, all little-endian
+MAGIC = b'CA\x01\x00'
+
+
+class ComplexArray:
+    """
+    Complex numbers stored as two contiguous `array('d')` buffers of real and imaginary parts
+    (16 bytes per number instead of a ComplexNumber object per root).
+    Arithmetic works element-wise with another ComplexArray of the same length or with one scalar operand
+    (ComplexNumber, RationalNumber, int, float, complex) and returns a new array
+    """
+    __slots__ = ('real', 'imaginary')
+
+    def __init__(self, real: Iterable[float] = (), imaginary: Iterable[float] = None) -> None:
+        self.real = array('d', real)
+        self.imaginary = array('d', bytes(8 * len(self.real))) if imaginary is None else array('d', imaginary)
+        if len(self.real) != len(self.imaginary):
+            raise ValueError('Длины вещественных и мнимых частей не совпадают')
+
+    @classmethod
+    def from_numbers(cls, numbers: Iterable[Union[ComplexNumber, complex, float]]) -> 'ComplexArray':
+        result = cls()
+        result.extend(numbers)
+        return result
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ComplexArray':
+        if data[:4] != MAGIC:
+            raise ValueError('Некорректный формат массива комплексных чисел')
+        length = int.from_bytes(data[4:12], 'little')
+        if len(data) != 12 + 16 * length:
+            raise ValueError('Некорректная длина массива комплексных чисел')
+        result = cls()
+        result.real.frombytes(data[12:12 + 8 * length])
+        result.imaginary.frombytes(data[12 + 8 * length:])
+        if sys.byteorder != 'little':
+            result.real.byteswap()
+            result.imaginary.byteswap()
+        return result
+
+    def to_bytes(self) -> bytes:
+        real, imaginary = self.real, self.imaginary
+        if sys.byteorder != 'little':
+            real, imaginary = array('d', real), array('d', imaginary)
+            real.byteswap()
+            imaginary.byteswap()
+        return MAGIC + len(self).to_bytes(8, 'little') + real.tobytes() + imaginary.tobytes()
+
+    def to_numpy(self):
+        """
+        complex128 copy of the array, requires numpy
+        """
+        import numpy as np
+        result = np.empty(len(self), dtype=np.complex128)
+        result.real = np.frombuffer(self.real, dtype=np.float64)
+        result.imag = np.frombuffer(self.imaginary, dtype=np.float64)
+        return result
+
+    def append(self, number: Union[ComplexNumber, complex, float]) -> None:
+        pair = as_pair(number)
+        if pair is None:
+            raise TypeError(f'Нельзя добавить {type(number).__name__} в массив комплексных чисел')
+        self.real.append(pair[0])
+        self.imaginary.append(pair[1])
+
+    def extend(self, numbers: Iterable[Union[ComplexNumber, complex, float]]) -> None:
+        for number in numbers:
+            self.append(number)
+
+    def __len__(self) -> int:
+        return len(self.real)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ComplexArray(self.real[index], self.imaginary[index])
+        return ComplexNumber(self.real[index], self.imaginary[index])
+
+    def __setitem__(self, index: int, number: Union[ComplexNumber, complex, float]) -> None:
+        pair = as_pair(number)
+        if pair is None:
+            raise TypeError(f'Нельзя записать {type(number).__name__} в массив комплексных чисел')
+        self.real[index], self.imaginary[index] = pair
+
+    def __iter__(self) -> Iterator[ComplexNumber]:
+        return map(ComplexNumber, self.real, self.imaginary)
+
+    def __eq__(self, other):
+        if not isinstance(other, ComplexArray):
+            return NotImplemented
+        return self.real == other.real and self.imaginary == other.imaginary
+
+    def modulus(self) -> array:
+        return array('d', map(hypot, self.real, self.imaginary))
+
+    def modulus_numpy(self):
+        """
+        float64 array of the moduli computed with numpy.hypot, requires numpy
+        """
+        import numpy as np
+        return np.hypot(np.frombuffer(self.real, dtype=np.float64), np.frombuffer(self.imaginary, dtype=np.float64))
+
+    def conjugate(self) -> 'ComplexArray':
+        return ComplexArray(self.real, [-imaginary for imaginary in self.imaginary])
+
+    def __neg__(self) -> 'ComplexArray':
+        return ComplexArray([-real for real in self.real], [-imaginary for imaginary in self.imaginary])
+
+    def operands(self, other):
+        """
+        Sequences of the real and imaginary parts of `other` matching self element-wise, None for unsupported types
+        """
+        if isinstance(other, ComplexArray):
+            if len(other) != len(self):
+                raise ValueError('Длины массивов комплексных чисел не совпадают')
+            return other.real, other.imaginary
+        pair = as_pair(other)
+        if pair is None:
+            return None
+        return [pair[0]] * len(self), [pair[1]] * len(self)
+
+    def __add__(self, other):
+        operands = self.operands(other)
+        if operands is None:
+            return NotImplemented
+        other_real, other_imaginary = operands
+        return ComplexArray([a + b for a, b in zip(self.real, other_real)],
+                            [a + b for a, b in zip(self.imaginary, other_imaginary)])
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        operands = self.operands(other)
+        if operands is None:
+            return NotImplemented
+        other_real, other_imaginary = operands
+        return ComplexArray([a - b for a, b in zip(self.real, other_real)],
+                            [a - b for a, b in zip(self.imaginary, other_imaginary)])
+
+    def __rsub__(self, other):
+        operands = self.operands(other)
+        if operands is None:
+            return NotImplemented
+        return ComplexArray(*operands) - self
+
+    def __mul__(self, other):
+        operands = self.operands(other)
+        if operands is None:
+            return NotImplemented
+        real, imaginary = [], []
+        for a, b, c, d in zip(self.real, self.imaginary, *operands):
+            real.append(a * c - b * d)
+            imaginary.append(a * d + b * c)
+        return ComplexArray(real, imaginary)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        operands = self.operands(other)
+        if operands is None:
+            return NotImplemented
+        real, imaginary = [], []
+        for a, b, c, d in zip(self.real, self.imaginary, *operands):
+            denominator = c * c + d * d
+            if denominator == 0:
+                raise ZeroDivisionError("an attempt to divide by zero...")
+            real.append((a * c + b * d) / denominator)
+            imaginary.append((b * c - a * d) / denominator)
+        return ComplexArray(real, imaginary)
+
+    def __rtruediv__(self, other):
+        operands = self.operands(other)
+        if operands is None:
+            return NotImplemented
+        return ComplexArray(*operands) / self
+
+    def __repr__(self) -> str:
+        return f'ComplexArray({list(self.real)!r}, {list(self.imaginary)!r})'
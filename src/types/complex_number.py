@@ -1,62 +1,226 @@
+from math import atan2, cos, exp, hypot, log, sin
+from typing import Optional, Tuple
+
 from src.types.rational_number import RationalNumber
-from src.utils import pow, sqrt, floor
+from src.utils import floor
+
+# integer powers up to this exponent are computed by squaring, larger ones through the polar form
+MAX_INTEGER_EXPONENT = 1 << 10
+
+
+def as_pair(other) -> Optional[Tuple[float, float]]:
+    """
+    Real and imaginary parts of a supported operand, None for unsupported types
+    """
+    if isinstance(other, ComplexNumber):
+        return other.real, other.imaginary
+    if isinstance(other, (int, float)):
+        return float(other), 0.0
+    if isinstance(other, RationalNumber):
+        return other.number, 0.0
+    if isinstance(other, complex):
+        return other.real, other.imag
+    return None
+
+
+def divide(real: float, imaginary: float, other_real: float, other_imaginary: float) -> Tuple[float, float]:
+    denominator = other_real * other_real + other_imaginary * other_imaginary
+    if denominator == 0:
+        raise ZeroDivisionError("an attempt to divide by zero...")
+    return (
+        (real * other_real + imaginary * other_imaginary) / denominator,
+        (imaginary * other_real - real * other_imaginary) / denominator
+    )
+
+
+def power(real: float, imaginary: float, other_real: float, other_imaginary: float) -> Tuple[float, float]:
+    """
+    (real + imaginary * i)^(other_real + other_imaginary * i): integer exponents are raised by squaring,
+    the rest goes through exp(exponent * log(base))
+    """
+    if other_imaginary == 0.0 and other_real == int(other_real) and abs(other_real) <= MAX_INTEGER_EXPONENT:
+        exponent = int(other_real)
+        if exponent < 0:
+            real, imaginary = divide(1.0, 0.0, real, imaginary)
+            exponent = -exponent
+        result_real, result_imaginary = 1.0, 0.0
+        while exponent:
+            if exponent & 1:
+                result_real, result_imaginary = (result_real * real - result_imaginary * imaginary,
+                                                 result_real * imaginary + result_imaginary * real)
+            exponent >>= 1
+            if exponent:
+                real, imaginary = real * real - imaginary * imaginary, 2.0 * real * imaginary
+        return result_real, result_imaginary
+    if real == 0.0 and imaginary == 0.0:
+        if other_real > 0.0:
+            return 0.0, 0.0
+        raise ZeroDivisionError("an attempt to divide by zero...")
+    log_modulus, argument = log(hypot(real, imaginary)), atan2(imaginary, real)
+    modulus = exp(other_real * log_modulus - other_imaginary * argument)
+    angle = other_imaginary * log_modulus + other_real * argument
+    return modulus * cos(angle), modulus * sin(angle)
 
 
 class ComplexNumber:
-    def __init__(self, real: float, imaginary: float):
+    """
+    Mutable complex number: in-place operators (`+=`, `*=`, ...) update the instance instead of creating a new one.
+    Works with other ComplexNumbers, RationalNumbers, ints, floats and builtin complex numbers,
+    other operands make the operators return NotImplemented
+    """
+    __slots__ = ('real', 'imaginary')
+
+    def __init__(self, real: float = 0.0, imaginary: float = 0.0):
         self.real: float = real
         self.imaginary: float = imaginary
 
+    @property
+    def modulus(self) -> float:
+        return hypot(self.real, self.imaginary)
+
+    @property
+    def argument(self) -> float:
+        return atan2(self.imaginary, self.real)
+
+    def conjugate(self) -> 'ComplexNumber':
+        return ComplexNumber(self.real, -self.imaginary)
+
+    def __neg__(self) -> 'ComplexNumber':
+        return ComplexNumber(-self.real, -self.imaginary)
+
+    def __pos__(self) -> 'ComplexNumber':
+        return ComplexNumber(self.real, self.imaginary)
+
+    def __abs__(self) -> float:
+        return self.modulus
+
+    def __bool__(self) -> bool:
+        return self.real != 0.0 or self.imaginary != 0.0
+
+    def __complex__(self) -> complex:
+        return complex(self.real, self.imaginary)
+
     def __add__(self, other):
-        if isinstance(other, ComplexNumber):
-            return ComplexNumber(self.real + other.real, self.imaginary + other.imaginary)
-        elif isinstance(other, RationalNumber):
-            return ComplexNumber(self.real + other.number, self.imaginary)
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(self.real + pair[0], self.imaginary + pair[1])
+
+    __radd__ = __add__
 
     def __sub__(self, other):
-        if isinstance(other, ComplexNumber):
-            return ComplexNumber(self.real - other.real, self.imaginary - other.imaginary)
-        elif isinstance(other, RationalNumber):
-            return ComplexNumber(self.real - other.number, self.imaginary)
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(self.real - pair[0], self.imaginary - pair[1])
+
+    def __rsub__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(pair[0] - self.real, pair[1] - self.imaginary)
 
     def __mul__(self, other):
-        if isinstance(other, ComplexNumber):
-            return ComplexNumber(
-                self.real * other.real - self.imaginary * other.imaginary,
-                self.real * other.imaginary + other.real * self.imaginary
-            )
-        elif isinstance(other, RationalNumber):
-            return ComplexNumber(self.real * other.number, self.imaginary * other.number)
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(
+            self.real * pair[0] - self.imaginary * pair[1],
+            self.real * pair[1] + pair[0] * self.imaginary
+        )
+
+    __rmul__ = __mul__
 
     def __truediv__(self, other):
-        if isinstance(other, ComplexNumber):
-            denominator: float = self.real * self.real + self.imaginary * self.imaginary
-            if denominator == 0:
-                raise ZeroDivisionError("an attempt to divide by zero...")
-            return ComplexNumber(
-                (self.real * other.real + self.imaginary * other.imaginary) / denominator,
-                (other.real * self.imaginary - self.real * other.imaginary) / denominator
-            )
-        elif isinstance(other, RationalNumber):
-            if other.number == 0:
-                raise ZeroDivisionError("an attempt to divide by zero...")
-            return ComplexNumber(self.real / other.number, self.imaginary / other.number)
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(*divide(self.real, self.imaginary, *pair))
+
+    def __rtruediv__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(*divide(*pair, self.real, self.imaginary))
 
     def __mod__(self, other):
-        if isinstance(other, ComplexNumber):
-            if other.modulus == 0:
-                raise ZeroDivisionError("an attempt to divide by zero...")
-            division_result: ComplexNumber = self / other
-            division_result: ComplexNumber = ComplexNumber(
-                floor(division_result.real),
-                floor(division_result.imaginary)
-            )
-            return self - other * division_result
+        """
+        Remainder of the Gaussian division: self - other * floor(self / other)
+        """
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        other = ComplexNumber(*pair)
+        division_result: ComplexNumber = self / other
+        division_result = ComplexNumber(floor(division_result.real), floor(division_result.imaginary))
+        return self - other * division_result
+
+    def __rmod__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(*pair) % self
 
     def __pow__(self, other, modulo=None):
-        if isinstance(other, ComplexNumber):
-            return pow(self.number, other.number)
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(*power(self.real, self.imaginary, *pair))
 
-    @property
-    def modulus(self) -> float:
-        return sqrt(self.real * self.real + self.imaginary * self.imaginary)
+    def __rpow__(self, other, modulo=None):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return ComplexNumber(*power(*pair, self.real, self.imaginary))
+
+    def __iadd__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        self.real += pair[0]
+        self.imaginary += pair[1]
+        return self
+
+    def __isub__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        self.real -= pair[0]
+        self.imaginary -= pair[1]
+        return self
+
+    def __imul__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        self.real, self.imaginary = (self.real * pair[0] - self.imaginary * pair[1],
+                                     self.real * pair[1] + pair[0] * self.imaginary)
+        return self
+
+    def __itruediv__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        self.real, self.imaginary = divide(self.real, self.imaginary, *pair)
+        return self
+
+    def __ipow__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        self.real, self.imaginary = power(self.real, self.imaginary, *pair)
+        return self
+
+    def __eq__(self, other):
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        return self.real == pair[0] and self.imaginary == pair[1]
+
+    def __repr__(self) -> str:
+        return f'ComplexNumber({self.real!r}, {self.imaginary!r})'
+
+    def __str__(self) -> str:
+        if self.imaginary < 0.0:
+            return f'{self.real} - {-self.imaginary} * i'
+        return f'{self.real} + {self.imaginary} * i'
@@ -0,0 +1,480 @@
+import functools
+import sys
+from array import array
+from operator import mul
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.types.complex_number import ComplexNumber, as_pair
+
+# number of columns of the right matrix multiplied by every row of the left one at a time
+BLOCK_SIZE = 64
+
+Scalar = Union[ComplexNumber, complex, float, int]
+
+
+@functools.lru_cache(maxsize=None)
+def optional_numpy():
+    """
+    The numpy module, or None if it is not installed (MatrixBatch falls back to loops over the matrices then)
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def multiply_blocked(left: Sequence[float], right: Sequence[float], rows: int, inner: int,
+                     columns: int) -> array:
+    """
+    Product of the row-major `rows x inner` and `inner x columns` matrices. `right` is transposed once
+    into column lists, then the result is filled by blocks of BLOCK_SIZE columns: a block of columns stays
+    in the cache while it is multiplied by every row of `left`, each element is one sum(map(mul, ...))
+    """
+    left_rows = [list(left[i * inner:(i + 1) * inner]) for i in range(rows)]
+    right_columns = [list(right[j::columns]) for j in range(columns)]
+    result = array('d', bytes(8 * rows * columns))
+    for column_start in range(0, columns, BLOCK_SIZE):
+        block = right_columns[column_start:column_start + BLOCK_SIZE]
+        for i, row in enumerate(left_rows):
+            start = i * columns + column_start
+            result[start:start + len(block)] = array('d', [sum(map(mul, row, column)) for column in block])
+    return result
+
+
+def decompose(values: Sequence[float], size: int) -> Tuple[List[float], List[int], int]:
+    """
+    LU decomposition with partial pivoting of a row-major square matrix: (L and U in one row-major list,
+    L has an implicit unit diagonal; the permutation of the rows; its sign). Raises ValueError if it is singular:
+    if a pivot is zero relative to the largest element, so the answer does not depend on the scale of the matrix
+    """
+    lu = list(values)
+    tolerance = size * sys.float_info.epsilon * max(map(abs, lu), default=0.0)
+    permutation = list(range(size))
+    sign = 1
+    for k in range(size):
+        pivot_row = max(range(k, size), key=lambda i: abs(lu[i * size + k]))
+        if abs(lu[pivot_row * size + k]) <= tolerance:
+            raise ValueError('Матрица вырождена')
+        if pivot_row != k:
+            lu[k * size:(k + 1) * size], lu[pivot_row * size:(pivot_row + 1) * size] = \
+                lu[pivot_row * size:(pivot_row + 1) * size], lu[k * size:(k + 1) * size]
+            permutation[k], permutation[pivot_row] = permutation[pivot_row], permutation[k]
+            sign = -sign
+        pivot = lu[k * size + k]
+        pivot_tail = lu[k * size + k + 1:(k + 1) * size]
+        for i in range(k + 1, size):
+            factor = lu[i * size + k] / pivot
+            lu[i * size + k] = factor
+            if factor:
+                start = i * size + k + 1
+                lu[start:(i + 1) * size] = [value - factor * other
+                                            for value, other in zip(lu[start:(i + 1) * size], pivot_tail)]
+    return lu, permutation, sign
+
+
+def substitute(lu: List[float], permutation: List[int], size: int, rhs: Sequence[float], count: int) -> List[float]:
+    """
+    Solves A * x = rhs for `count` right-hand sides (the columns of the row-major `size x count` rhs)
+    """
+    x = []
+    for i in range(size):
+        row = list(rhs[permutation[i] * count:(permutation[i] + 1) * count])
+        for k in range(i):
+            factor = lu[i * size + k]
+            if factor:
+                row = [value - factor * other for value, other in zip(row, x[k])]
+        x.append(row)
+    for i in range(size - 1, -1, -1):
+        row = x[i]
+        for k in range(i + 1, size):
+            factor = lu[i * size + k]
+            if factor:
+                row = [value - factor * other for value, other in zip(row, x[k])]
+        pivot = lu[i * size + i]
+        x[i] = [value / pivot for value in row]
+    return [value for row in x for value in row]
+
+
+def determinant_of(values: Sequence[float], size: int, offset: int = 0) -> float:
+    """
+    Determinant of the row-major square matrix starting at values[offset]
+    """
+    if size == 0:
+        return 1.0
+    if size == 1:
+        return values[offset]
+    if size == 2:
+        a, b, c, d = values[offset:offset + 4]
+        return a * d - b * c
+    if size == 3:
+        a, b, c, d, e, f, g, h, i = values[offset:offset + 9]
+        return a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+    try:
+        lu, _, sign = decompose(values[offset:offset + size * size], size)
+    except ValueError:
+        return 0.0
+    result = float(sign)
+    for i in range(size):
+        result *= lu[i * size + i]
+    return result
+
+
+class Matrix:
+    """
+    Dense `rows x columns` matrix stored row-major in a contiguous `array('d')` (`real`),
+    complex matrices also keep `imaginary` (None for real matrices).
+    `+`, `-`, `*` and `/` work element-wise with a matrix of the same shape or with a scalar
+    (int, float, RationalNumber, ComplexNumber, complex), `@` is the matrix product (blocked, see multiply_blocked).
+    LU decomposition, determinant, solve and inverse are defined for real square matrices
+    """
+    __slots__ = ('rows', 'columns', 'real', 'imaginary')
+
+    def __init__(self, rows: int, columns: int, real: Optional[Iterable[float]] = None,
+                 imaginary: Optional[Iterable[float]] = None) -> None:
+        if rows < 0 or columns < 0:
+            raise ValueError('Размеры матрицы не могут быть отрицательными')
+        self.rows = rows
+        self.columns = columns
+        self.real = array('d', bytes(8 * rows * columns)) if real is None else array('d', real)
+        self.imaginary = None if imaginary is None else array('d', imaginary)
+        if len(self.real) != rows * columns or self.imaginary is not None and len(self.imaginary) != len(self.real):
+            raise ValueError('Количество элементов не совпадает с размерами матрицы')
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Iterable[Scalar]]) -> 'Matrix':
+        real, imaginary, width, height = [], [], None, 0
+        for row in rows:
+            pairs = [as_pair(value) for value in row]
+            if None in pairs:
+                raise TypeError('Элементы матрицы должны быть числами')
+            if width is None:
+                width = len(pairs)
+            elif len(pairs) != width:
+                raise ValueError('Строки матрицы должны быть одной длины')
+            real.extend(pair[0] for pair in pairs)
+            imaginary.extend(pair[1] for pair in pairs)
+            height += 1
+        return cls(height, width or 0, real, imaginary if any(imaginary) else None)
+
+    @classmethod
+    def identity(cls, size: int) -> 'Matrix':
+        result = cls(size, size)
+        for i in range(size):
+            result.real[i * size + i] = 1.0
+        return result
+
+    @classmethod
+    def from_numpy(cls, values) -> 'Matrix':
+        import numpy as np
+        values = np.asarray(values)
+        rows, columns = values.shape
+        if np.iscomplexobj(values):
+            return cls(rows, columns, values.real.ravel().tolist(), values.imag.ravel().tolist())
+        return cls(rows, columns, array('d', np.ascontiguousarray(values, dtype=np.float64).tobytes()))
+
+    def to_numpy(self):
+        """
+        (rows, columns) float64 array sharing the buffer of a real matrix, a complex128 copy of a complex one
+        """
+        import numpy as np
+        real = np.frombuffer(self.real, dtype=np.float64).reshape(self.rows, self.columns)
+        if self.imaginary is None:
+            return real
+        return real + 1j * np.frombuffer(self.imaginary, dtype=np.float64).reshape(self.rows, self.columns)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.rows, self.columns
+
+    @property
+    def is_complex(self) -> bool:
+        return self.imaginary is not None
+
+    def index(self, position: Tuple[int, int]) -> int:
+        row, column = position
+        if not (0 <= row < self.rows and 0 <= column < self.columns):
+            raise IndexError(f'Индекс {position} вне матрицы {self.rows}x{self.columns}')
+        return row * self.columns + column
+
+    def __getitem__(self, position: Tuple[int, int]) -> Union[float, ComplexNumber]:
+        index = self.index(position)
+        if self.imaginary is None:
+            return self.real[index]
+        return ComplexNumber(self.real[index], self.imaginary[index])
+
+    def __setitem__(self, position: Tuple[int, int], value: Scalar) -> None:
+        pair = as_pair(value)
+        if pair is None:
+            raise TypeError(f'Нельзя записать {type(value).__name__} в матрицу')
+        index = self.index(position)
+        if pair[1] and self.imaginary is None:
+            self.imaginary = array('d', bytes(8 * len(self.real)))
+        self.real[index] = pair[0]
+        if self.imaginary is not None:
+            self.imaginary[index] = pair[1]
+
+    def to_rows(self) -> List[List[Union[float, ComplexNumber]]]:
+        return [[self[i, j] for j in range(self.columns)] for i in range(self.rows)]
+
+    def __iter__(self) -> Iterator[List[Union[float, ComplexNumber]]]:
+        return iter(self.to_rows())
+
+    def __eq__(self, other):
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        return (self.shape == other.shape and self.real == other.real and
+                (self.imaginary or array('d', bytes(8 * len(self.real)))) ==
+                (other.imaginary or array('d', bytes(8 * len(other.real)))))
+
+    def transpose(self) -> 'Matrix':
+        def transposed(values: array) -> List[float]:
+            return [values[i * self.columns + j] for j in range(self.columns) for i in range(self.rows)]
+        return Matrix(self.columns, self.rows, transposed(self.real),
+                      None if self.imaginary is None else transposed(self.imaginary))
+
+    def operands(self, other) -> Optional[Tuple[Sequence[float], Optional[Sequence[float]]]]:
+        """
+        Element-wise real and imaginary parts (None if real) of `other` matching self, None for unsupported types
+        """
+        if isinstance(other, Matrix):
+            if other.shape != self.shape:
+                raise ValueError(f'Размеры матриц не совпадают: {self.rows}x{self.columns} и '
+                                 f'{other.rows}x{other.columns}')
+            return other.real, other.imaginary
+        pair = as_pair(other)
+        if pair is None:
+            return None
+        size = len(self.real)
+        return [pair[0]] * size, [pair[1]] * size if pair[1] else None
+
+    def zeros(self) -> List[float]:
+        return [0.0] * len(self.real)
+
+    def combine(self, other, sign: float):
+        operands = self.operands(other)
+        if operands is None:
+            return NotImplemented
+        other_real, other_imaginary = operands
+        real = [a + sign * b for a, b in zip(self.real, other_real)]
+        if self.imaginary is None and other_imaginary is None:
+            return Matrix(self.rows, self.columns, real)
+        imaginary = [a + sign * b for a, b in zip(self.imaginary or self.zeros(), other_imaginary or self.zeros())]
+        return Matrix(self.rows, self.columns, real, imaginary)
+
+    def __add__(self, other):
+        return self.combine(other, 1.0)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self.combine(other, -1.0)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __neg__(self) -> 'Matrix':
+        return Matrix(self.rows, self.columns, [-value for value in self.real],
+                      None if self.imaginary is None else [-value for value in self.imaginary])
+
+    def __mul__(self, other):
+        operands = self.operands(other)
+        if operands is None:
+            return NotImplemented
+        other_real, other_imaginary = operands
+        if self.imaginary is None and other_imaginary is None:
+            return Matrix(self.rows, self.columns, [a * c for a, c in zip(self.real, other_real)])
+        real, imaginary = [], []
+        for a, b, c, d in zip(self.real, self.imaginary or self.zeros(), other_real, other_imaginary or self.zeros()):
+            real.append(a * c - b * d)
+            imaginary.append(a * d + b * c)
+        return Matrix(self.rows, self.columns, real, imaginary)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Matrix):
+            return NotImplemented
+        pair = as_pair(other)
+        if pair is None:
+            return NotImplemented
+        real, imaginary = pair
+        denominator = real * real + imaginary * imaginary
+        if denominator == 0:
+            raise ZeroDivisionError("an attempt to divide by zero...")
+        return self * ComplexNumber(real / denominator, -imaginary / denominator)
+
+    def __matmul__(self, other: 'Matrix') -> 'Matrix':
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        if self.columns != other.rows:
+            raise ValueError(f'Нельзя умножить матрицу {self.rows}x{self.columns} на {other.rows}x{other.columns}')
+        shape = (self.rows, self.columns, other.columns)
+        real = multiply_blocked(self.real, other.real, *shape)
+        if self.imaginary is None and other.imaginary is None:
+            return Matrix(self.rows, other.columns, real)
+        # (a + b * i)(c + d * i) = (ac - bd) + (ad + bc) * i with four real products
+        imaginary = array('d', bytes(8 * len(real)))
+        if self.imaginary is not None and other.imaginary is not None:
+            bd = multiply_blocked(self.imaginary, other.imaginary, *shape)
+            real = array('d', [value - other_value for value, other_value in zip(real, bd)])
+        if other.imaginary is not None:
+            imaginary = multiply_blocked(self.real, other.imaginary, *shape)
+        if self.imaginary is not None:
+            bc = multiply_blocked(self.imaginary, other.real, *shape)
+            imaginary = array('d', [value + other_value for value, other_value in zip(imaginary, bc)])
+        return Matrix(self.rows, other.columns, real, imaginary)
+
+    def check_real_square(self) -> None:
+        if self.imaginary is not None:
+            raise TypeError('LU-разложение определено только для вещественных матриц')
+        if self.rows != self.columns:
+            raise ValueError(f'Матрица {self.rows}x{self.columns} не квадратная')
+
+    def lu(self) -> Tuple['Matrix', List[int], int]:
+        """
+        (L and U in one matrix, L has an implicit unit diagonal; the row permutation; its sign)
+        """
+        self.check_real_square()
+        lu, permutation, sign = decompose(self.real, self.rows)
+        return Matrix(self.rows, self.columns, lu), permutation, sign
+
+    def determinant(self) -> float:
+        self.check_real_square()
+        return determinant_of(self.real, self.rows)
+
+    def solve(self, rhs: Union['Matrix', Sequence[float]]) -> Union['Matrix', List[float]]:
+        """
+        x with self @ x == rhs for a matrix or a vector (a sequence) rhs
+        """
+        self.check_real_square()
+        lu, permutation, _ = decompose(self.real, self.rows)
+        if isinstance(rhs, Matrix):
+            if rhs.rows != self.rows or rhs.imaginary is not None:
+                raise ValueError('Правая часть должна быть вещественной матрицей с тем же числом строк')
+            return Matrix(rhs.rows, rhs.columns, substitute(lu, permutation, self.rows, rhs.real, rhs.columns))
+        if len(rhs) != self.rows:
+            raise ValueError('Длина правой части не совпадает с размером матрицы')
+        return substitute(lu, permutation, self.rows, [float(value) for value in rhs], 1)
+
+    def inverse(self) -> 'Matrix':
+        return self.solve(Matrix.identity(self.rows))
+
+    def __repr__(self) -> str:
+        return f'Matrix({self.rows}, {self.columns}, {list(self.real)!r}, ' \
+               f'{None if self.imaginary is None else list(self.imaginary)!r})'
+
+    def __str__(self) -> str:
+        return '\n'.join('[ ' + ' , '.join(str(value) for value in row) + ' ]' for row in self.to_rows())
+
+
+class MatrixBatch:
+    """
+    `count` real `size x size` matrices in one contiguous `array('d')`, matrix after matrix (row-major),
+    for many small systems at once. to_numpy() exposes the buffer as a (count, size, size) array without copying;
+    with numpy installed determinants(), solve() and inverses() call the stacked numpy.linalg functions on it,
+    otherwise they loop over the matrices (determinants with closed formulas up to 3x3)
+    """
+    __slots__ = ('count', 'size', 'values')
+
+    def __init__(self, count: int, size: int, values: Optional[Iterable[float]] = None) -> None:
+        self.count = count
+        self.size = size
+        self.values = array('d', bytes(8 * count * size * size)) if values is None else array('d', values)
+        if len(self.values) != count * size * size:
+            raise ValueError('Количество элементов не совпадает с размерами пакета матриц')
+
+    @classmethod
+    def from_matrices(cls, matrices: Iterable[Matrix]) -> 'MatrixBatch':
+        values, count, size = array('d'), 0, None
+        for matrix in matrices:
+            matrix.check_real_square()
+            if size is None:
+                size = matrix.rows
+            elif matrix.rows != size:
+                raise ValueError('Матрицы пакета должны быть одного размера')
+            values.extend(matrix.real)
+            count += 1
+        return cls(count, size or 0, values)
+
+    def to_numpy(self):
+        import numpy as np
+        return np.frombuffer(self.values, dtype=np.float64).reshape(self.count, self.size, self.size)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Matrix:
+        if not -self.count <= index < self.count:
+            raise IndexError('Индекс вне пакета матриц')
+        area = self.size * self.size
+        start = (index % self.count) * area
+        return Matrix(self.size, self.size, self.values[start:start + area])
+
+    def vectorized(self):
+        """
+        numpy if it is installed and the batch is not empty, None otherwise
+        """
+        return optional_numpy() if self.count and self.size else None
+
+    def determinants(self) -> array:
+        np = self.vectorized()
+        if np is not None:
+            return array('d', np.linalg.det(self.to_numpy()).tobytes())
+        area = self.size * self.size
+        return array('d', [determinant_of(self.values, self.size, offset)
+                           for offset in range(0, self.count * area, area)])
+
+    def solve(self, rhs: Sequence[float]) -> array:
+        """
+        Solves every system with its vector of `rhs` (count * size values, vector after vector)
+        """
+        if len(rhs) != self.count * self.size:
+            raise ValueError('Длина правых частей не совпадает с размерами пакета матриц')
+        np = self.vectorized()
+        if np is not None:
+            vectors = np.asarray(rhs, dtype=np.float64).reshape(self.count, self.size, 1)
+            return array('d', self.linalg(np, np.linalg.solve, vectors).tobytes())
+        area, size = self.size * self.size, self.size
+        result = array('d')
+        for i in range(self.count):
+            lu, permutation, _ = decompose(self.values[i * area:(i + 1) * area], size)
+            result.extend(substitute(lu, permutation, size, rhs[i * size:(i + 1) * size], 1))
+        return result
+
+    def inverses(self) -> 'MatrixBatch':
+        np = self.vectorized()
+        if np is not None:
+            return MatrixBatch(self.count, self.size, self.linalg(np, np.linalg.inv).tobytes())
+        area, size = self.size * self.size, self.size
+        identity = Matrix.identity(size).real
+        result = array('d')
+        for i in range(self.count):
+            lu, permutation, _ = decompose(self.values[i * area:(i + 1) * area], size)
+            result.extend(substitute(lu, permutation, size, identity, size))
+        return MatrixBatch(self.count, size, result)
+
+    def linalg(self, np, function, *args):
+        """
+        `function` of numpy.linalg applied to the stacked matrices; a singular matrix raises ValueError
+        like decompose (numpy only notices exactly singular ones, the others give non-finite results)
+        """
+        try:
+            result = function(self.to_numpy(), *args)
+        except np.linalg.LinAlgError:
+            raise ValueError('Матрица вырождена') from None
+        if not np.isfinite(result).all():
+            raise ValueError('Матрица вырождена')
+        return result
+
+    def __matmul__(self, other: 'MatrixBatch') -> 'MatrixBatch':
+        if not isinstance(other, MatrixBatch):
+            return NotImplemented
+        if (self.count, self.size) != (other.count, other.size):
+            raise ValueError('Размеры пакетов матриц не совпадают')
+        area, size = self.size * self.size, self.size
+        result = array('d')
+        for i in range(self.count):
+            result.extend(multiply_blocked(self.values[i * area:(i + 1) * area],
+                                           other.values[i * area:(i + 1) * area], size, size, size))
+        return MatrixBatch(self.count, size, result)
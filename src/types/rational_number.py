@@ -1,34 +1,273 @@
+import builtins
+import math
+import re
+import sys
+from math import gcd
+from typing import Union
+
+from src.numeric import int_sqrt
 from src.utils import pow
 
+DECIMAL_PATTERN = re.compile(r'([+-]?)(\d+)(?:\.(\d+))?')
+HASH_MODULUS = sys.hash_info.modulus
+# exact integer powers whose result would be longer than this are computed with floats
+MAX_EXACT_POWER_BITS = 1 << 14
+# relative precision of RationalNumber.sqrt of a number that is not a square
+SQRT_PRECISION_BITS = 128
+
+Number = Union['RationalNumber', int, float]
+
 
 class RationalNumber:
-    def __init__(self, number: float):
-        self.number: float = number
+    """
+    Exact fraction numerator/denominator: the denominator is always positive and gcd(numerator, denominator) == 1.
+    Accepts ints, floats (converted exactly), decimal literals like '-2.125' and other RationalNumbers.
+    Arithmetic with integers (denominator 1) skips the gcd
+    """
+    __slots__ = ('numerator', 'denominator')
 
-    def __add__(self, other):
+    def __init__(self, numerator: Union[Number, str] = 0, denominator: int = 1) -> None:
+        if type(numerator) is int and denominator == 1:
+            self.numerator: int = numerator
+            self.denominator: int = 1
+            return
+        if isinstance(numerator, RationalNumber):
+            numerator, denominator = numerator.numerator, numerator.denominator * denominator
+        elif isinstance(numerator, float):
+            numerator, float_denominator = numerator.as_integer_ratio()
+            denominator *= float_denominator
+        elif isinstance(numerator, str):
+            match = DECIMAL_PATTERN.fullmatch(numerator)
+            if match is None:
+                raise ValueError(f'Некорректное рациональное число {numerator}')
+            sign, integer_part, fraction_part = match.groups()
+            fraction_part = fraction_part or ''
+            numerator = int(integer_part + fraction_part) * (-1 if sign == '-' else 1)
+            denominator *= 10 ** len(fraction_part)
+        elif not isinstance(numerator, int):
+            raise TypeError(f'Нельзя создать рациональное число из {type(numerator).__name__}')
+        if denominator == 0:
+            raise ZeroDivisionError("an attempt to divide by zero...")
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        divisor = gcd(numerator, denominator)
+        self.numerator = numerator // divisor
+        self.denominator = denominator // divisor
+
+    @classmethod
+    def from_normalized(cls, numerator: int, denominator: int) -> 'RationalNumber':
+        result = object.__new__(cls)
+        result.numerator = numerator
+        result.denominator = denominator
+        return result
+
+    @classmethod
+    def from_fraction(cls, numerator: int, denominator: int) -> 'RationalNumber':
+        """
+        Faster constructor for two ints with a non-zero denominator
+        """
+        if denominator == 1:
+            return cls.from_normalized(numerator, 1)
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        divisor = gcd(numerator, denominator)
+        if divisor == 1:
+            return cls.from_normalized(numerator, denominator)
+        return cls.from_normalized(numerator // divisor, denominator // divisor)
+
+    @staticmethod
+    def coerce(other) -> 'RationalNumber':
         if isinstance(other, RationalNumber):
-            return RationalNumber(self.number + other.number)
+            return other
+        if type(other) is int:
+            return RationalNumber.from_normalized(other, 1)
+        if isinstance(other, (int, float)):
+            return RationalNumber(other)
+        return NotImplemented
+
+    @property
+    def number(self) -> float:
+        return self.numerator / self.denominator
+
+    def is_integer(self) -> bool:
+        return self.denominator == 1
+
+    def sign(self) -> int:
+        return (self.numerator > 0) - (self.numerator < 0)
+
+    def __float__(self) -> float:
+        return self.numerator / self.denominator
+
+    def __int__(self) -> int:
+        if self.numerator < 0:
+            return -(-self.numerator // self.denominator)
+        return self.numerator // self.denominator
+
+    def __bool__(self) -> bool:
+        return self.numerator != 0
+
+    def __neg__(self) -> 'RationalNumber':
+        return RationalNumber.from_normalized(-self.numerator, self.denominator)
+
+    def __pos__(self) -> 'RationalNumber':
+        return self
+
+    def __abs__(self) -> 'RationalNumber':
+        return RationalNumber.from_normalized(abs(self.numerator), self.denominator)
+
+    def __add__(self, other):
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        if self.denominator == 1 and other.denominator == 1:
+            return RationalNumber.from_normalized(self.numerator + other.numerator, 1)
+        return RationalNumber.from_fraction(self.numerator * other.denominator + other.numerator * self.denominator,
+                                            self.denominator * other.denominator)
+
+    __radd__ = __add__
 
     def __sub__(self, other):
-        if isinstance(other, RationalNumber):
-            return RationalNumber(self.number - other.number)
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        return self + -other
+
+    def __rsub__(self, other):
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        return other + -self
 
     def __mul__(self, other):
-        if isinstance(other, RationalNumber):
-            return RationalNumber(self.number * other.number)
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        if self.denominator == 1 and other.denominator == 1:
+            return RationalNumber.from_normalized(self.numerator * other.numerator, 1)
+        return RationalNumber.from_fraction(self.numerator * other.numerator, self.denominator * other.denominator)
+
+    __rmul__ = __mul__
 
     def __truediv__(self, other):
-        if isinstance(other, RationalNumber):
-            if other.number == 0:
-                raise ZeroDivisionError("an attempt to divide by zero...")
-            return RationalNumber(self.number / other.number)
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        if other.numerator == 0:
+            raise ZeroDivisionError("an attempt to divide by zero...")
+        return RationalNumber.from_fraction(self.numerator * other.denominator, self.denominator * other.numerator)
+
+    def __rtruediv__(self, other):
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        return other / self
 
     def __mod__(self, other):
-        if isinstance(other, RationalNumber):
-            if other.number == 0:
-                raise ZeroDivisionError("an attempt to divide by zero...")
-            return RationalNumber(self.number % other.number)
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        if other.numerator == 0:
+            raise ZeroDivisionError("an attempt to divide by zero...")
+        return RationalNumber.from_fraction(
+            (self.numerator * other.denominator) % (other.numerator * self.denominator),
+            self.denominator * other.denominator
+        )
+
+    def __rmod__(self, other):
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        return other % self
 
     def __pow__(self, other, modulo=None):
-        if isinstance(other, RationalNumber):
-            return pow(self.number, other.number)
+        """
+        Exact for integer exponents (unless the result is huge), otherwise computed with utils.pow
+        """
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        if other.denominator == 1 and (self.numerator != 0 or other.numerator >= 0):
+            exponent = other.numerator
+            if self.denominator == 1 and abs(self.numerator) == 1:
+                return RationalNumber.from_normalized(-1 if self.numerator < 0 and exponent & 1 else 1, 1)
+            bits = max(abs(self.numerator).bit_length(), self.denominator.bit_length()) * abs(exponent)
+            if bits <= MAX_EXACT_POWER_BITS:
+                if exponent >= 0:
+                    return RationalNumber.from_normalized(self.numerator ** exponent, self.denominator ** exponent)
+                return RationalNumber.from_fraction(self.denominator ** -exponent, self.numerator ** -exponent)
+        if self.denominator == 1 == self.numerator:
+            return self
+        try:
+            result = float(pow(float(self), float(other)))
+        except OverflowError:
+            result = math.inf
+        if not math.isfinite(result):
+            raise ValueError('Результат возведения в степень не представим числом с плавающей точкой')
+        return RationalNumber(result)
+
+    def sqrt(self, precision: int = SQRT_PRECISION_BITS) -> 'RationalNumber':
+        """
+        Exact if the number is the square of a rational, otherwise rounded down with a relative error
+        below 2^-precision; computed with ints, so it works beyond the float range
+        """
+        if self.numerator < 0:
+            raise ValueError('sqrt принимает только положительные значения')
+        product = self.numerator * self.denominator
+        shift = max(0, precision + 1 - product.bit_length() // 2)
+        return RationalNumber.from_fraction(int_sqrt(product << 2 * shift), self.denominator << shift)
+
+    def __rpow__(self, other, modulo=None):
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        return other ** self
+
+    def compare(self, other) -> int:
+        other = self.coerce(other)
+        if other is NotImplemented:
+            return other
+        difference = self.numerator * other.denominator - other.numerator * self.denominator
+        return (difference > 0) - (difference < 0)
+
+    def __eq__(self, other):
+        if isinstance(other, float) and (other != other or other in (float('inf'), float('-inf'))):
+            return False
+        result = self.compare(other)
+        return result if result is NotImplemented else result == 0
+
+    def __lt__(self, other):
+        result = self.compare(other)
+        return result if result is NotImplemented else result < 0
+
+    def __le__(self, other):
+        result = self.compare(other)
+        return result if result is NotImplemented else result <= 0
+
+    def __gt__(self, other):
+        result = self.compare(other)
+        return result if result is NotImplemented else result > 0
+
+    def __ge__(self, other):
+        result = self.compare(other)
+        return result if result is NotImplemented else result >= 0
+
+    def __hash__(self) -> int:
+        """
+        The same hash as the equal int or float has
+        """
+        inverse = builtins.pow(self.denominator, HASH_MODULUS - 2, HASH_MODULUS)
+        if inverse == 0:
+            result = sys.hash_info.inf
+        else:
+            result = abs(self.numerator) % HASH_MODULUS * inverse % HASH_MODULUS
+        result = result if self.numerator >= 0 else -result
+        return -2 if result == -1 else result
+
+    def __repr__(self) -> str:
+        return f'RationalNumber({self.numerator}, {self.denominator})'
+
+    def __str__(self) -> str:
+        if self.denominator == 1:
+            return str(self.numerator)
+        return f'{self.numerator}/{self.denominator}'
+
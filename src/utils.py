@@ -1,12 +1,26 @@
+import math
 from typing import Iterable, Union
 
+from src import limits, numeric, profiling
+
 FloatOrStr = Union[float, str]
+# pow does not look up the limits for degrees up to this magnitude (constant chains are checked by expression_dag)
+UNCHECKED_DEGREE = 64.0
 
 
 def compare_floats_with_epsilon(left: float, right: float, epsilon: float = 10e-12) -> bool:
     return abs(right - left) < epsilon
 
 
+def is_zero(value, epsilon: float = 10e-12) -> bool:
+    """
+    Floats are compared with zero up to epsilon, exact numbers (ints, RationalNumber) are compared exactly
+    """
+    if isinstance(value, float):
+        return compare_floats_with_epsilon(value, 0.0, epsilon)
+    return value == 0
+
+
 def compare_with_list_of_floats(left: float, right: Iterable[float], epsilon: float = 10e-12) -> bool:
     result: bool = False
     for elem in right:
@@ -17,57 +31,44 @@ def compare_with_list_of_floats(left: float, right: Iterable[float], epsilon: fl
 
 
 def sqrt(num: float, epsilon: float = 10e-12) -> float:
-    """
-    source: https://stackoverflow.com/a/3047531/8990391
-    """
-    if compare_floats_with_epsilon(num, 0.0):
+    if compare_floats_with_epsilon(num, 0.0, epsilon):
         return 0.0
     if num < 0.0:
         raise ValueError("sqrt принимает только положительные значения")
-    last_guess = num / 2
-    while True:
-        guess = (last_guess + num / last_guess) / 2
-        if abs(guess - last_guess) < epsilon:
-            return guess
-        last_guess = guess
+    if profiling.stats is not None:
+        profiling.stats.count('sqrt_calls')
+        profiling.stats.count('sqrt_iterations', numeric.SQRT_ITERATIONS)
+    return numeric.sqrt(num)
 
 
 def sqr(num: float) -> float:
-    """
-    I improved the code from https://stackoverflow.com/a/3519308/8990391
-    """
     return num * num
 
 
 def pow(num: float, degree: float, epsilon: float = 10e-12) -> float:
     """
-    I improved the code from https://stackoverflow.com/a/3519308/8990391
+    Raises LimitExceeded for a non-finite degree and, unless num is 0 or ±1, for a degree beyond max_exponent
+    (see limits.check_exponent; degrees up to UNCHECKED_DEGREE are always allowed)
     """
-    sign = 1
+    if not -UNCHECKED_DEGREE <= degree <= UNCHECKED_DEGREE and (
+            not math.isfinite(degree) or abs(num) not in (0.0, 1.0)):
+        limits.check_exponent(degree)
+    sign = 1.0
     if num < 0.0:
         if int(degree) != degree:
             raise ValueError("Мнимые числа при возведении в степень")
-        degree = int(degree)
-        if degree % 2 == 1:
-            sign = -1
+        if int(degree) % 2 == 1:
+            sign = -1.0
         num = -num
-    if compare_floats_with_epsilon(num, 0.0):
+    if compare_floats_with_epsilon(num, 0.0, epsilon):
         if degree < 0.0:
             raise ZeroDivisionError("Деление на ноль при возведении в степень")
-        elif compare_floats_with_epsilon(degree, 0.0):
-            return 1
-        return 0
-    if compare_floats_with_epsilon(degree, 0.0):
-        return 1
-    if degree < 0:
-        return 1 / pow(num, -degree, epsilon)
-    if degree >= 10:
-        return sign * sqr(pow(num, degree / 2, epsilon / 2))
-    if degree >= 1:
-        return sign * num * pow(num, degree - 1, epsilon)
-    if epsilon >= 1:
-        return sign * sqrt(num)
-    return sign * sqrt(pow(num, degree * 2, epsilon * 2))
+        elif compare_floats_with_epsilon(degree, 0.0, epsilon):
+            return 1.0
+        return 0.0
+    if compare_floats_with_epsilon(degree, 0.0, epsilon):
+        return 1.0
+    return sign * numeric.power(num, degree)
 
 
 def floor(num: float) -> float:
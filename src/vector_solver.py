@@ -0,0 +1,112 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+EPSILON = 10e-12
+
+CASE_NO_SOLUTIONS = 0
+CASE_ANY_SOLUTION = 1
+CASE_LINEAR = 2
+CASE_DISCRIMINANT_ZERO = 3
+CASE_DISCRIMINANT_POSITIVE = 4
+CASE_DISCRIMINANT_NEGATIVE = 5
+
+
+class SolveManyResult(NamedTuple):
+    """
+    `roots_real` and `roots_imaginary` have the shape (n, 2), missing roots are NaN:
+    - CASE_NO_SOLUTIONS, CASE_ANY_SOLUTION: no roots
+    - CASE_LINEAR: one root in the first column
+    - CASE_DISCRIMINANT_ZERO: the same root in both columns
+    - CASE_DISCRIMINANT_POSITIVE: two real roots in ascending order
+    - CASE_DISCRIMINANT_NEGATIVE: the root with the positive imaginary part goes first
+    """
+    cases: np.ndarray
+    roots_real: np.ndarray
+    roots_imaginary: np.ndarray
+
+
+BLOCK_SIZE = 1 << 15
+
+
+def solve_many(a, b: Optional[np.ndarray] = None, c: Optional[np.ndarray] = None) -> SolveManyResult:
+    """
+    Solves a*X^2 + b*X + c = 0 for every triple of coefficients at once, with the same
+    case analysis and epsilon as EquationSolver. `a` may be a structured array with the fields `a`, `b` and `c`.
+    The arrays are processed in blocks of BLOCK_SIZE so that the temporaries stay in the CPU cache
+    """
+    if b is None and c is None:
+        a, b, c = a['a'], a['b'], a['c']
+    a, b, c = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64).ravel() for value in (a, b, c)))
+    size = a.shape[0]
+    cases = np.empty(size, dtype=np.int8)
+    roots_real = np.empty((size, 2))
+    roots_imaginary = np.empty((size, 2))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for start in range(0, size, BLOCK_SIZE):
+            block = slice(start, start + BLOCK_SIZE)
+            solve_block(a[block], b[block], c[block], cases[block], roots_real[block], roots_imaginary[block])
+    return SolveManyResult(cases, roots_real, roots_imaginary)
+
+
+def solve_block(a: np.ndarray, b: np.ndarray, c: np.ndarray,
+                cases: np.ndarray, roots_real: np.ndarray, roots_imaginary: np.ndarray) -> None:
+    quadratic = np.abs(a) >= EPSILON
+    linear = np.abs(b) >= EPSILON
+    linear &= ~quadratic
+    has_roots = quadratic | linear
+    discriminant = b * b
+    discriminant -= 4.0 * a * c
+    discriminant_abs = np.abs(discriminant)
+    discriminant_zero = discriminant_abs < EPSILON
+    discriminant_zero &= quadratic
+    discriminant_positive = discriminant > 0.0
+    discriminant_positive &= quadratic
+    discriminant_positive &= ~discriminant_zero
+    discriminant_negative = quadratic & ~(discriminant_positive | discriminant_zero)
+
+    np.copyto(cases, np.where(np.abs(c) < EPSILON, CASE_ANY_SOLUTION, CASE_NO_SOLUTIONS), casting='unsafe')
+    cases[linear] = CASE_LINEAR
+    cases[discriminant_negative] = CASE_DISCRIMINANT_NEGATIVE
+    cases[discriminant_positive] = CASE_DISCRIMINANT_POSITIVE
+    cases[discriminant_zero] = CASE_DISCRIMINANT_ZERO
+
+    double_a = a + a
+    center = np.negative(b)
+    center /= double_a
+    offset = np.sqrt(discriminant_abs, out=discriminant_abs)
+    offset /= double_a
+    np.abs(offset, out=offset)
+    small_center = np.abs(center) < EPSILON
+    small_center &= discriminant_negative
+    np.abs(center, out=center, where=small_center)
+
+    np.subtract(center, offset, out=roots_real[:, 0])
+    np.add(center, offset, out=roots_real[:, 1])
+    np.copyto(roots_real[:, 0], center, where=~discriminant_positive)
+    np.copyto(roots_real[:, 1], center, where=~discriminant_positive)
+    linear_root = np.negative(c)
+    linear_root /= b
+    np.copyto(roots_real[:, 0], linear_root, where=linear)
+    roots_real[linear, 1] = np.nan
+    roots_real[~has_roots] = np.nan
+
+    roots_imaginary[:, 0] = 0.0
+    roots_imaginary[:, 1] = 0.0
+    np.copyto(roots_imaginary[:, 0], offset, where=discriminant_negative)
+    np.negative(offset, out=roots_imaginary[:, 1], where=discriminant_negative)
+    roots_imaginary[linear, 1] = np.nan
+    roots_imaginary[~has_roots] = np.nan
+
+
+def residuals(a, b, c, result: SolveManyResult) -> np.ndarray:
+    """
+    |a*x^2 + b*x + c| at the roots of solve_many(a, b, c) with the shape (n, 2), NaN for missing roots
+    """
+    a, b, c = (np.asarray(value, dtype=np.float64).ravel()[:, np.newaxis] for value in (a, b, c))
+    roots = result.roots_real + 1j * result.roots_imaginary
+    values = a * roots
+    values += b
+    values *= roots
+    values += c
+    return np.abs(values)